@@ -12,7 +12,7 @@ import uuid
 import models
 
 from python.helpers import extract_tools, files, errors, history, tokens, context as context_helper
-from python.helpers import dirty_json
+from python.helpers import dirty_json, state_monitor
 from python.helpers.print_style import PrintStyle
 
 from langchain_core.prompts import (
@@ -22,13 +22,17 @@ from langchain_core.messages import SystemMessage, BaseMessage
 
 import python.helpers.log as Log
 from python.helpers.dirty_json import DirtyJson
-from python.helpers.defer import DeferredTask
+from python.helpers.defer import DeferredTask, EventLoopShards
+from python.helpers.stream_coalescer import StreamCoalescer
 from typing import Callable
 from python.helpers.localization import Localization
 from python.helpers.extension import call_extensions
 from python.helpers.errors import RepairableException
 
 
+CONTEXT_LOOPS = 4  # default number of event loop threads running agent contexts
+
+
 class AgentContextType(Enum):
     USER = "user"
     TASK = "task"
@@ -40,6 +44,7 @@ class AgentContext:
     _contexts: dict[str, "AgentContext"] = {}
     _counter: int = 0
     _notification_manager = None
+    _loop_shards: EventLoopShards | None = None
 
     def __init__(
         self,
@@ -82,6 +87,7 @@ class AgentContext:
         self.last_message = last_message or datetime.now(timezone.utc)
         self.data = data or {}
         self.output_data = output_data or {}
+        state_monitor.notify_change()
 
 
 
@@ -140,6 +146,8 @@ class AgentContext:
         context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        state_monitor.remove_scope(id)
+        state_monitor.notify_change()
         return context
 
     def get_data(self, key: str, recursive: bool = True):
@@ -169,7 +177,7 @@ class AgentContext:
             ),
             "no": self.no,
             "log_guid": self.log.guid,
-            "log_version": len(self.log.updates),
+            "log_version": self.log.get_version(),
             "log_length": len(self.log.logs),
             "paused": self.paused,
             "last_message": (
@@ -240,16 +248,39 @@ class AgentContext:
 
         return self.task
 
+    @classmethod
+    def get_loop_shards(cls) -> EventLoopShards:
+        # contexts run on A0_CONTEXT_LOOPS event loop threads, so a busy chat does not stall the others
+        if cls._loop_shards is None:
+            from python.helpers import dotenv
+
+            count = int(dotenv.get_dotenv_value("A0_CONTEXT_LOOPS", CONTEXT_LOOPS))
+            cls._loop_shards = EventLoopShards(cls.__name__, count)
+        return cls._loop_shards
+
     def run_task(
         self, func: Callable[..., Coroutine[Any, Any, Any]], *args: Any, **kwargs: Any
     ):
+        loop_thread = AgentContext.get_loop_shards().place()
         if not self.task:
             self.task = DeferredTask(
-                thread_name=self.__class__.__name__,
+                thread_name=loop_thread.thread_name,
             )
+        elif not self.task.is_running() and not self._has_pending_tasks():
+            # idle contexts move to the least loaded loop, a running one stays where it is
+            self.task.event_loop_thread = loop_thread
         self.task.start_task(func, *args, **kwargs)
         return self.task
 
+    def _has_pending_tasks(self) -> bool:
+        # asyncio tasks a run left in agent data (e.g. a history compression) are bound to its loop
+        agent = self.agent0
+        while agent:
+            if any(isinstance(value, asyncio.Future) and not value.done() for value in agent.data.values()):
+                return True
+            agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+        return False
+
     # this wrapper ensures that superior agents are called back if the chat was loaded from file and original callstack is gone
     async def _process_chain(self, agent: "Agent", msg: "UserMessage|str", user=True):
         try:
@@ -296,6 +327,18 @@ class UserMessage:
     system_message: list[str] = field(default_factory=list[str])
 
 
+@dataclass
+class ContextWindow:
+    """The last prompt sent to the model, rendered as text only when someone views it."""
+
+    messages: tuple[BaseMessage, ...]
+    tokens: int
+    system_tokens: int
+
+    def render(self) -> str:
+        return ChatPromptTemplate.from_messages(list(self.messages)).format()
+
+
 class LoopData:
     def __init__(self, **kwargs):
         self.iteration = -1
@@ -330,7 +373,8 @@ class Agent:
 
     DATA_NAME_SUPERIOR = "_superior"
     DATA_NAME_SUBORDINATE = "_subordinate"
-    DATA_NAME_CTX_WINDOW = "ctx_window"
+    DATA_NAME_CTX_WINDOW = "_ctx_window"
+    DATA_NAME_SYSTEM_PROMPT = "_system_prompt"
 
     def __init__(
         self, number: int, config: AgentConfig, context: AgentContext | None = None
@@ -351,6 +395,10 @@ class Agent:
         self.intervention: UserMessage | None = None
         self.data: dict[str, Any] = {}  # free data object all the tools can use
 
+        # load tool classes now instead of on first use
+        from python.helpers import tool_registry
+        tool_registry.preload(self.config.profile)
+
         asyncio.run(self.call_extensions("agent_init"))
 
     async def monologue(self):
@@ -489,13 +537,24 @@ class Agent:
 
         # set system prompt and message history
         loop_data.system = await self.get_system_prompt(self.loop_data)
-        loop_data.history_output = self.history.output()
+        history_output = self.history.output()
+        loop_data.history_output = list(history_output)
 
         # and allow extensions to edit them
         await self.call_extensions("message_loop_prompts_after", loop_data=loop_data)
 
-        # concatenate system prompt
-        system_text = "\n\n".join(loop_data.system)
+        # concatenate system prompt, reused with its token count while the segments are the same
+        system = tuple(loop_data.system)
+        cached_system = self.get_data(Agent.DATA_NAME_SYSTEM_PROMPT)
+        if cached_system and cached_system["segments"] == system:
+            system_text, system_tokens = cached_system["text"], cached_system["tokens"]
+        else:
+            system_text = "\n\n".join(system)
+            system_tokens = tokens.approximate_tokens(system_text, "estimate")
+            self.set_data(
+                Agent.DATA_NAME_SYSTEM_PROMPT,
+                {"segments": system, "text": system_text, "tokens": system_tokens},
+            )
 
         # join extras
         extras = history.Message(  # type: ignore[abstract]
@@ -509,25 +568,32 @@ class Agent:
         ).output()
         loop_data.extras_temporary.clear()
 
-        # convert history + extras to LLM format
-        history_langchain: list[BaseMessage] = history.output_langchain(
-            loop_data.history_output + extras
-        )
+        # convert history + extras to LLM format, unchanged history is converted incrementally by History
+        if loop_data.history_output == history_output:
+            history_langchain: list[BaseMessage] = history.group_messages_abab(
+                self.history.output_langchain() + history.output_langchain(extras)
+            )
+        else:
+            history_langchain = history.output_langchain(
+                loop_data.history_output + extras
+            )
 
         # build full prompt from system prompt, message history and extrS
         full_prompt: list[BaseMessage] = [
             SystemMessage(content=system_text),
             *history_langchain,
         ]
-        full_text = ChatPromptTemplate.from_messages(full_prompt).format()
 
-        # store as last context window content
+        # store as last context window, the messages are kept and only rendered when viewed,
+        # the token figure is only displayed so it is estimated per message
         self.set_data(
             Agent.DATA_NAME_CTX_WINDOW,
-            {
-                "text": full_text,
-                "tokens": tokens.approximate_tokens(full_text),
-            },
+            ContextWindow(
+                messages=tuple(full_prompt),
+                tokens=system_tokens
+                + tokens.approximate_messages_tokens(history_langchain, "estimate"),
+                system_tokens=system_tokens,
+            ),
         )
 
         return full_prompt
@@ -737,14 +803,34 @@ class Agent:
         # model class
         model = self.get_chat_model()
 
-        # call model
-        response, reasoning = await model.unified_call(
-            messages=messages,
-            reasoning_callback=reasoning_callback,
-            response_callback=response_callback,
-            rate_limiter_callback=self.rate_limiter_callback if not background else None,
+        # batch stream deltas, callbacks run extensions, logging and printing once per batch
+        reasoning_stream = StreamCoalescer(reasoning_callback) if reasoning_callback else None
+        response_stream = (
+            StreamCoalescer(
+                response_callback,
+                before=reasoning_stream.flush if reasoning_stream else None,
+            )
+            if response_callback
+            else None
         )
 
+        # call model
+        try:
+            response, reasoning = await model.unified_call(
+                messages=messages,
+                reasoning_callback=reasoning_stream.push if reasoning_stream else None,
+                response_callback=response_stream.push if response_stream else None,
+                rate_limiter_callback=self.rate_limiter_callback if not background else None,
+            )
+            if reasoning_stream:
+                await reasoning_stream.close()
+            if response_stream:
+                await response_stream.close()
+        finally:
+            for stream in (reasoning_stream, response_stream):
+                if stream:
+                    stream.cancel()
+
         return response, reasoning
 
     async def rate_limiter_callback(
@@ -876,7 +962,13 @@ class Agent:
         try:
             if len(stream) < 25:
                 return  # no reason to try
-            response = DirtyJson.parse_string(stream)
+            # parse incrementally, only the text added since the last chunk is consumed
+            parser = self.loop_data.params_temporary.get("response_stream_parser")
+            if not parser:
+                parser = dirty_json.DirtyJsonStream()
+                self.loop_data.params_temporary["response_stream_parser"] = parser
+            parser.update(stream)
+            response = parser.snapshot()
             if isinstance(response, dict):
                 await self.call_extensions(
                     "response_stream",
@@ -892,28 +984,10 @@ class Agent:
         self, name: str, method: str | None, args: dict, message: str, loop_data: LoopData | None, **kwargs
     ):
         from python.tools.unknown import Unknown
-        from python.helpers.tool import Tool
-
-        classes = []
-
-        # try agent tools first
-        if self.config.profile:
-            try:
-                classes = extract_tools.load_classes_from_file(
-                    "agents/" + self.config.profile + "/tools/" + name + ".py", Tool  # type: ignore[arg-type]
-                )
-            except Exception:
-                pass
+        from python.helpers import tool_registry
 
-        # try default tools
-        if not classes:
-            try:
-                classes = extract_tools.load_classes_from_file(
-                    "python/tools/" + name + ".py", Tool  # type: ignore[arg-type]
-                )
-            except Exception as e:
-                pass
-        tool_class = classes[0] if classes else Unknown
+        # agent tools first, then default tools
+        tool_class = tool_registry.get_tool_class(self.config.profile, name) or Unknown
         return tool_class(
             agent=self, name=name, method=method, args=args, message=message, loop_data=loop_data, **kwargs
         )
@@ -10,6 +10,7 @@ from typing import (
     Optional,
     Iterator,
     AsyncIterator,
+    Sequence,
     Tuple,
     TypedDict,
 )
@@ -24,7 +25,7 @@ from python.helpers import settings, dirty_json
 from python.helpers.dotenv import load_dotenv
 from python.helpers.providers import get_provider_config
 from python.helpers.rate_limiter import RateLimiter
-from python.helpers.tokens import approximate_tokens
+from python.helpers.tokens import approximate_tokens, approximate_messages_tokens
 from python.helpers import dirty_json, browser_use_monkeypatch
 
 from langchain_core.language_models.chat_models import SimpleChatModel
@@ -219,9 +220,7 @@ def get_rate_limiter(
 ) -> RateLimiter:
     key = f"{provider}\\{name}"
     rate_limiters[key] = limiter = rate_limiters.get(key, RateLimiter(seconds=60))
-    limiter.limits["requests"] = requests or 0
-    limiter.limits["input"] = input or 0
-    limiter.limits["output"] = output or 0
+    limiter.set_limits(requests=requests or 0, input=input or 0, output=output or 0)
     return limiter
 
 
@@ -252,7 +251,7 @@ def _is_transient_litellm_error(exc: Exception) -> bool:
 
 async def apply_rate_limiter(
     model_config: ModelConfig | None,
-    input_text: str,
+    input_text: str | Sequence[Any],
     rate_limiter_callback: (
         Callable[[str, str, int, int], Awaitable[bool]] | None
     ) = None,
@@ -266,15 +265,20 @@ async def apply_rate_limiter(
         model_config.limit_input,
         model_config.limit_output,
     )
-    limiter.add(input=approximate_tokens(input_text))
-    limiter.add(requests=1)
-    await limiter.wait(rate_limiter_callback)
+    # limits are accounted with estimated counts, the messages are not encoded
+    input_tokens = (
+        approximate_tokens(input_text, "estimate")
+        if isinstance(input_text, str)
+        else approximate_messages_tokens(input_text, "estimate")
+    )
+    # the request is counted once it fits, waiting requests are admitted in order
+    await limiter.wait(rate_limiter_callback, input=input_tokens, requests=1)
     return limiter
 
 
 def apply_rate_limiter_sync(
     model_config: ModelConfig | None,
-    input_text: str,
+    input_text: str | Sequence[Any],
     rate_limiter_callback: (
         Callable[[str, str, int, int], Awaitable[bool]] | None
     ) = None,
@@ -376,7 +380,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
         msgs = self._convert_messages(messages)
 
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, str(msgs))
+        apply_rate_limiter_sync(self.a0_model_conf, msgs)
 
         # Call the model
         resp = completion(
@@ -400,7 +404,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
         msgs = self._convert_messages(messages)
 
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self.a0_model_conf, str(msgs))
+        apply_rate_limiter_sync(self.a0_model_conf, msgs)
 
         result = ChatGenerationResult()
 
@@ -431,7 +435,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
         msgs = self._convert_messages(messages)
 
         # Apply rate limiting if configured
-        await apply_rate_limiter(self.a0_model_conf, str(msgs))
+        await apply_rate_limiter(self.a0_model_conf, msgs)
 
         result = ChatGenerationResult()
 
@@ -482,7 +486,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
 
         # Apply rate limiting if configured
         limiter = await apply_rate_limiter(
-            self.a0_model_conf, str(msgs_conv), rate_limiter_callback
+            self.a0_model_conf, msgs_conv, rate_limiter_callback
         )
 
         # Prepare call kwargs and retry config (strip A0-only params before calling LiteLLM)
@@ -521,11 +525,11 @@ class LiteLLMChatWrapper(SimpleChatModel):
                             if tokens_callback:
                                 await tokens_callback(
                                     output["reasoning_delta"],
-                                    approximate_tokens(output["reasoning_delta"]),
+                                    approximate_tokens(output["reasoning_delta"], "estimate"),
                                 )
                             # Add output tokens to rate limiter if configured
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["reasoning_delta"]))
+                                limiter.add(output=approximate_tokens(output["reasoning_delta"], "estimate"))
                         # collect response delta and call callbacks
                         if output["response_delta"]:
                             if response_callback:
@@ -533,11 +537,11 @@ class LiteLLMChatWrapper(SimpleChatModel):
                             if tokens_callback:
                                 await tokens_callback(
                                     output["response_delta"],
-                                    approximate_tokens(output["response_delta"]),
+                                    approximate_tokens(output["response_delta"], "estimate"),
                                 )
                             # Add output tokens to rate limiter if configured
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["response_delta"]))
+                                limiter.add(output=approximate_tokens(output["response_delta"], "estimate"))
 
                 # non-stream response
                 else:
@@ -545,9 +549,9 @@ class LiteLLMChatWrapper(SimpleChatModel):
                     output = result.add_chunk(parsed)
                     if limiter:
                         if output["response_delta"]:
-                            limiter.add(output=approximate_tokens(output["response_delta"]))
+                            limiter.add(output=approximate_tokens(output["response_delta"], "estimate"))
                         if output["reasoning_delta"]:
-                            limiter.add(output=approximate_tokens(output["reasoning_delta"]))
+                            limiter.add(output=approximate_tokens(output["reasoning_delta"], "estimate"))
 
                 # Successful completion of stream
                 return result.response, result.reasoning
@@ -615,7 +619,7 @@ class BrowserCompatibleChatWrapper(ChatOpenRouter):
         **kwargs: Any,
     ):
         # Apply rate limiting if configured
-        apply_rate_limiter_sync(self._wrapper.a0_model_conf, str(messages))
+        apply_rate_limiter_sync(self._wrapper.a0_model_conf, messages)
 
         # Call the model
         try:
@@ -6,6 +6,9 @@ from python.helpers.print_style import PrintStyle
 
 
 class CallSubordinate(VariablesPlugin):
+    def get_dependencies(self, file: str, backup_dirs: list[str] | None = None) -> list[str]:
+        return ["agents/*/_context.md"]
+
     def get_variables(self, file: str, backup_dirs: list[str] | None = None) -> dict[str, Any]:
 
         # collect all prompt profiles from subdirectories (_context.md file)
@@ -1,6 +1,8 @@
 from python.helpers.api import ApiHandler, Input, Output, Request, Response
 
-from python.helpers import tokens
+from agent import ContextWindow
+
+LEGACY_DATA_NAME = "ctx_window"  # chats saved with the rendered window
 
 
 class GetCtxWindow(ApiHandler):
@@ -9,6 +11,10 @@ class GetCtxWindow(ApiHandler):
         context = self.use_context(ctxid)
         agent = context.streaming_agent or context.agent0
         window = agent.get_data(agent.DATA_NAME_CTX_WINDOW)
+        if isinstance(window, ContextWindow):
+            return {"content": window.render(), "tokens": window.tokens}
+
+        window = agent.get_data(LEGACY_DATA_NAME)
         if not window or not isinstance(window, dict):
             return {"content": "", "tokens": 0}
 
@@ -0,0 +1,19 @@
+from python.helpers.api import ApiHandler, Request, Response
+
+from agent import AgentContext
+from python.helpers.defer import EventLoopThread
+
+
+class GetEventLoops(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        shards = AgentContext.get_loop_shards()
+        placement = {
+            context.id: context.task.event_loop_thread.thread_name
+            for context in AgentContext.all()
+            if context.task
+        }
+        return {
+            "context_loops": shards.get_metrics(),
+            "contexts": placement,
+            "all_loops": EventLoopThread.get_all_metrics(),
+        }
@@ -0,0 +1,11 @@
+from python.helpers.api import ApiHandler, Request, Response
+
+from python.helpers import extension
+
+
+class GetExtensionTimings(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        timings = extension.get_timings()
+        if input.get("reset", False):
+            extension.reset_timings()
+        return {"timings": timings}
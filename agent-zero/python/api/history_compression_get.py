@@ -0,0 +1,8 @@
+from python.helpers.api import ApiHandler, Request, Response
+
+from python.helpers import history
+
+
+class GetHistoryCompression(ApiHandler):
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        return {"compression": history.get_compress_metrics()}
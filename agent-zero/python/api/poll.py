@@ -27,8 +27,9 @@ class Poll(ApiHandler):
         else:
             context = None
 
-        # Get logs only if we have a context
-        logs = context.log.output(start=from_no) if context else []
+        # Get logs only if we have a context, up to the version reported back
+        log_version = context.log.get_version() if context else 0
+        logs = context.log.output(start=from_no, end=log_version) if context else []
 
         # Get notifications from global notification manager
         notification_manager = AgentContext.get_notification_manager()
@@ -115,7 +116,7 @@ class Poll(ApiHandler):
             "tasks": tasks,
             "logs": logs,
             "log_guid": context.log.guid if context else "",
-            "log_version": len(context.log.updates) if context else 0,
+            "log_version": log_version,
             "log_progress": context.log.progress if context else 0,
             "log_progress_active": context.log.progress_active if context else False,
             "paused": context.paused if context else False,
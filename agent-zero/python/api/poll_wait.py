@@ -0,0 +1,75 @@
+import hashlib
+import json
+import threading
+
+from python.api.poll import Poll
+from python.helpers.api import Request, Response
+from python.helpers import state_monitor
+
+WAIT_TIMEOUT = 25.0  # seconds a request waits for a change before answering anyway
+MAX_WAITS_PER_CLIENT = 4  # waiting requests per client address, each one holds a server thread
+
+_waits: dict[str, int] = {}
+_waits_lock = threading.Lock()
+
+
+def _start_wait(client: str) -> bool:
+    with _waits_lock:
+        if _waits.get(client, 0) >= MAX_WAITS_PER_CLIENT:
+            return False
+        _waits[client] = _waits.get(client, 0) + 1
+        return True
+
+
+def _end_wait(client: str):
+    with _waits_lock:
+        _waits[client] -= 1
+        if not _waits[client]:
+            del _waits[client]
+
+
+class PollWait(Poll):
+    """Long-poll variant of /poll.
+
+    Waits until the selected chat or global state changed after the client's changes_version,
+    then answers like /poll. The chat and task lists are left out when they still match the
+    client's lists_hash. /poll stays available for clients that poll on an interval.
+
+    The web server runs every request on its own thread, and so does the event loop of an
+    async handler, so a waiting request holds a thread for up to WAIT_TIMEOUT. Aborting the
+    request in the browser does not end the wait. At most MAX_WAITS_PER_CLIENT requests wait
+    per client address, further ones answer at once with wait_refused set.
+    """
+
+    async def process(self, input: dict, request: Request) -> dict | Response:
+        version = input.get("changes_version")
+        wait_refused = False
+        if version is not None:
+            client = request.remote_addr or ""
+            if _start_wait(client):
+                try:
+                    timeout = min(float(input.get("timeout", WAIT_TIMEOUT)), WAIT_TIMEOUT)
+                    scopes = state_monitor.get_scopes(input.get("context", "") or "")
+                    await state_monitor.wait_for_change(int(version), timeout, scopes)
+                finally:
+                    _end_wait(client)
+            else:
+                wait_refused = True
+
+        # taken before the state is read, a change made meanwhile ends the next wait at once
+        changes_version = state_monitor.get_version()
+        output = await super().process(input, request)
+        if not isinstance(output, dict):
+            return output
+
+        lists = json.dumps([output["contexts"], output["tasks"]], sort_keys=True, default=str)
+        lists_hash = hashlib.sha1(lists.encode("utf-8")).hexdigest()
+        if input.get("lists_hash") == lists_hash:
+            del output["contexts"], output["tasks"]
+            output["lists_unchanged"] = True
+
+        output["lists_hash"] = lists_hash
+        output["changes_version"] = changes_version
+        if wait_refused:
+            output["wait_refused"] = True
+        return output
@@ -1,18 +1,39 @@
 import asyncio
 from python.helpers.extension import Extension
-from agent import LoopData
+from python.helpers import history
+from agent import Agent, LoopData
 
 DATA_NAME_TASK = "_organize_history_task"
+DATA_NAME_PROACTIVE = "_organize_history_proactive"  # last proactive task, until a prompt sees it
 
 
-class OrganizeHistory(Extension):
-    async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
-        # is there a running task? if yes, skip this round, the wait extension will double check the context size
-        task = self.agent.get_data(DATA_NAME_TASK)
-        if task and not task.done():
+def start_compression(agent: Agent, proactive: bool = False):
+    # is there a running task? if yes, skip this round, the wait extension will double check the context size
+    task = agent.get_data(DATA_NAME_TASK)
+    if task and not task.done():
+        return
+
+    if proactive:
+        # idle time, compress down to the low watermark so that prompts do not wait later
+        if not agent.history.is_over_low_watermark():
             return
+        history.count_compression("proactive")
+        task = asyncio.create_task(compress_proactively(agent))
+        agent.set_data(DATA_NAME_PROACTIVE, task)
+    else:
+        task = asyncio.create_task(agent.history.compress())
+    # set to agent to be able to wait for it
+    agent.set_data(DATA_NAME_TASK, task)
+
 
-        # start task
-        task = asyncio.create_task(self.agent.history.compress())
-        # set to agent to be able to wait for it
-        self.agent.set_data(DATA_NAME_TASK, task)
+async def compress_proactively(agent: Agent) -> int:
+    """Compress down to the low watermark, returns the tokens removed."""
+    before = agent.history.get_tokens()
+    await agent.history.compress(history.get_low_watermark())
+    # messages added meanwhile are subtracted too, so this never overstates the savings
+    return max(0, before - agent.history.get_tokens())
+
+
+class OrganizeHistory(Extension):
+    async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
+        start_compression(self.agent)
@@ -1,13 +1,34 @@
 from python.helpers.extension import Extension
+from python.helpers import history
+from python.helpers.defer import await_task
 from agent import LoopData
-from python.extensions.message_loop_end._10_organize_history import DATA_NAME_TASK
+from python.extensions.message_loop_end._10_organize_history import (
+    DATA_NAME_TASK,
+    DATA_NAME_PROACTIVE,
+)
 import asyncio
 
 
 class OrganizeHistoryWait(Extension):
     async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
 
+        # a finished proactive compression saved a wait if the history is under the limit now,
+        # but would be over it with the tokens the compression removed
+        proactive = self.agent.get_data(DATA_NAME_PROACTIVE)
+        if proactive and proactive.done():
+            self.agent.set_data(DATA_NAME_PROACTIVE, None)
+            if (
+                not proactive.cancelled()
+                and not proactive.exception()
+                and not self.agent.history.is_over_limit()
+                and self.agent.history.is_over_limit(proactive.result())
+            ):
+                history.count_compression("waits_avoided")
+
         # sync action only required if the history is too large, otherwise leave it in background
+        if self.agent.history.is_over_limit():
+            history.count_compression("waits")
+
         while self.agent.history.is_over_limit():
             # get task
             task = self.agent.get_data(DATA_NAME_TASK)
@@ -17,8 +38,8 @@ class OrganizeHistoryWait(Extension):
                 if not task.done():
                     self.agent.context.log.set_progress("Compressing history...")
 
-                # Wait for the task to complete
-                await task
+                # Wait for the task to complete, it may run on the loop of an earlier run
+                await await_task(task)
 
                 # Clear the coroutine data after it's done
                 self.agent.set_data(DATA_NAME_TASK, None)
@@ -26,4 +47,3 @@ class OrganizeHistoryWait(Extension):
                 # no task running, start and wait
                 self.agent.context.log.set_progress("Compressing history...")
                 await self.agent.history.compress()
-
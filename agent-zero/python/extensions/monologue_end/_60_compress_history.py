@@ -0,0 +1,9 @@
+from python.helpers.extension import Extension
+from agent import LoopData
+from python.extensions.message_loop_end._10_organize_history import start_compression
+
+
+class CompressHistory(Extension):
+    async def execute(self, loop_data: LoopData = LoopData(), **kwargs):
+        # waiting for the user, the history can be compressed in the background
+        start_compression(self.agent, proactive=True)
@@ -4,7 +4,7 @@ from python.helpers.extension import Extension
 class MaskReasoningStreamEnd(Extension):
     async def execute(self, **kwargs):
         # Get agent and finalize the streaming filter
-        agent = kwargs.get("agent")
+        agent = self.agent
         if not agent:
             return
 
@@ -41,11 +41,6 @@ class LogFromStream(Extension):
         # update log message
         log_item = loop_data.params_temporary["log_item_generating"]
 
-        # keep reasoning from previous logs in kvps
-        kvps = {}
-        if log_item.kvps is not None and "reasoning" in log_item.kvps:
-            kvps["reasoning"] = log_item.kvps["reasoning"]
-        kvps.update(parsed)
-
-        # update the log item
-        log_item.update(heading=heading, content=text, kvps=kvps)
\ No newline at end of file
+        # update the log item, the streamed text and parsed fields are only masked where they grew,
+        # parsed is a full snapshot, reasoning streamed before stays in kvps untouched
+        log_item.update_stream(heading=heading, content=text, kvps=parsed, keep_kvps=["reasoning"])
\ No newline at end of file
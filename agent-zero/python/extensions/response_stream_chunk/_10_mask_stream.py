@@ -6,19 +6,20 @@ from python.helpers.secrets import get_secrets_manager
 class MaskResponseStreamChunk(Extension):
 
     async def execute(self, **kwargs):
-        # Get stream data and agent from kwargs
+        # Get stream data from kwargs
         stream_data = kwargs.get("stream_data")
-        agent = kwargs.get("agent")
+        agent = self.agent
         if not agent or not stream_data:
             return
 
         try:
             secrets_mgr = get_secrets_manager(self.agent.context)
 
-            # Initialize filter if not exists
+            # Initialize filter if not exists, a new stream starts with the full text as its chunk,
+            # a filter left over from an interrupted stream must not be continued
             filter_key = "_resp_stream_filter"
             filter_instance = agent.get_data(filter_key)
-            if not filter_instance:
+            if not filter_instance or stream_data["chunk"] == stream_data["full"]:
                 filter_instance = secrets_mgr.create_streaming_filter()
                 agent.set_data(filter_key, filter_instance)
 
@@ -28,13 +29,8 @@ class MaskResponseStreamChunk(Extension):
             # Update the stream data with processed chunk
             stream_data["chunk"] = processed_chunk
 
-            # Also mask the full text for consistency
-            stream_data["full"] = secrets_mgr.mask_values(stream_data["full"])
-
-            # Print the processed chunk (this is where printing should happen)
-            if processed_chunk:
-                from python.helpers.print_style import PrintStyle
-                PrintStyle().stream(processed_chunk)
+            # The filter keeps the masked text emitted so far, no need to re-mask the full text
+            stream_data["full"] = filter_instance.emitted
         except Exception as e:
             # If masking fails, proceed without masking
             pass
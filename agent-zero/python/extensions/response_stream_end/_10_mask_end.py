@@ -5,7 +5,7 @@ from python.helpers.secrets import SecretsManager
 class MaskResponseStreamEnd(Extension):
     async def execute(self, **kwargs):
         # Get agent and finalize the streaming filter
-        agent = kwargs.get("agent")
+        agent = self.agent
         if not agent:
             return
 
@@ -2,8 +2,9 @@ from typing import Any
 from python.helpers.extension import Extension
 from python.helpers.mcp_handler import MCPConfig
 from agent import Agent, LoopData
-from python.helpers.settings import get_settings
+from python.helpers.settings import get_settings, get_settings_version
 from python.helpers import projects
+from python.helpers.prompt_segments import get_segment
 
 
 class SystemPrompt(Extension):
@@ -31,27 +32,45 @@ class SystemPrompt(Extension):
             system_prompt.append(project_prompt)
 
 
+# each segment is cached until its keys or the files it was built from change
+
+
 def get_main_prompt(agent: Agent):
-    return agent.read_prompt("agent.system.main.md")
+    return get_segment(
+        agent,
+        "main",
+        (agent.config.profile,),
+        lambda: agent.read_prompt("agent.system.main.md"),
+    )
 
 
 def get_tools_prompt(agent: Agent):
-    prompt = agent.read_prompt("agent.system.tools.md")
-    if agent.config.chat_model.vision:
-        prompt += "\n\n" + agent.read_prompt("agent.system.tools_vision.md")
-    return prompt
+    def build():
+        prompt = agent.read_prompt("agent.system.tools.md")
+        if agent.config.chat_model.vision:
+            prompt += "\n\n" + agent.read_prompt("agent.system.tools_vision.md")
+        return prompt
+
+    return get_segment(
+        agent, "tools", (agent.config.profile, agent.config.chat_model.vision), build
+    )
 
 
 def get_mcp_tools_prompt(agent: Agent):
     mcp_config = MCPConfig.get_instance()
     if mcp_config.servers:
-        pre_progress = agent.context.log.progress
-        agent.context.log.set_progress(
-            "Collecting MCP tools"
-        )  # MCP might be initializing, better inform via progress bar
-        tools = MCPConfig.get_instance().get_tools_prompt()
-        agent.context.log.set_progress(pre_progress)  # return original progress
-        return tools
+        MCPConfig.wait_for_lock()  # pending initialization changes the tools
+
+        def build():
+            pre_progress = agent.context.log.progress
+            agent.context.log.set_progress(
+                "Collecting MCP tools"
+            )  # MCP might be initializing, better inform via progress bar
+            tools = MCPConfig.get_instance().get_tools_prompt()
+            agent.context.log.set_progress(pre_progress)  # return original progress
+            return tools
+
+        return get_segment(agent, "mcp_tools", (MCPConfig.get_tools_version(),), build)
     return ""
 
 
@@ -61,22 +80,41 @@ def get_secrets_prompt(agent: Agent):
         from python.helpers.secrets import get_secrets_manager
 
         secrets_manager = get_secrets_manager(agent.context)
-        secrets = secrets_manager.get_secrets_for_prompt()
-        vars = get_settings()["variables"]
-        return agent.read_prompt("agent.system.secrets.md", secrets=secrets, vars=vars)
+
+        def build():
+            secrets = secrets_manager.get_secrets_for_prompt()
+            vars = get_settings()["variables"]
+            return agent.read_prompt("agent.system.secrets.md", secrets=secrets, vars=vars)
+
+        return get_segment(
+            agent,
+            "secrets",
+            (id(secrets_manager), secrets_manager.get_version(), get_settings_version()),
+            build,
+        )
     except Exception as e:
         # If secrets module is not available or has issues, return empty string
         return ""
 
 
 def get_project_prompt(agent: Agent):
-    result = agent.read_prompt("agent.system.projects.main.md")
     project_name = agent.context.get_data(projects.CONTEXT_DATA_KEY_PROJECT)
-    if project_name:
-        project_vars = projects.build_system_prompt_vars(project_name)
-        result += "\n\n" + agent.read_prompt(
-            "agent.system.projects.active.md", **project_vars
-        )
-    else:
-        result += "\n\n" + agent.read_prompt("agent.system.projects.inactive.md")
-    return result
+
+    def build():
+        result = agent.read_prompt("agent.system.projects.main.md")
+        if project_name:
+            project_vars = projects.build_system_prompt_vars(project_name)
+            result += "\n\n" + agent.read_prompt(
+                "agent.system.projects.active.md", **project_vars
+            )
+        else:
+            result += "\n\n" + agent.read_prompt("agent.system.projects.inactive.md")
+        return result
+
+    return get_segment(
+        agent,
+        "project",
+        (project_name,),
+        build,
+        projects.get_system_prompt_dependencies(project_name) if project_name else (),
+    )
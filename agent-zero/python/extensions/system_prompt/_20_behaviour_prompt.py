@@ -1,13 +1,22 @@
 from datetime import datetime
 from python.helpers.extension import Extension
 from agent import Agent, LoopData
+import glob
 from python.helpers import files, memory
+from python.helpers.prompt_segments import get_segment
 
 
 class BehaviourPrompt(Extension):
 
     async def execute(self, system_prompt: list[str]=[], loop_data: LoopData = LoopData(), **kwargs):
-        prompt = read_rules(self.agent)
+        rules_file = get_custom_rules_file(self.agent)
+        prompt = get_segment(
+            self.agent,
+            "behaviour",
+            (rules_file,),
+            lambda: read_rules(self.agent),
+            [glob.escape(rules_file)],  # custom rules are read without prompt caching
+        )
         system_prompt.insert(0, prompt) #.append(prompt)
 
 def get_custom_rules_file(agent: Agent):
@@ -0,0 +1,8 @@
+from python.helpers.extension import Extension
+from python.extensions.message_loop_end._10_organize_history import start_compression
+
+
+class CompressHistory(Extension):
+    async def execute(self, **kwargs):
+        # the tool or subordinate runs meanwhile, the history can be compressed in the background
+        start_compression(self.agent, proactive=True)
@@ -6,6 +6,8 @@ from typing import Any, Callable, Optional, Coroutine, TypeVar, Awaitable
 
 T = TypeVar("T")
 
+LAG_PROBE_INTERVAL = 0.5  # how often each event loop measures its scheduling lag
+
 class EventLoopThread:
     _instances = {}
     _lock = threading.Lock()
@@ -13,6 +15,11 @@ class EventLoopThread:
     def __init__(self, thread_name: str = "Background") -> None:
         """Initialize the event loop thread."""
         self.thread_name = thread_name
+        if not hasattr(self, "active"):
+            self.active = 0  # coroutines started by run_coroutine and not finished yet
+            self.lag = 0.0  # last measured delay of a scheduled callback, in seconds
+            self.max_lag = 0.0
+            self._active_lock = threading.Lock()
         self._start()
 
     def __new__(cls, thread_name: str = "Background"):
@@ -25,6 +32,7 @@ class EventLoopThread:
     def _start(self):
         if not hasattr(self, "loop") or not self.loop:
             self.loop = asyncio.new_event_loop()
+            self.loop.call_soon(self._probe_lag, self.loop)
         if not hasattr(self, "thread") or not self.thread:
             self.thread = threading.Thread(
                 target=self._run_event_loop, daemon=True, name=self.thread_name
@@ -47,7 +55,66 @@ class EventLoopThread:
         self._start()
         if not self.loop:
             raise RuntimeError("Event loop is not initialized")
-        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        with self._active_lock:
+            self.active += 1
+        return asyncio.run_coroutine_threadsafe(self._track(coro), self.loop)
+
+    async def _track(self, coro):
+        # counted until the coroutine returns, a cancelled one may still be cleaning up
+        try:
+            return await coro
+        finally:
+            with self._active_lock:
+                self.active -= 1
+
+    def _probe_lag(self, loop: asyncio.AbstractEventLoop, expected: float | None = None):
+        # a callback running later than planned means something blocked the loop meanwhile
+        if expected is not None:
+            self.lag = max(0.0, loop.time() - expected)
+            self.max_lag = max(self.max_lag, self.lag)
+        if loop is self.loop:
+            loop.call_later(
+                LAG_PROBE_INTERVAL, self._probe_lag, loop, loop.time() + LAG_PROBE_INTERVAL
+            )
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            "name": self.thread_name,
+            "active": self.active,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+        }
+
+    @classmethod
+    def get_all_metrics(cls) -> list[dict[str, Any]]:
+        with cls._lock:
+            instances = list(cls._instances.values())
+        return [instance.get_metrics() for instance in instances]
+
+
+class EventLoopShards:
+    """Spreads tasks of one kind over several event loop threads.
+
+    A task blocking its loop with CPU work then only delays tasks of its own shard.
+    New tasks go to the shard with the fewest running tasks.
+    """
+
+    def __init__(self, name: str, count: int):
+        self.name = name
+        self.count = max(1, count)
+        # a single shard keeps the plain thread name
+        self.names = (
+            [name] if self.count == 1 else [f"{name}-{i}" for i in range(self.count)]
+        )
+
+    def get_threads(self) -> list[EventLoopThread]:
+        return [EventLoopThread(name) for name in self.names]
+
+    def place(self) -> EventLoopThread:
+        return min(self.get_threads(), key=lambda thread: thread.active)
+
+    def get_metrics(self) -> list[dict[str, Any]]:
+        return [thread.get_metrics() for thread in self.get_threads()]
 
 
 @dataclass
@@ -63,6 +130,7 @@ class DeferredTask:
     ):
         self.event_loop_thread = EventLoopThread(thread_name)
         self._future: Optional[Future] = None
+        self._running = False
         self.children: list[ChildTask] = []
 
     def start_task(
@@ -81,7 +149,11 @@ class DeferredTask:
         self._future = self.event_loop_thread.run_coroutine(self._run())
 
     async def _run(self):
-        return await self.func(*self.args, **self.kwargs)
+        self._running = True
+        try:
+            return await self.func(*self.args, **self.kwargs)
+        finally:
+            self._running = False
 
     def is_ready(self) -> bool:
         return self._future.done() if self._future else False
@@ -154,6 +226,10 @@ class DeferredTask:
     def is_alive(self) -> bool:
         return self._future and not self._future.done()  # type: ignore
 
+    def is_running(self) -> bool:
+        """Whether the coroutine still runs, a killed task can still be unwinding after is_alive() turned False."""
+        return self.is_alive() or self._running
+
     def restart(self, terminate_thread: bool = False) -> None:
         self.kill(terminate_thread=terminate_thread)
         self._start_task()
@@ -196,3 +272,16 @@ class DeferredTask:
 
         asyncio.run_coroutine_threadsafe(wrapped(), self.event_loop_thread.loop)
         return asyncio.wrap_future(future)
+
+
+async def await_task(task: "asyncio.Future[T]") -> T:
+    """Await an asyncio task that may belong to another event loop, e.g. one left in agent data
+    by a previous run of a context on another loop thread."""
+    loop = task.get_loop()
+    if task.done() or loop is asyncio.get_running_loop():
+        return await task
+
+    async def wait():
+        return await task
+
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(wait(), loop))
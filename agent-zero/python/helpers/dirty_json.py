@@ -1,4 +1,5 @@
 import json
+import re
 
 def try_parse(json_string: str):
     try:
@@ -15,6 +16,11 @@ def stringify(obj, **kwargs):
     return json.dumps(obj, ensure_ascii=False, **kwargs)
 
 
+# runs of plain string characters per quote type, used to skip char-by-char scanning
+_STRING_RUNS = {q: re.compile("[^" + re.escape(q) + "\\\\]+") for q in ['"', "'", "`"]}
+_VALUE_START = re.compile(r'[{\["]')
+
+
 class DirtyJson:
     def __init__(self):
         self._reset()
@@ -25,6 +31,15 @@ class DirtyJson:
         self.current_char = None
         self.result = None
         self.stack = []
+        # incremental parsing state used by feed()
+        self.completed = False
+        self._started = False
+        self._scan_pos = 0
+        self._checkpoint = None
+        self._pending = None
+        self._pending_string = None
+        self._overwritten = None
+        self._value_closed = False
 
     @staticmethod
     def parse_string(json_string):
@@ -48,16 +63,110 @@ class DirtyJson:
             return None
 
         self.current_char = self.json_string[self.index]
-        self._parse()
+        self.result = self._parse_value()
         return self.result
 
     def feed(self, chunk):
         self.json_string += chunk
-        if not self.current_char and self.json_string:
-            self.current_char = self.json_string[0]
-        self._parse()
+        return self._resume()
+
+    def _resume(self):
+        # continue parsing self.json_string from the last checkpoint, only the new text is scanned
+        if self.completed:
+            return self.result
+
+        if not self._started:
+            match = _VALUE_START.search(self.json_string, self._scan_pos)
+            if not match:
+                self._scan_pos = len(self.json_string)
+                return self.result
+            self._started = True
+            self._checkpoint = (match.start(), [], 0, False)
+
+        try:
+            return self._continue()
+        except Exception:
+            # incomplete input can fail to parse (a lone "-"), start over next time
+            json_string = self.json_string
+            self._reset()
+            self.json_string = json_string
+            raise
+
+    def _continue(self):
+        index, stack, length, after_value = self._checkpoint  # type: ignore
+        self.stack = list(stack)
+        self._seek(index)
+
+        pending, self._pending = self._pending, None
+        if pending:
+            # an unterminated string value was cut off, continue reading it
+            container, key, quote_char, text, resume_index = pending
+            self._seek(resume_index)
+            value = self._parse_string_body(quote_char, text)
+            self._assign(container, key, value)
+            if self._pending:
+                return self.result
+            after_value = True
+        elif not self.stack:
+            # still at top level, (re)parse the root value
+            self.result = self._parse_value()
+            self._bind_pending(None, None)
+            if not self.stack and not self._pending:
+                self.completed = self._value_closed or self.current_char is not None
+            return self.result
+        else:
+            # drop whatever the interrupted member left in its container
+            container = self.stack[-1]
+            if isinstance(container, dict):
+                for key in list(container)[length:]:
+                    del container[key]
+                if self._overwritten and self._overwritten[0] is container:
+                    container[self._overwritten[1]] = self._overwritten[2]
+            else:
+                del container[length:]
+
+        # resume the innermost open container, then its parents as they close
+        while self.stack and self.current_char is not None:
+            container = self.stack[-1]
+            if isinstance(container, dict):
+                closed = self._parse_object_content(container, after_value)
+            else:
+                closed = self._parse_array_content(container, after_value)
+            if not closed:
+                break
+            after_value = True
+
+        if not self.stack:
+            self.completed = True
         return self.result
 
+    def _seek(self, index):
+        self.index = index
+        if self.index < len(self.json_string):
+            self.current_char = self.json_string[self.index]
+        else:
+            self.current_char = None
+
+    def _mark(self, container, after_value=False):
+        # remember where parsing can safely restart once more input arrives
+        self._checkpoint = (self.index, list(self.stack), len(container), after_value)
+        self._overwritten = None
+
+    def _assign(self, container, key, value):
+        if container is None:
+            self.result = value
+        else:
+            if self._overwritten is None and isinstance(container, dict) and key in container:
+                # duplicate key, keep the previous value in case this member gets rewound
+                self._overwritten = (container, key, container[key])
+            container[key] = value
+        self._bind_pending(container, key)
+
+    def _bind_pending(self, container, key):
+        if self._pending_string:
+            self._pending = (container, key, *self._pending_string)
+            self._pending_string = None
+
     def _advance(self, count=1):
         self.index += count
         if self.index < len(self.json_string):
@@ -94,24 +203,8 @@ class DirtyJson:
                 break
             self._advance()
 
-    def _parse(self):
-        if self.result is None:
-            self.result = self._parse_value()
-        else:
-            self._continue_parsing()
-
-    def _continue_parsing(self):
-        while self.current_char is not None:
-            if isinstance(self.result, dict):
-                self._parse_object_content()
-            elif isinstance(self.result, list):
-                self._parse_array_content()
-            elif isinstance(self.result, str):
-                self.result = self._parse_string()
-            else:
-                break
-
     def _parse_value(self):
+        self._value_closed = False
         self._skip_whitespace()
         if self.current_char == "{":
             if self._peek(1) == "{":  # Handle {{
@@ -122,16 +215,25 @@ class DirtyJson:
         elif self.current_char in ['"', "'", "`"]:
             if self._peek(2) == self.current_char * 2:  # type: ignore
                 return self._parse_multiline_string()
-            return self._parse_string()
+            undecided = self.index + 2 >= len(self.json_string)
+            value = self._parse_string()
+            if undecided:
+                # could still turn out to be a multiline string, re-read it with more input
+                self._pending_string = None
+                self._value_closed = False
+            return value
         elif self.current_char and (
             self.current_char.isdigit() or self.current_char in ["-", "+"]
         ):
             return self._parse_number()
         elif self._match("true"):
+            self._value_closed = True
             return True
         elif self._match("false"):
+            self._value_closed = True
             return False
         elif self._match("null") or self._match("undefined"):
+            self._value_closed = True
             return None
         elif self.current_char:
             return self._parse_unquoted_string()
@@ -153,36 +255,49 @@ class DirtyJson:
         obj = {}
         self._advance()  # Skip opening brace
         self.stack.append(obj)
-        self._parse_object_content()
+        self._value_closed = self._parse_object_content(obj)
         return obj
 
-    def _parse_object_content(self):
+    def _parse_object_content(self, obj, after_value=False):
+        # returns True when the closing brace was reached, False when input ran out
+        if after_value:
+            self._mark(obj, after_value=True)
         while self.current_char is not None:
-            self._skip_whitespace()
-            if self.current_char == "}":
-                if self._peek(1) == "}":  # Handle }}
-                    self._advance(2)
-                else:
-                    self._advance()
-                self.stack.pop()
-                return
-            if self.current_char is None:
-                self.stack.pop()
-                return  # End of input reached while parsing object
+            if not after_value:
+                self._mark(obj)
+                self._skip_whitespace()
+                if self.current_char == "}":
+                    if self._peek(1) == "}":  # Handle }}
+                        self._advance(2)
+                    elif self.index + 1 >= len(self.json_string):
+                        # a second brace may still follow, decide with more input
+                        self._advance()
+                        return False
+                    else:
+                        self._advance()
+                    self.stack.pop()
+                    return True
+                if self.current_char is None:
+                    return False  # End of input reached while parsing object
 
-            key = self._parse_key()
-            value = None
-            self._skip_whitespace()
+                key = self._parse_key()
+                value = None
+                self._skip_whitespace()
 
-            if self.current_char == ":":
-                self._advance()
-                value = self._parse_value()
-            elif self.current_char is None:
-                value = None  # End of input reached after key
-            else:
-                value = self._parse_value()
+                if self.current_char == ":":
+                    self._advance()
+                    value = self._parse_value()
+                elif self.current_char is None:
+                    value = None  # End of input reached after key
+                else:
+                    value = self._parse_value()
 
-            self.stack[-1][key] = value
+                self._assign(obj, key, value)
+                if not self._pending and (
+                    self._value_closed or self.current_char is not None
+                ):
+                    self._mark(obj, after_value=True)
+            after_value = False
 
             self._skip_whitespace()
             if self.current_char == ",":
@@ -190,16 +305,20 @@ class DirtyJson:
                 continue
             elif self.current_char != "}":
                 if self.current_char is None:
-                    self.stack.pop()
-                    return  # End of input reached after value
+                    return False  # End of input reached after value
                 continue
+        return False
 
     def _parse_key(self):
         self._skip_whitespace()
         if self.current_char in ['"', "'"]:
-            return self._parse_string()
+            key = self._parse_string()
         else:
-            return self._parse_unquoted_key()
+            key = self._parse_unquoted_key()
+        # keys cut off by end of input are re-read, a key alone is no value
+        self._pending_string = None
+        self._value_closed = False
+        return key
 
     def _parse_unquoted_key(self):
         result = ""
@@ -216,39 +335,63 @@ class DirtyJson:
         arr = []
         self._advance()  # Skip opening bracket
         self.stack.append(arr)
-        self._parse_array_content()
+        self._value_closed = self._parse_array_content(arr)
         return arr
 
-    def _parse_array_content(self):
+    def _parse_array_content(self, arr, after_value=False):
+        # returns True when the array was closed, False when input ran out
+        if after_value:
+            self._mark(arr, after_value=True)
         while self.current_char is not None:
-            self._skip_whitespace()
-            if self.current_char == "]":
-                self._advance()
-                self.stack.pop()
-                return
-            value = self._parse_value()
-            self.stack[-1].append(value)
+            if not after_value:
+                self._mark(arr)
+                self._skip_whitespace()
+                if self.current_char == "]":
+                    self._advance()
+                    self.stack.pop()
+                    return True
+                value = self._parse_value()
+                arr.append(value)
+                self._bind_pending(arr, len(arr) - 1)
+                if not self._pending and (
+                    self._value_closed or self.current_char is not None
+                ):
+                    self._mark(arr, after_value=True)
+            after_value = False
+
             self._skip_whitespace()
             if self.current_char == ",":
                 self._advance()
                 # handle trailing commas, end of array
                 self._skip_whitespace()
-                if self.current_char is None or self.current_char == "]":
-                    if self.current_char == "]":
-                        self._advance()
+                if self.current_char is None:
+                    return False
+                if self.current_char == "]":
+                    self._advance()
                     self.stack.pop()
-                    return
+                    return True
             elif self.current_char != "]":
+                if self.current_char is None:
+                    return False
                 self.stack.pop()
-                return
+                return True
+        return False
 
     def _parse_string(self):
-        result = ""
         quote_char = self.current_char
         self._advance()  # Skip opening quote
+        return self._parse_string_body(quote_char, "")
+
+    def _parse_string_body(self, quote_char, result):
+        runs = _STRING_RUNS.get(quote_char)  # type: ignore
         while self.current_char is not None and self.current_char != quote_char:
             if self.current_char == "\\":
+                escape_start = self.index
                 self._advance()
+                if self.current_char is None:
+                    # input ends inside an escape sequence, re-read it later
+                    self._pending_string = (quote_char, result, escape_start)
+                    return result
                 if self.current_char in ['"', "'", "\\", "/", "b", "f", "n", "r", "t"]:
                     result += {
                         "b": "\b",
@@ -262,7 +405,10 @@ class DirtyJson:
                     unicode_char = ""
                     # Try to collect exactly 4 hex digits
                     for _ in range(4):
-                        if self.current_char is None or not self.current_char.isalnum():
+                        if self.current_char is None:
+                            self._pending_string = (quote_char, result, escape_start)
+                            return result + "\\u" + unicode_char
+                        if not self.current_char.isalnum():
                             # If we can't get 4 hex digits, treat it as a literal '\u' followed by whatever we got
                             return result + "\\u" + unicode_char
                         unicode_char += self.current_char
@@ -273,11 +419,23 @@ class DirtyJson:
                         # If invalid hex value, treat as literal
                         result += "\\u" + unicode_char
                     continue
+            elif runs:
+                # consume a whole run of plain characters at once
+                match = runs.match(self.json_string, self.index)
+                if match:
+                    result += match.group()
+                    self._advance(match.end() - self.index)
+                    continue
+                result += self.current_char
             else:
                 result += self.current_char
             self._advance()
         if self.current_char == quote_char:
             self._advance()  # Skip closing quote
+            self._value_closed = True
+        else:
+            # input ended before the closing quote, remember where to continue
+            self._pending_string = (quote_char, result, self.index)
         return result
 
     def _parse_multiline_string(self):
@@ -287,6 +445,7 @@ class DirtyJson:
         while self.current_char is not None:
             if self.current_char == quote_char and self._peek(2) == quote_char * 2:  # type: ignore
                 self._advance(3)  # Skip first quote
+                self._value_closed = True
                 break
             result += self.current_char
             self._advance()
@@ -333,3 +492,37 @@ class DirtyJson:
         chars = ["{", "[", '"']
         indices = [input_str.find(char) for char in chars if input_str.find(char) != -1]
         return min(indices) if indices else 0
+
+
+class DirtyJsonStream:
+    """Parses a growing text, e.g. a streamed LLM response, without re-reading what was already parsed.
+
+    Each update only consumes the text appended since the previous one. If the text was
+    rewritten instead of extended (masked secrets, a retried call), parsing starts over.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.parser = DirtyJson()
+        self.text = ""
+
+    def update(self, text: str):
+        if not text.startswith(self.text):
+            self.reset()
+        self.text = text
+        self.parser.json_string = text
+        return self.parser._resume()
+
+    def snapshot(self):
+        # copy containers only, strings are immutable and can be shared
+        return _copy_containers(self.parser.result)
+
+
+def _copy_containers(value):
+    if isinstance(value, dict):
+        return {k: _copy_containers(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_containers(v) for v in value]
+    return value
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, List
+
+from langchain_core.embeddings import Embeddings
+
+QUERY_CACHE_SIZE = 512  # query embeddings kept across all models
+
+
+class QueryEmbeddingCache:
+    """Process-wide LRU of query embeddings keyed by (embedding model id, normalized text)."""
+
+    def __init__(self, size: int = QUERY_CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[float, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str, text: str) -> List[float] | None:
+        key = (model_id, normalize_query(text))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return list(vector)
+
+    def put(self, model_id: str, text: str, vector: List[float]):
+        key = (model_id, normalize_query(text))
+        with self._lock:
+            self._entries[key] = tuple(vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = QueryEmbeddingCache()
+
+
+def get_cache() -> QueryEmbeddingCache:
+    return _cache
+
+
+def get_metrics() -> dict[str, Any]:
+    return _cache.get_metrics()
+
+
+def normalize_query(text: str) -> str:
+    # runs of whitespace do not change what a query means
+    return " ".join(text.split())
+
+
+def get_model_id(model_config: Any) -> str:
+    """Identifies an embedding model configuration, the same model with other kwargs embeds differently."""
+    kwargs = model_config.build_kwargs() if hasattr(model_config, "build_kwargs") else {}
+    raw = json.dumps([model_config.provider, model_config.name, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings that look queries up in the shared query cache before calling the model.
+    Documents go to the wrapped embeddings unchanged."""
+
+    def __init__(self, embeddings: Embeddings, model_id: str):
+        self.embeddings = embeddings
+        self.model_id = model_id
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = _cache.get(self.model_id, text)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalize_query(text))
+            _cache.put(self.model_id, text, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        vector = _cache.get(self.model_id, text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(normalize_query(text))
+            _cache.put(self.model_id, text, vector)
+        return vector
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+import time
 from typing import Any
 from python.helpers import extract_tools, files 
 from typing import TYPE_CHECKING
@@ -17,14 +18,60 @@ class Extension:
 
 
 async def call_extensions(extension_point: str, agent: "Agent|None" = None, **kwargs) -> Any:
+    profile = agent.config.profile if agent else ""
+    plan = _plans.get((profile, extension_point))
+    if plan is None:
+        plan = _build_plan(profile, extension_point)
 
+    # call extensions
+    for cls, timing in plan:
+        start = time.perf_counter()
+        try:
+            await cls(agent=agent).execute(**kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            timing[0] += 1
+            timing[1] += elapsed
+            if elapsed > timing[2]:
+                timing[2] = elapsed
+
+
+def get_timings() -> list[dict[str, Any]]:
+    """Calls, total and max execution time of each extension, slowest first."""
+    result = [
+        {
+            "extension_point": extension_point,
+            "extension": file,
+            "calls": timing[0],
+            "total": timing[1],
+            "average": timing[1] / timing[0] if timing[0] else 0.0,
+            "max": timing[2],
+        }
+        for (extension_point, file), timing in _timings.items()
+    ]
+    result.sort(key=lambda item: item["total"], reverse=True)
+    return result
+
+
+def reset_timings():
+    for timing in _timings.values():
+        timing[:] = [0, 0.0, 0.0]
+
+
+def clear_cache():
+    """Forget loaded extensions, they are loaded again on next call."""
+    _cache.clear()
+    _plans.clear()
+
+
+def _build_plan(profile: str, extension_point: str) -> tuple[tuple[type[Extension], list], ...]:
     # get default extensions
-    defaults = await _get_extensions("python/extensions/" + extension_point)
+    defaults = _get_extensions("python/extensions/" + extension_point)
     classes = defaults
 
     # get agent extensions
-    if agent and agent.config.profile:
-        agentics = await _get_extensions("agents/" + agent.config.profile + "/extensions/" + extension_point)
+    if profile:
+        agentics = _get_extensions("agents/" + profile + "/extensions/" + extension_point)
         if agentics:
             # merge them, agentics overwrite defaults
             unique = {}
@@ -34,16 +81,24 @@ async def call_extensions(extension_point: str, agent: "Agent|None" = None, **kw
             # sort by name
             classes = sorted(unique.values(), key=lambda cls: _get_file_from_module(cls.__module__))
 
-    # call extensions
-    for cls in classes:
-        await cls(agent=agent).execute(**kwargs)
+    # timing counters [calls, total, max] are shared by all profiles using the same extension file
+    plan = tuple(
+        (cls, _timings.setdefault((extension_point, _get_file_from_module(cls.__module__)), [0, 0.0, 0.0]))
+        for cls in classes
+    )
+    _plans[(profile, extension_point)] = plan
+    return plan
 
 
 def _get_file_from_module(module_name: str) -> str:
     return module_name.split(".")[-1]
 
 _cache: dict[str, list[type[Extension]]] = {}
-async def _get_extensions(folder:str):
+# (profile, extension point) -> extensions to call in order, each with its timing counters
+_plans: dict[tuple[str, str], tuple[tuple[type[Extension], list], ...]] = {}
+_timings: dict[tuple[str, str], list] = {}
+
+def _get_extensions(folder:str):
     global _cache
     folder = files.get_abs_path(folder)
     if folder in _cache:
@@ -57,4 +112,3 @@ async def _get_extensions(folder:str):
         _cache[folder] = classes
 
     return classes
-
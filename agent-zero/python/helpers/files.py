@@ -8,7 +8,9 @@ import re
 import base64
 import shutil
 import tempfile
-from typing import Any
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
 import zipfile
 import importlib
 import importlib.util
@@ -22,6 +24,23 @@ class VariablesPlugin(ABC):
     def get_variables(self, file: str, backup_dirs: list[str] | None = None, **kwargs) -> dict[str, Any]:  # type: ignore
         pass
 
+    def get_dependencies(self, file: str, backup_dirs: list[str] | None = None, **kwargs) -> list[str] | None:
+        """Glob patterns of files the variables are made of.
+
+        When a list is returned, get_variables is called again only after a file matching one of
+        the patterns is added, removed or changed. Prompt files and plugins used by get_variables
+        are tracked automatically, the patterns are needed to notice new files.
+        None means the variables are not cacheable.
+        """
+        return None
+
+
+# plugin file -> (mtime, size) of the loaded version and its plugin classes
+_plugin_classes: dict[str, tuple[tuple[int, int], list[type[VariablesPlugin]]]] = {}
+# (plugin file, prompt file, backup dirs, kwargs) -> (dependency globs, their signature, variables)
+_plugin_variables: dict[tuple, tuple[tuple[str, ...], tuple, dict[str, Any]]] = {}
+_dependencies = threading.local()  # files read while cacheable variables are being computed
+
 
 def load_plugin_variables(
     file: str, backup_dirs: list[str] | None = None, **kwargs
@@ -41,40 +60,95 @@ def load_plugin_variables(
         plugin_file = None
 
     if plugin_file and exists(plugin_file):
+        _add_dependencies(glob.escape(plugin_file))
+        for cls in _get_plugin_classes(plugin_file):
+            plugin = cls()  # type: ignore < abstract class here is ok, it is always a subclass
+            return _get_plugin_variables(plugin, plugin_file, file, backup_dirs, kwargs)
+    return {}
 
-        from python.helpers import extract_tools
 
-        classes = extract_tools.load_classes_from_file(
-            plugin_file, VariablesPlugin, one_per_file=False
-        )
-        for cls in classes:
-            return cls().get_variables(file, backup_dirs, **kwargs)  # type: ignore < abstract class here is ok, it is always a subclass
-
-        # load python code and extract variables variables from it
-        # module = None
-        # module_name = dirname(plugin_file).replace("/", ".") + "." + basename(plugin_file, '.py')
-
-        # try:
-        #     spec = importlib.util.spec_from_file_location(module_name, plugin_file)
-        #     if not spec:
-        #         return {}
-        #     module = importlib.util.module_from_spec(spec)
-        #     sys.modules[spec.name] = module
-        #     spec.loader.exec_module(module)  # type: ignore
-        # except ImportError:
-        #     return {}
-
-        # if module is None:
-        #     return {}
-
-        # # Get all classes in the module
-        # class_list = inspect.getmembers(module, inspect.isclass)
-        # # Filter for classes that are subclasses of VariablesPlugin
-        # # iterate backwards to skip imported superclasses
-        # for cls in reversed(class_list):
-        #     if cls[1] is not VariablesPlugin and issubclass(cls[1], VariablesPlugin):
-        #         return cls[1]().get_variables()  # type: ignore
-    return {}
+def _get_plugin_classes(plugin_file: str) -> list[type[VariablesPlugin]]:
+    # plugin modules are executed once per file version, not on every prompt read
+    stat = os.stat(plugin_file)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _plugin_classes.get(plugin_file)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    from python.helpers import extract_tools
+
+    classes = extract_tools.load_classes_from_file(
+        plugin_file, VariablesPlugin, one_per_file=False
+    )
+    _plugin_classes[plugin_file] = (stamp, classes)
+    return classes
+
+
+def _get_plugin_variables(
+    plugin: VariablesPlugin,
+    plugin_file: str,
+    file: str,
+    backup_dirs: list[str],
+    kwargs: dict[str, Any],
+) -> dict[str, Any]:
+    patterns = plugin.get_dependencies(file, backup_dirs, **kwargs)
+    key = (plugin_file, file, tuple(backup_dirs), tuple(sorted(kwargs.items())))
+    try:
+        hash(key)
+    except TypeError:
+        patterns = None  # variables computed from unhashable arguments are not cached
+    if patterns is None:
+        return plugin.get_variables(file, backup_dirs, **kwargs)
+
+    cached = _plugin_variables.get(key)
+    if cached and cached[1] == get_files_signature(cached[0]):
+        _add_dependencies(*cached[0])
+        return dict(cached[2])  # callers add their kwargs to the result
+
+    with collect_dependencies() as used:
+        variables = plugin.get_variables(file, backup_dirs, **kwargs)
+    dependencies = tuple(
+        [glob.escape(plugin_file)]
+        + [get_abs_path(pattern) for pattern in patterns]
+        + sorted(used - {glob.escape(plugin_file)})
+    )
+    _plugin_variables[key] = (dependencies, get_files_signature(dependencies), variables)
+    _add_dependencies(*dependencies)
+    return dict(variables)
+
+
+@contextmanager
+def collect_dependencies() -> Iterator[set[str]]:
+    """Collect glob patterns of prompt files and plugins read inside the block, for caching what is built from them.
+    Blocks can be nested, the outer one also gets the dependencies of the inner one."""
+    stack = _dependencies.__dict__.setdefault("stack", [])
+    used: set[str] = set()
+    stack.append(used)
+    try:
+        yield used
+    finally:
+        stack.pop()
+    _add_dependencies(*used)
+
+
+def _add_dependencies(*patterns: str):
+    stack = getattr(_dependencies, "stack", None)
+    if stack:
+        stack[-1].update(patterns)
+
+
+def get_files_signature(patterns: Iterable[str]) -> tuple:
+    """Paths, mtimes and sizes of all files matching the glob patterns, changes when any of them is added, removed or changed."""
+    signature = []
+    for pattern in patterns:
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
 
 
 from python.helpers.strings import sanitize_string
@@ -89,30 +163,19 @@ def parse_file(
     # Find the file in the directories
     absolute_path = find_file_in_dirs(_filename, _directories)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Compiled content of the file, code fences removed
+    template = _get_template(absolute_path, _encoding, parse=True)
 
-    is_json = is_full_json_template(content)
-    content = remove_code_fences(content)
     variables = load_plugin_variables(absolute_path, _directories, **kwargs) or {}  # type: ignore
     variables.update(kwargs)
-    if is_json:
-        content = replace_placeholders_json(content, **variables)
+    if template.is_json:
+        content = template.render_json(variables)
         obj = json.loads(content)
         # obj = replace_placeholders_dict(obj, **variables)
         return obj
     else:
-        content = replace_placeholders_text(content, **variables)
-        # Process include statements
-        content = process_includes(
-            # here we use kwargs, the plugin variables are not inherited
-            content,
-            _directories,
-            **kwargs,
-        )
-        return content
+        # here we use kwargs for includes, the plugin variables are not inherited
+        return template.render_text(_directories, variables, kwargs)
 
 
 def read_prompt_file(
@@ -130,26 +193,114 @@ def read_prompt_file(
     # Find the file in the directories
     absolute_path = find_file_in_dirs(_file, _directories)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Compiled content of the file
+    template = _get_template(absolute_path, _encoding, parse=False)
 
     variables = load_plugin_variables(_file, _directories, **kwargs) or {}  # type: ignore
     variables.update(kwargs)
 
-    # Replace placeholders with values from kwargs
-    content = replace_placeholders_text(content, **variables)
-
-    # Process include statements
-    content = process_includes(
-        # here we use kwargs, the plugin variables are not inherited
-        content,
-        _directories,
-        **kwargs,
-    )
+    # Replace placeholders and process include statements,
+    # here we use kwargs for includes, the plugin variables are not inherited
+    return template.render_text(_directories, variables, kwargs)
+
+
+_PLACEHOLDER_PATTERN = re.compile(r"{{([^{}]+)}}")
+_INCLUDE_PATTERN = re.compile(r"{{\s*include\s*['\"](.*?)['\"]\s*}}")
+_TEXT, _VARIABLE, _INCLUDE = 0, 1, 2
+
+
+class _Template:
+    """Prompt file content split into text, placeholder and include segments.
+
+    Renders in one pass with the same result as replace_placeholders_* followed by process_includes,
+    templates or values the segments cannot represent exactly fall back to those functions.
+    """
+
+    def __init__(self, content: str, parse: bool):
+        self.is_json = parse and is_full_json_template(content)
+        self.content = remove_code_fences(content) if parse else content
+        self.segments: list[tuple[int, str, str]] = []  # kind, text / name / include path, original text
+        pos = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(self.content):
+            if match.start() > pos:
+                self.segments.append((_TEXT, self.content[pos : match.start()], ""))
+            raw = match.group(0)
+            include = _INCLUDE_PATTERN.fullmatch(raw)
+            if include and not self.is_json:
+                # absolute includes are not processed
+                if os.path.isabs(include.group(1)):
+                    self.segments.append((_TEXT, raw, ""))
+                else:
+                    self.segments.append((_INCLUDE, include.group(1), raw))
+            else:
+                self.segments.append((_VARIABLE, match.group(1), raw))
+            pos = match.end()
+        if pos < len(self.content):
+            self.segments.append((_TEXT, self.content[pos:], ""))
+        # braces left in the text, like nested placeholders, are not compiled
+        self.compiled = not any(
+            kind == _TEXT and "{{" in text for kind, text, _ in self.segments
+        )
+
+    def _render_variables(self, variables: dict[str, Any], to_str) -> dict[int, str] | None:
+        values = {}
+        for i, (kind, name, _) in enumerate(self.segments):
+            if kind == _VARIABLE and name in variables:
+                value = to_str(variables[name])
+                # placeholders and includes inside values are processed by the legacy path
+                if "{{" in value:
+                    return None
+                values[i] = value
+        return values
+
+    def render_text(
+        self, directories: list[str], variables: dict[str, Any], kwargs: dict[str, Any]
+    ) -> str:
+        values = self._render_variables(variables, str) if self.compiled else None
+        if values is None:
+            content = replace_placeholders_text(self.content, **variables)
+            return process_includes(content, directories, **kwargs)
+
+        parts = []
+        for i, (kind, text, raw) in enumerate(self.segments):
+            if kind == _TEXT:
+                parts.append(text)
+            elif kind == _VARIABLE:
+                parts.append(values.get(i, raw))
+            else:
+                try:
+                    parts.append(read_prompt_file(text, directories, **kwargs))
+                except FileNotFoundError:
+                    parts.append(raw)  # keep original if file not found
+        return "".join(parts)
+
+    def render_json(self, variables: dict[str, Any]) -> str:
+        values = self._render_variables(variables, json.dumps) if self.compiled else None
+        if values is None:
+            return replace_placeholders_json(self.content, **variables)
+        return "".join(
+            values.get(i, raw) if kind == _VARIABLE else text
+            for i, (kind, text, raw) in enumerate(self.segments)
+        )
 
-    return content
+
+# (absolute path, encoding, parse) -> (mtime, size) of the compiled version and the template
+_templates: dict[tuple[str, str, bool], tuple[tuple[int, int], _Template]] = {}
+
+
+def _get_template(absolute_path: str, encoding: str, parse: bool) -> _Template:
+    _add_dependencies(glob.escape(absolute_path))
+    stat = os.stat(absolute_path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    key = (absolute_path, encoding, parse)
+    cached = _templates.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(absolute_path, "r", encoding=encoding) as f:
+        template = _Template(f.read(), parse)
+    _templates[key] = (stamp, template)
+    return template
 
 
 def read_file(relative_path: str, encoding="utf-8"):
@@ -281,6 +432,9 @@ def get_unique_filenames_in_dirs(dir_paths: list[str], pattern: str = "*"):
 
 
 def remove_code_fences(text):
+    if "```" not in text and "~~~" not in text:
+        return text
+
     # Pattern to match code fences with optional language specifier
     pattern = r"(```|~~~)(.*?\n)(.*?)(\1)"
 
@@ -436,10 +590,12 @@ def exists(*relative_paths):
     return os.path.exists(path)
 
 
+# Get the base directory from the current file path, resolved once as prompts resolve many paths
+_base_dir = os.path.dirname(os.path.abspath(os.path.join(__file__, "../../")))
+
+
 def get_base_dir():
-    # Get the base directory from the current file path
-    base_dir = os.path.dirname(os.path.abspath(os.path.join(__file__, "../../")))
-    return base_dir
+    return _base_dir
 
 
 def basename(path: str, suffix: str | None = None):
@@ -17,6 +17,17 @@ HISTORY_BULK_RATIO = 0.2
 TOPIC_COMPRESS_RATIO = 0.65
 LARGE_MESSAGE_TO_TOPIC_RATIO = 0.25
 RAW_MESSAGE_OUTPUT_TEXT_TRIM = 100
+SUMMARY_TOKENS_ESTIMATE = 200  # planned size of a summary, the prompt asks for about 100 words
+COMPRESS_CONCURRENCY = 4  # summaries requested from the utility model at once
+# share of the history context size above which compression starts in the background,
+# the full size is the high watermark, above it the next prompt waits for compression
+COMPRESS_LOW_WATERMARK = 0.8
+
+_compress_counters = {
+    "proactive": 0,  # background compressions started at the low watermark
+    "waits": 0,  # prompts that had to wait for compression
+    "waits_avoided": 0,  # prompts under the limit only thanks to a finished proactive compression
+}
 
 
 class RawMessage(TypedDict):
@@ -78,13 +89,34 @@ class Record:
 class Message(Record):
     def __init__(self, ai: bool, content: MessageContent, tokens: int = 0):
         self.ai = ai
-        self.content = content
-        self.summary: str = ""
-        self.tokens: int = tokens or self.calculate_tokens()
+        self._content = content
+        self._summary: str = ""
+        # token count is calculated lazily, a known count (e.g. from disk) is trusted until content or summary change
+        self.tokens: int = tokens
+        self._tokens_dirty = not tokens
+
+    @property
+    def content(self) -> MessageContent:
+        return self._content
+
+    @content.setter
+    def content(self, content: MessageContent):
+        self._content = content
+        self._tokens_dirty = True
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, summary: str):
+        self._summary = summary
+        self._tokens_dirty = True
 
     def get_tokens(self) -> int:
-        if not self.tokens:
+        if self._tokens_dirty:
             self.tokens = self.calculate_tokens()
+            self._tokens_dirty = False
         return self.tokens
 
     def calculate_tokens(self):
@@ -93,7 +125,6 @@ class Message(Record):
 
     def set_summary(self, summary: str):
         self.summary = summary
-        self.tokens = self.calculate_tokens()
 
     async def compress(self):
         return False
@@ -113,27 +144,38 @@ class Message(Record):
             "ai": self.ai,
             "content": self.content,
             "summary": self.summary,
-            "tokens": self.tokens,
+            "tokens": self.get_tokens(),
         }
 
     @staticmethod
     def from_dict(data: dict, history: "History"):
         content = data.get("content", "Content lost")
-        msg = Message(ai=data["ai"], content=content)
-        msg.summary = data.get("summary", "")
-        msg.tokens = data.get("tokens", 0)
+        msg = Message(ai=data["ai"], content=content, tokens=data.get("tokens", 0))
+        msg._summary = data.get("summary", "")  # stored tokens already include the summary
         return msg
 
 
 class Topic(Record):
     def __init__(self, history: "History"):
         self.history = history
-        self.summary: str = ""
+        self._summary: str = ""
+        self.summary_tokens: int = 0
         self.messages: list[Message] = []
 
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, summary: str):
+        self._summary = summary
+        self.summary_tokens = 0
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            if not self.summary_tokens:
+                self.summary_tokens = tokens.approximate_tokens(self.summary, "estimate")
+            return self.summary_tokens
         else:
             return sum(msg.get_tokens() for msg in self.messages)
 
@@ -201,18 +243,31 @@ class Topic(Record):
         return compress
 
     async def compress_attention(self) -> bool:
+        msg_to_sum = self.get_attention_messages()
+        if msg_to_sum:
+            summary = await self.summarize_messages(msg_to_sum)
+            return self.replace_messages(msg_to_sum, summary)
+        return False
 
+    def get_attention_messages(self) -> list[Message]:
+        # messages after the first one, to be replaced by their summary
         if len(self.messages) > 2:
             cnt_to_sum = math.ceil((len(self.messages) - 2) * TOPIC_COMPRESS_RATIO)
-            msg_to_sum = self.messages[1 : cnt_to_sum + 1]
-            summary = await self.summarize_messages(msg_to_sum)
-            sum_msg_content = self.history.agent.parse_prompt(
-                "fw.msg_summary.md", summary=summary
-            )
-            sum_msg = Message(False, sum_msg_content)
-            self.messages[1 : cnt_to_sum + 1] = [sum_msg]
-            return True
-        return False
+            return self.messages[1 : cnt_to_sum + 1]
+        return []
+
+    def replace_messages(self, msg_to_sum: list[Message], summary: str) -> bool:
+        # messages are only appended meanwhile, so the summarized ones are still in place
+        end = len(msg_to_sum) + 1
+        if len(self.messages) < end or any(
+            a is not b for a, b in zip(self.messages[1:end], msg_to_sum)
+        ):
+            return False
+        sum_msg_content = self.history.agent.parse_prompt(
+            "fw.msg_summary.md", summary=summary
+        )
+        self.messages[1:end] = [Message(False, sum_msg_content)]
+        return True
 
     async def summarize_messages(self, messages: list[Message]):
         # FIXME: vision bytes are sent to utility LLM, send summary instead
@@ -229,6 +284,7 @@ class Topic(Record):
         return {
             "_cls": "Topic",
             "summary": self.summary,
+            "summary_tokens": self.get_tokens() if self.summary else 0,
             "messages": [m.to_dict() for m in self.messages],
         }
 
@@ -236,6 +292,7 @@ class Topic(Record):
     def from_dict(data: dict, history: "History"):
         topic = Topic(history=history)
         topic.summary = data.get("summary", "")
+        topic.summary_tokens = data.get("summary_tokens", 0)
         topic.messages = [
             Message.from_dict(m, history=history) for m in data.get("messages", [])
         ]
@@ -245,12 +302,24 @@ class Topic(Record):
 class Bulk(Record):
     def __init__(self, history: "History"):
         self.history = history
-        self.summary: str = ""
+        self._summary: str = ""
+        self.summary_tokens: int = 0
         self.records: list[Record] = []
 
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, summary: str):
+        self._summary = summary
+        self.summary_tokens = 0
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
+            if not self.summary_tokens:
+                self.summary_tokens = tokens.approximate_tokens(self.summary, "estimate")
+            return self.summary_tokens
         else:
             return sum([r.get_tokens() for r in self.records])
 
@@ -279,6 +348,7 @@ class Bulk(Record):
         return {
             "_cls": "Bulk",
             "summary": self.summary,
+            "summary_tokens": self.get_tokens() if self.summary else 0,
             "records": [r.to_dict() for r in self.records],
         }
 
@@ -286,6 +356,7 @@ class Bulk(Record):
     def from_dict(data: dict, history: "History"):
         bulk = Bulk(history=history)
         bulk.summary = data["summary"]
+        bulk.summary_tokens = data.get("summary_tokens", 0)
         cls = data["_cls"]
         bulk.records = [Record.from_dict(r, history=history) for r in data["records"]]
         return bulk
@@ -296,10 +367,40 @@ class History(Record):
         from agent import Agent
 
         self.counter = 0
+        self.revision = 0  # bumped on any change other than appending a message
         self.bulks: list[Bulk] = []
         self.topics: list[Topic] = []
         self.current = Topic(history=self)
         self.agent: Agent = agent
+        self._cache = _OutputCache()
+
+    def invalidate(self):
+        """Drop cached output and token totals, needed after changing records outside of History methods."""
+        self.revision += 1
+
+    def _get_cache(self) -> "_OutputCache":
+        # bulks and topics only change together with the revision, the current topic only grows
+        # until the revision changes, so new messages are appended to the cache instead of rebuilding it
+        cache = self._cache
+        current = self.current
+        key = (self.revision, id(current), current.summary)
+        if cache.key != key or len(current.messages) < cache.current_count:
+            cache = self._cache = _OutputCache(key)
+            cache.prefix = [m for b in self.bulks for m in b.output()]
+            cache.prefix += [m for t in self.topics for m in t.output()]
+            cache.bulks_tokens = sum(record.get_tokens() for record in self.bulks)
+            cache.topics_tokens = sum(record.get_tokens() for record in self.topics)
+            if current.summary:
+                cache.current = current.output()
+                cache.current_tokens = current.get_tokens()
+                cache.current_count = len(current.messages)
+
+        if cache.current_count < len(current.messages):
+            for msg in current.messages[cache.current_count :]:
+                cache.current += msg.output()
+                cache.current_tokens += msg.get_tokens()
+            cache.current_count = len(current.messages)
+        return cache
 
     def get_tokens(self) -> int:
         return (
@@ -308,19 +409,22 @@ class History(Record):
             + self.get_current_topic_tokens()
         )
 
-    def is_over_limit(self):
+    def is_over_limit(self, added_tokens: int = 0):
         limit = _get_ctx_size_for_history()
-        total = self.get_tokens()
+        total = self.get_tokens() + added_tokens
         return total > limit
 
+    def is_over_low_watermark(self):
+        return self.get_tokens() > get_low_watermark()
+
     def get_bulks_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.bulks)
+        return self._get_cache().bulks_tokens
 
     def get_topics_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.topics)
+        return self._get_cache().topics_tokens
 
     def get_current_topic_tokens(self) -> int:
-        return self.current.get_tokens()
+        return self._get_cache().current_tokens
 
     def add_message(
         self, ai: bool, content: MessageContent, tokens: int = 0
@@ -332,13 +436,23 @@ class History(Record):
         if self.current.messages:
             self.topics.append(self.current)
             self.current = Topic(history=self)
+            self.revision += 1
 
     def output(self) -> list[OutputMessage]:
-        result: list[OutputMessage] = []
-        result += [m for b in self.bulks for m in b.output()]
-        result += [m for t in self.topics for m in t.output()]
-        result += self.current.output()
-        return result
+        cache = self._get_cache()
+        return cache.prefix + cache.current  # a new list, callers may edit it
+
+    def output_langchain(self) -> list[BaseMessage]:
+        cache = self._get_cache()
+        outputs = cache.prefix + cache.current
+        if cache.langchain_count < len(outputs):
+            new = output_langchain(outputs[cache.langchain_count :])
+            if cache.langchain:
+                # the last cached message may need to be merged with the first new one
+                new = group_messages_abab([cache.langchain.pop()] + new)
+            cache.langchain += new
+            cache.langchain_count = len(outputs)
+        return list(cache.langchain)
 
     @staticmethod
     def from_dict(data: dict, history: "History"):
@@ -346,6 +460,7 @@ class History(Record):
         history.bulks = [Bulk.from_dict(b, history=history) for b in data["bulks"]]
         history.topics = [Topic.from_dict(t, history=history) for t in data["topics"]]
         history.current = Topic.from_dict(data["current"], history=history)
+        history.invalidate()
         return history
 
     def to_dict(self):
@@ -361,82 +476,56 @@ class History(Record):
         data = self.to_dict()
         return _json_dumps(data)
 
-    async def compress(self):
+    async def compress(self, ctx_size: int | None = None):
+        """Compress until the history fits its limits, relative to ctx_size or the history
+        context size. Each round plans the summaries needed by all parts over their limits,
+        requests them concurrently and applies them together."""
         compressed = False
         while True:
-            curr, hist, bulk = (
-                self.get_current_topic_tokens(),
-                self.get_topics_tokens(),
-                self.get_bulks_tokens(),
-            )
-            total = _get_ctx_size_for_history()
-            ratios = [
-                (curr, CURRENT_TOPIC_RATIO, "current_topic"),
-                (hist, HISTORY_TOPIC_RATIO, "history_topic"),
-                (bulk, HISTORY_BULK_RATIO, "history_bulk"),
-            ]
-            ratios = sorted(ratios, key=lambda x: (x[0] / total) / x[1], reverse=True)
-            compressed_part = False
-            for ratio in ratios:
-                if ratio[0] > ratio[1] * total:
-                    over_part = ratio[2]
-                    if over_part == "current_topic":
-                        compressed_part = await self.current.compress()
-                    elif over_part == "history_topic":
-                        compressed_part = await self.compress_topics()
-                    else:
-                        compressed_part = await self.compress_bulks()
-                    if compressed_part:
-                        break
-
-            if compressed_part:
-                compressed = True
-                continue
-            else:
+            plan = await self._plan_compression(ctx_size or _get_ctx_size_for_history())
+            if not plan:
                 return compressed
-
-    async def compress_topics(self) -> bool:
-        # summarize topics one by one
+            await plan.run(_get_compress_concurrency(self.agent))
+            plan.apply()
+            self.revision += 1
+            compressed = True
+
+    async def _plan_compression(self, total: int) -> "_CompressionPlan":
+        plan = _CompressionPlan(self)
+
+        # current topic, large messages are truncated right away, without model calls
+        limit = CURRENT_TOPIC_RATIO * total
+        while self.get_current_topic_tokens() > limit:
+            if not await self.current.compress_large_messages():
+                plan.attention = (self.current, self.current.get_attention_messages())
+                break
+            plan.truncated = True
+            self.revision += 1
+
+        # topics are summarized oldest first, if that is not enough the oldest move to bulks
+        limit = HISTORY_TOPIC_RATIO * total
+        projected = self.get_topics_tokens()
         for topic in self.topics:
+            if projected <= limit:
+                break
             if not topic.summary:
-                await topic.summarize()
-                return True
-
-        # move oldest topic to bulks and summarize
+                plan.topics.append(topic)
+                tok = topic.get_tokens()
+                projected -= tok - min(tok, SUMMARY_TOKENS_ESTIMATE)
         for topic in self.topics:
-            bulk = Bulk(history=self)
-            bulk.records.append(topic)
-            if topic.summary:
-                bulk.summary = topic.summary
-            else:
-                await bulk.summarize()
-            self.bulks.append(bulk)
-            self.topics.remove(topic)
-            return True
-        return False
-
-    async def compress_bulks(self):
-        # merge bulks if possible
-        compressed = await self.merge_bulks_by(BULK_MERGE_COUNT)
-        # remove oldest bulk if necessary
-        if not compressed:
-            self.bulks.pop(0)
-            return True
-        return compressed
-
-    async def merge_bulks_by(self, count: int):
-        # if bulks is empty, return False
-        if len(self.bulks) == 0:
-            return False
-        # merge bulks in groups of count, even if there are fewer than count
-        bulks = await asyncio.gather(
-            *[
-                self.merge_bulks(self.bulks[i : i + count])
-                for i in range(0, len(self.bulks), count)
+            if projected <= limit:
+                break
+            plan.moves.append(topic)
+            tok = topic.get_tokens()
+            projected -= min(tok, SUMMARY_TOKENS_ESTIMATE) if topic in plan.topics else tok
+
+        # bulks are merged in groups
+        if self.get_bulks_tokens() > HISTORY_BULK_RATIO * total:
+            plan.merges = [
+                self.bulks[i : i + BULK_MERGE_COUNT]
+                for i in range(0, len(self.bulks), BULK_MERGE_COUNT)
             ]
-        )
-        self.bulks = bulks
-        return True
+        return plan
 
     async def merge_bulks(self, bulks: list[Bulk]) -> Bulk:
         bulk = Bulk(history=self)
@@ -445,6 +534,91 @@ class History(Record):
         return bulk
 
 
+class _CompressionPlan:
+    """Summaries for one compression round, applied together once all of them are done."""
+
+    def __init__(self, history: History):
+        self.history = history
+        self.truncated = False  # large messages of the current topic were truncated
+        self.attention: tuple[Topic, list[Message]] | None = None
+        self.topics: list[Topic] = []  # topics to summarize
+        self.moves: list[Topic] = []  # topics to move to bulks, oldest first
+        self.merges: list[list[Bulk]] = []  # groups of bulks to merge into one
+        self.attention_summary = ""
+        self.topic_summaries: list[str] = []
+        self.merged: list[Bulk] = []
+
+    def __bool__(self):
+        return bool(
+            self.truncated
+            or (self.attention and self.attention[1])
+            or self.topics
+            or self.moves
+            or self.merges
+        )
+
+    async def run(self, concurrency: int):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def limited(coro: Coroutine):
+            async with semaphore:
+                return await coro
+
+        calls: list[Coroutine] = []
+        if self.attention and self.attention[1]:
+            topic, msg_to_sum = self.attention
+            calls.append(limited(topic.summarize_messages(msg_to_sum)))
+        calls += [limited(topic.summarize_messages(topic.messages)) for topic in self.topics]
+        calls += [limited(self.history.merge_bulks(group)) for group in self.merges]
+
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result  # nothing is applied
+
+        if self.attention and self.attention[1]:
+            self.attention_summary = results.pop(0)
+        self.topic_summaries = results[: len(self.topics)]
+        self.merged = results[len(self.topics) :]
+
+    def apply(self):
+        history = self.history
+        if self.attention and self.attention[1]:
+            topic, msg_to_sum = self.attention
+            topic.replace_messages(msg_to_sum, self.attention_summary)
+
+        for topic, summary in zip(self.topics, self.topic_summaries):
+            topic.summary = summary
+
+        merged_bulks = [bulk for group in self.merges for bulk in group]
+        count = len(merged_bulks)
+        if count and len(history.bulks) >= count and all(
+            a is b for a, b in zip(history.bulks, merged_bulks)
+        ):
+            history.bulks[:count] = self.merged
+
+        for topic in self.moves:
+            if topic in history.topics:
+                bulk = Bulk(history=history)
+                bulk.records.append(topic)
+                bulk.summary = topic.summary
+                history.bulks.append(bulk)
+                history.topics.remove(topic)
+
+
+class _OutputCache:
+    def __init__(self, key: tuple | None = None):
+        self.key = key
+        self.prefix: list[OutputMessage] = []  # output of bulks and topics
+        self.bulks_tokens = 0
+        self.topics_tokens = 0
+        self.current: list[OutputMessage] = []  # output of the current topic
+        self.current_count = 0  # messages of the current topic included in the cache
+        self.current_tokens = 0
+        self.langchain: list[BaseMessage] = []  # grouped langchain messages of the output
+        self.langchain_count = 0  # output messages converted to langchain
+
+
 def deserialize_history(json_data: str, agent) -> History:
     history = History(agent=agent)
     if json_data:
@@ -453,6 +627,24 @@ def deserialize_history(json_data: str, agent) -> History:
     return history
 
 
+def _get_compress_concurrency(agent) -> int:
+    # calls over the utility model's request limit would only queue in its rate limiter
+    limit = agent.config.utility_model.limit_requests
+    return min(COMPRESS_CONCURRENCY, limit) if limit > 0 else COMPRESS_CONCURRENCY
+
+
+def get_low_watermark() -> int:
+    return int(_get_ctx_size_for_history() * COMPRESS_LOW_WATERMARK)
+
+
+def count_compression(counter: str):
+    _compress_counters[counter] += 1
+
+
+def get_compress_metrics() -> dict[str, int]:
+    return dict(_compress_counters)
+
+
 def _get_ctx_size_for_history() -> int:
     set = settings.get_settings()
     return int(set["chat_model_ctx_length"] * set["chat_model_ctx_history"])
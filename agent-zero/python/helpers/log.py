@@ -1,14 +1,16 @@
 from dataclasses import dataclass, field
 import json
-from typing import Any, Literal, Optional, Dict, TypeVar, TYPE_CHECKING
+from typing import Any, Literal, Optional, Dict, TypeVar, TYPE_CHECKING, Iterable
 
 T = TypeVar("T")
 import uuid
 from collections import OrderedDict  # Import OrderedDict
 from python.helpers.strings import truncate_text_by_ratio
 import copy
+import threading
 from typing import TypeVar
-from python.helpers.secrets import get_secrets_manager
+from python.helpers.secrets import get_secrets_manager, SecretMasker
+from python.helpers import state_monitor
 
 
 if TYPE_CHECKING:
@@ -41,6 +43,7 @@ RESPONSE_CONTENT_MAX_LEN: int = 250_000
 KEY_MAX_LEN: int = 60
 VALUE_MAX_LEN: int = 5000
 PROGRESS_MAX_LEN: int = 120
+STREAM_STATE_ITEMS: int = 8  # log items whose appended text is kept for incremental masking
 
 
 def _truncate_heading(text: str | None) -> str:
@@ -163,14 +166,39 @@ class LogItem:
         content: str | None = None,
         **kwargs,
     ):
-        if heading is not None:
-            self.update(heading=self.heading + heading)
-        if content is not None:
-            self.update(content=self.content + content)
+        self.append(heading=heading, content=content, **kwargs)
+
+    def append(
+        self,
+        heading: str | None = None,
+        content: str | None = None,
+        **kwargs: str,
+    ):
+        """Append text deltas to the heading, content or kvps, only the new text is masked."""
+        if self.guid == self.log.guid:
+            self.log._append_item(self.no, heading=heading, content=content, kvps=kwargs)
 
-        for k, v in kwargs.items():
-            prev = self.kvps.get(k, "") if self.kvps else ""
-            self.update(**{k: prev + v})
+    def update_stream(
+        self,
+        heading: str | None = None,
+        content: str | None = None,
+        kvps: dict | None = None,
+        keep_kvps: Iterable[str] | None = None,
+        **kwargs: Any,
+    ):
+        """Set fields to the full text streamed so far, kvps may be nested structures of text.
+        Text that extends what was streamed before is appended, anything else replaces the field.
+        Unlike update, kvps are merged into the existing ones, unless keep_kvps is given:
+        then kvps are the complete snapshot and other keys are removed, except those in keep_kvps."""
+        if self.guid == self.log.guid:
+            self.log._append_item(
+                self.no,
+                full=True,
+                heading=heading,
+                content=content,
+                kvps={**(kvps or {}), **kwargs},
+                keep_kvps=keep_kvps,
+            )
 
     def output(self):
         return {
@@ -189,8 +217,12 @@ class Log:
     def __init__(self):
         self.context: "AgentContext|None" = None # set from outside
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
         self.logs: list[LogItem] = []
+        self.version: int = 0  # incremented by every update
+        self._versions: OrderedDict[int, int] = OrderedDict()  # item no -> version of its last update, oldest first
+        self._lock = threading.Lock()
+        # item no -> streamed fields, "heading", "content" or a ("kvps", key, ...) path
+        self._streams: OrderedDict[int, dict[str | tuple, _StreamedText]] = OrderedDict()
         self.set_initial_progress()
 
     def log(
@@ -264,20 +296,117 @@ class Log:
             content = _truncate_content(content, item.type)
             item.content = content
         if kvps is not None:
-            kvps = OrderedDict(copy.deepcopy(kvps))
+            kvps = OrderedDict(_copy_value(kvps))
             kvps = self._mask_recursive(kvps)
             kvps = _truncate_value(kvps)
             item.kvps = kvps
         elif item.kvps is None:
             item.kvps = OrderedDict()
         if kwargs:
-            kwargs = copy.deepcopy(kwargs)
+            kwargs = _copy_value(kwargs)
             kwargs = self._mask_recursive(kwargs)
             item.kvps.update(kwargs)
 
-        self.updates += [item.no]
+        # fields set as a whole are no longer continued by appends
+        streams = self._streams.get(no)
+        if streams:
+            if heading is not None:
+                streams.pop("heading", None)
+            if content is not None:
+                streams.pop("content", None)
+            for key in list(streams):
+                if isinstance(key, tuple) and (kvps is not None or key[1] in kwargs):
+                    del streams[key]
+
+        self._add_update(item)
+
+    def _append_item(
+        self,
+        no: int,
+        full: bool = False,
+        heading: str | None = None,
+        content: str | None = None,
+        kvps: dict | None = None,
+        keep_kvps: Iterable[str] | None = None,
+    ):
+        item = self.logs[no]
+        streams = self._streams.get(no)
+        if streams is None:
+            streams = self._streams[no] = {}
+            while len(self._streams) > STREAM_STATE_ITEMS:
+                self._streams.popitem(last=False)
+        else:
+            self._streams.move_to_end(no)
+        masker = self._get_masker()
+        if item.kvps is None:
+            item.kvps = OrderedDict()
+
+        streamed = set()
+
+        def add(field: str | tuple, current: Any, text: str) -> str:
+            streamed.add(field)
+            stream = streams.get(field)
+            if full:
+                if stream and stream.masker is masker and text.startswith(stream.raw):
+                    stream.append(text[len(stream.raw):])
+                else:
+                    stream = streams[field] = _StreamedText(masker, text)
+            else:
+                if stream is None:
+                    # continue from the stored text, it is masked already
+                    stream = _StreamedText(masker, "" if current is None else str(current))
+                elif stream.masker is not masker:
+                    stream = _StreamedText(masker, stream.raw)  # secrets changed
+                streams[field] = stream
+                stream.append(text)
+            return stream.text()
+
+        def add_value(field: tuple, value: Any) -> Any:
+            # full values are streamed text by text, so parsed structures grow incrementally too
+            if isinstance(value, str):
+                return _truncate_value(add(field, None, value))
+            if isinstance(value, dict):
+                return {_truncate_key(k): add_value(field + (k,), v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [add_value(field + (i,), v) for i, v in enumerate(value)]
+            return _copy_value(value)
+
+        if heading is not None:
+            item.heading = _truncate_heading(add("heading", item.heading, heading))
+        if content is not None:
+            item.content = _truncate_content(add("content", item.content, content), item.type)
+        for key, value in (kvps or {}).items():
+            if full:
+                item.kvps[key] = add_value(("kvps", key), value)
+            else:
+                item.kvps[key] = _truncate_value(add(("kvps", key), item.kvps.get(key), value))
+
+        if full and keep_kvps is not None:
+            # keys a partial parse had before, like "hea" of "headline", are gone from the snapshot
+            keep = set(keep_kvps)
+            for key in [k for k in item.kvps if k not in (kvps or {}) and k not in keep]:
+                del item.kvps[key]
+            for field in [f for f in streams if isinstance(f, tuple) and f not in streamed]:
+                if field[1] not in keep:
+                    del streams[field]
+
+        self._add_update(item)
+
+    def _add_update(self, item: LogItem):
+        self.mark_updated(item.no)
         self._update_progress_from_item(item)
 
+    def mark_updated(self, no: int):
+        # only the last version of each item is kept, memory does not grow with the number of updates
+        with self._lock:
+            self.version += 1
+            self._versions[no] = self.version
+            self._versions.move_to_end(no)
+        self._notify_change()
+
+    def get_version(self) -> int:
+        return self.version
+
     def set_progress(self, progress: str, no: int = 0, active: bool = True):
         progress = self._mask_recursive(progress)
         progress = _truncate_progress(progress)
@@ -286,31 +415,40 @@ class Log:
             no = len(self.logs)
         self.progress_no = no
         self.progress_active = active
+        self._notify_change()
 
     def set_initial_progress(self):
         self.set_progress("Waiting for input", 0, False)
 
     def output(self, start=None, end=None):
+        """Items updated after version start (and up to version end), in log order.
+        Only the changed items are visited, newest first until the start version is reached."""
         if start is None:
             start = 0
-        if end is None:
-            end = len(self.updates)
-
-        out = []
-        seen = set()
-        for update in self.updates[start:end]:
-            if update not in seen:
-                out.append(self.logs[update].output())
-                seen.add(update)
 
-        return out
+        changed = []
+        with self._lock:
+            logs = self.logs
+            for no, version in reversed(self._versions.items()):
+                if version <= start:
+                    break
+                if end is None or version <= end:
+                    changed.append(no)
+        changed.sort()
+        return [logs[no].output() for no in changed]
 
     def reset(self):
         self.guid = str(uuid.uuid4())
-        self.updates = []
-        self.logs = []
+        with self._lock:
+            self.logs = []
+            self.version = 0
+            self._versions = OrderedDict()
+        self._streams.clear()
         self.set_initial_progress()
 
+    def _notify_change(self):
+        state_monitor.notify_change(self.context.id if self.context else state_monitor.GLOBAL_SCOPE)
+
     def _update_progress_from_item(self, item: LogItem):
         if item.heading and item.update_progress != "none":
             if item.no >= self.progress_no:
@@ -321,6 +459,16 @@ class Log:
 
     def _mask_recursive(self, obj: T) -> T:
         """Recursively mask secrets in nested objects."""
+        masker = self._get_masker()
+        if masker is None:
+            # If masking fails, return original object
+            return obj
+        try:
+            return _mask_with(masker, obj)
+        except Exception as _e:
+            return obj
+
+    def _get_masker(self) -> "SecretMasker | None":
         try:
             from agent import AgentContext
             secrets_mgr = get_secrets_manager(self.context or AgentContext.current())
@@ -332,14 +480,72 @@ class Log:
             # if self_id != current_id:
             #     print(f"Context ID mismatch: {self_id} != {current_id}")
 
-            if isinstance(obj, str):
-                return secrets_mgr.mask_values(obj)
-            elif isinstance(obj, dict):
-                return {k: self._mask_recursive(v) for k, v in obj.items()}  # type: ignore
-            elif isinstance(obj, list):
-                return [self._mask_recursive(item) for item in obj]  # type: ignore
-            else:
-                return obj
+            # compiled once per secrets snapshot, shared by the whole structure
+            return secrets_mgr.get_masker(min_length=4)
         except Exception as _e:
-            # If masking fails, return original object
-            return obj
\ No newline at end of file
+            return None
+
+
+class _StreamedText:
+    """Text of a log field that grows by appends, masked incrementally.
+
+    The masked head ends at a cut no secret value crosses, only the raw tail after it
+    is masked again on each append. The tail is kept at most twice the longest secret long.
+    """
+
+    def __init__(self, masker: "SecretMasker | None", raw: str = ""):
+        self.masker = masker
+        self.raw = ""
+        self.head = ""  # masked raw[:cut]
+        self.cut = 0
+        self.append(raw)
+
+    def append(self, text: str):
+        self.raw += text
+        masker = self.masker
+        if not masker or not masker.max_len:
+            return
+        tail_len = len(self.raw) - self.cut
+        if tail_len > 2 * masker.max_len:
+            tail = self.raw[self.cut:]
+            # a value starting before this cut is either complete or longer than max_len
+            cut = len(tail) - masker.max_len
+            moved = True
+            occurrences = masker.occurrences(tail)
+            while moved:
+                moved = False
+                for start, end in occurrences:
+                    if start < cut < end:
+                        cut = start
+                        moved = True
+            self.head += masker.mask(tail[:cut])
+            self.cut += cut
+
+    def text(self) -> str:
+        if not self.masker or not self.masker.max_len:
+            return self.raw
+        return self.head + self.masker.mask(self.raw[self.cut:])
+
+
+def _copy_value(val: T) -> T:
+    # containers are copied, immutable values are shared instead of deep-copied
+    if val is None or isinstance(val, (str, int, float, bool)):
+        return val
+    if isinstance(val, dict):
+        return {k: _copy_value(v) for k, v in val.items()}  # type: ignore
+    if isinstance(val, list):
+        return [_copy_value(v) for v in val]  # type: ignore
+    if isinstance(val, tuple):
+        return tuple(_copy_value(v) for v in val)  # type: ignore
+    return copy.deepcopy(val)
+
+
+def _mask_with(masker: "SecretMasker", obj: T) -> T:
+    if isinstance(obj, str):
+        return masker.mask(obj)  # type: ignore
+    elif isinstance(obj, dict):
+        return {k: _mask_with(masker, v) for k, v in obj.items()}  # type: ignore
+    elif isinstance(obj, list):
+        return [_mask_with(masker, item) for item in obj]  # type: ignore
+    else:
+        return obj
\ No newline at end of file
@@ -17,6 +17,7 @@ from typing import (
 )
 import threading
 import asyncio
+import time
 from contextlib import AsyncExitStack
 from shutil import which
 from datetime import timedelta
@@ -24,12 +25,14 @@ import json
 from python.helpers import errors
 from python.helpers import settings
 
+import anyio
 import httpx
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
 from mcp.shared.message import SessionMessage
 from mcp.types import CallToolResult, ListToolsResult
 from anyio.streams.memory import (
@@ -39,6 +42,7 @@ from anyio.streams.memory import (
 
 from pydantic import BaseModel, Field, Discriminator, Tag, PrivateAttr
 from python.helpers import dirty_json
+from python.helpers.defer import EventLoopThread
 from python.helpers.print_style import PrintStyle
 from python.helpers.tool import Tool, Response
 
@@ -210,6 +214,14 @@ class MCPTool(Tool):
             )  # Log includes the full context
 
 
+_tools_version = 0  # see MCPConfig.get_tools_version
+
+
+def _bump_tools_version():
+    global _tools_version
+    _tools_version += 1
+
+
 class MCPServerRemote(BaseModel):
     name: str = Field(default_factory=str)
     description: Optional[str] = Field(default="Remote SSE Server")
@@ -252,8 +264,14 @@ class MCPServerRemote(BaseModel):
     ) -> CallToolResult:
         """Call a tool with the given input data"""
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        # do not hold the lock while waiting, calls to the same server can run in parallel
+        return await client.call_tool(tool_name, input_data)  # type: ignore
+
+    def close(self):
+        """Close the pooled session to the server"""
+        with self.__lock:
+            self.__client.close()  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerRemote":
         with self.__lock:
@@ -331,8 +349,14 @@ class MCPServerLocal(BaseModel):
     ) -> CallToolResult:
         """Call a tool with the given input data"""
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        # do not hold the lock while waiting, calls to the same server can run in parallel
+        return await client.call_tool(tool_name, input_data)  # type: ignore
+
+    def close(self):
+        """Close the pooled session to the server"""
+        with self.__lock:
+            self.__client.close()  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerLocal":
         with self.__lock:
@@ -465,6 +489,10 @@ class MCPConfig(BaseModel):
                 "servers": servers_data
             }  # Prepare data for re-initialization or update
 
+            # close pooled sessions of the servers being replaced
+            for server in instance.servers:
+                server.close()
+
             # Option 1: Re-initialize the existing instance (if __init__ is idempotent for other fields)
             instance.__init__(servers_list=servers_data)
 
@@ -483,8 +511,14 @@ class MCPConfig(BaseModel):
             #         )
 
             cls.__initialized = True
+            _bump_tools_version()
             return instance
 
+    @classmethod
+    def get_tools_version(cls) -> int:
+        """Changes whenever servers or their tools change, for caching the tools prompt."""
+        return _tools_version
+
     @classmethod
     def normalize_config(cls, servers: Any):
         normalized = []
@@ -773,19 +807,33 @@ class MCPConfig(BaseModel):
             raise ValueError(f"Tool {tool_name} not found")
         server_name_part, tool_name_part = tool_name.split(".")
         with self.__lock:
-            for server in self.servers:
-                if server.name == server_name_part and server.has_tool(tool_name_part):
-                    return await server.call_tool(tool_name_part, input_data)
+            server = next(
+                (
+                    s
+                    for s in self.servers
+                    if s.name == server_name_part and s.has_tool(tool_name_part)
+                ),
+                None,
+            )
+        if not server:
             raise ValueError(f"Tool {tool_name} not found")
+        # the server keeps a warm session, see MCPClientBase._execute_with_session
+        return await server.call_tool(tool_name_part, input_data)
 
 
 T = TypeVar("T")
 
+SESSION_LOOP_THREAD = "MCP Sessions"  # event loop thread owning all pooled sessions
+SESSION_MAX_IN_FLIGHT = 4  # concurrent requests per server session
+SESSION_HEALTH_CHECK_IDLE = 30  # ping sessions idle for longer than this (seconds)
+SESSION_BACKOFF_BASE = 1  # first reconnect delay after a failure (seconds), doubles with each failure
+SESSION_BACKOFF_MAX = 60
+
 
 class MCPClientBase(ABC):
     # server: Union[MCPServerLocal, MCPServerRemote] # Defined in __init__
     # tools: List[dict[str, Any]] # Defined in __init__
-    # No self.session, self.exit_stack, self.stdio, self.write as persistent instance fields
+    # The pooled session and its state live on the SESSION_LOOP_THREAD event loop only
 
     __lock: ClassVar[threading.Lock] = threading.Lock()
 
@@ -796,6 +844,15 @@ class MCPClientBase(ABC):
         self.log: List[str] = []
         self.log_file: Optional[TextIO] = None
 
+        self._session: Optional[ClientSession] = None
+        self._session_ready: Optional[asyncio.Future[ClientSession]] = None
+        self._session_stop: Optional[asyncio.Event] = None
+        self._session_calls: Optional[asyncio.Semaphore] = None
+        self._session_used: float = 0
+        self._session_failures: int = 0
+        self._session_retry_at: float = 0
+        self._session_error: Optional[BaseException] = None
+
     # Protected method
     @abstractmethod
     async def _create_stdio_transport(
@@ -813,62 +870,134 @@ class MCPClientBase(ABC):
         read_timeout_seconds=60,
     ) -> T:
         """
-        Manages the lifecycle of an MCP session for a single operation.
-        Creates a temporary session, executes coro_func with it, and ensures cleanup.
+        Executes coro_func with the pooled session of this server.
+        The session is kept open between operations, so stdio servers are not respawned
+        and the initialize handshake runs only once per connection.
         """
         operation_name = coro_func.__name__  # For logging
-        # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Creating new session for operation '{operation_name}'...")
-        # Store the original exception outside the async block
-        original_exception = None
         try:
-            async with AsyncExitStack() as temp_stack:
-                try:
-
-                    stdio, write = await self._create_stdio_transport(temp_stack)
-                    # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name} - {operation_name}): Transport created. Initializing session...")
-                    session = await temp_stack.enter_async_context(
-                        ClientSession(
-                            stdio,  # type: ignore
-                            write,  # type: ignore
-                            read_timeout_seconds=timedelta(
-                                seconds=read_timeout_seconds
-                            ),
-                        )
-                    )
-                    await session.initialize()
-
-                    result = await coro_func(session)
-
-                    return result
-                except Exception as e:
-                    # Store the original exception and raise a dummy exception
-                    excs = getattr(e, "exceptions", None)  # Python 3.11+ ExceptionGroup
-                    if excs:
-                        original_exception = excs[0]
-                    else:
-                        original_exception = e
-                    # Create a dummy exception to break out of the async block
-                    raise RuntimeError("Dummy exception to break out of async block")
+            future = EventLoopThread(SESSION_LOOP_THREAD).run_coroutine(
+                self._execute_pooled(coro_func, read_timeout_seconds)
+            )
+            return await asyncio.wrap_future(future)
         except Exception as e:
-            # Check if this is our dummy exception
-            if original_exception is not None:
-                e = original_exception
-            # We have the original exception stored
             PrintStyle(
                 background_color="#AA4455", font_color="white", padding=False
             ).print(
                 f"MCPClientBase ({self.server.name} - {operation_name}): Error during operation: {type(e).__name__}: {e}"
             )
-            raise e  # Re-raise the original exception
-        # finally:
-        #     PrintStyle(font_color="cyan").print(
-        #         f"MCPClientBase ({self.server.name} - {operation_name}): Session and transport will be closed by AsyncExitStack."
-        #     )
-        # This line should ideally be unreachable if the try/except/finally logic within the 'async with' is exhaustive.
-        # Adding it to satisfy linters that might not fully trace the raise/return paths through async context managers.
-        raise RuntimeError(
-            f"MCPClientBase ({self.server.name} - {operation_name}): _execute_with_session exited 'async with' block unexpectedly."
-        )
+            raise e
+
+    async def _execute_pooled(
+        self,
+        coro_func: Callable[[ClientSession], Awaitable[T]],
+        read_timeout_seconds: int,
+    ) -> T:
+        if not self._session_calls:
+            self._session_calls = asyncio.Semaphore(SESSION_MAX_IN_FLIGHT)
+        async with self._session_calls:
+            for attempt in range(2):
+                session = await self._acquire_session(read_timeout_seconds)
+                try:
+                    result = await coro_func(session)
+                except McpError:
+                    raise  # the server responded, the session is fine
+                except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+                    # the connection was gone before the request was sent, safe to retry once
+                    self._close_session(session)
+                    if attempt:
+                        raise
+                    continue
+                except Exception:
+                    # transport may be broken, reconnect on the next operation
+                    self._close_session(session)
+                    raise
+                self._session_used = time.monotonic()
+                return result
+        raise RuntimeError("unreachable")
+
+    async def _acquire_session(self, read_timeout_seconds: int) -> ClientSession:
+        session = self._session
+        if session:
+            if time.monotonic() - self._session_used < SESSION_HEALTH_CHECK_IDLE:
+                return session
+            # idle session, check it is still alive before use
+            try:
+                await asyncio.wait_for(session.send_ping(), read_timeout_seconds)
+                self._session_used = time.monotonic()
+                return session
+            except Exception:
+                self._close_session(session)
+
+        if not self._session_ready or self._session_ready.done():
+            wait = self._session_retry_at - time.monotonic()
+            if wait > 0:
+                raise ConnectionError(
+                    f"Reconnecting to MCP server '{self.server.name}' in {wait:.0f}s, last error: {type(self._session_error).__name__}: {self._session_error}"
+                )
+            self._session_ready = asyncio.get_running_loop().create_future()
+            self._session_stop = asyncio.Event()
+            asyncio.create_task(
+                self._run_session(
+                    self._session_ready, self._session_stop, read_timeout_seconds
+                )
+            )
+        # shared by all operations waiting for the same connection
+        return await asyncio.shield(self._session_ready)
+
+    async def _run_session(
+        self,
+        ready: "asyncio.Future[ClientSession]",
+        stop: asyncio.Event,
+        read_timeout_seconds: int,
+    ):
+        # the transport and session contexts must be entered and exited by the same task
+        session = None
+        try:
+            async with AsyncExitStack() as stack:
+                stdio, write = await self._create_stdio_transport(stack)
+                session = await stack.enter_async_context(
+                    ClientSession(
+                        stdio,  # type: ignore
+                        write,  # type: ignore
+                        read_timeout_seconds=timedelta(seconds=read_timeout_seconds),
+                    )
+                )
+                await session.initialize()
+                self._session = session
+                self._session_used = time.monotonic()
+                self._session_failures = 0
+                ready.set_result(session)
+                await stop.wait()
+        except BaseException as e:
+            excs = getattr(e, "exceptions", None)  # Python 3.11+ ExceptionGroup
+            error = excs[0] if excs else e
+            if not ready.done():
+                self._session_failures += 1
+                self._session_retry_at = time.monotonic() + min(
+                    SESSION_BACKOFF_MAX,
+                    SESSION_BACKOFF_BASE * 2 ** (self._session_failures - 1),
+                )
+                self._session_error = error
+                ready.set_exception(error)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            if self._session is session:
+                self._session = None
+
+    def _close_session(self, session: Optional[ClientSession] = None):
+        if session and session is not self._session:
+            return  # already replaced
+        self._session = None
+        if self._session_stop:
+            self._session_stop.set()
+
+    def close(self):
+        """Close the pooled session, safe to call from any thread."""
+        loop = EventLoopThread(SESSION_LOOP_THREAD).loop
+        if loop and self._session_stop:
+            loop.call_soon_threadsafe(self._close_session)
 
     async def update_tools(self) -> "MCPClientBase":
         # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Starting 'update_tools' operation...")
@@ -884,6 +1013,7 @@ class MCPClientBase(ABC):
                     }
                     for tool in response.tools
                 ]
+            _bump_tools_version()
             PrintStyle(font_color="green").print(
                 f"MCPClientBase ({self.server.name}): Tools updated. Found {len(self.tools)} tools."
             )
@@ -907,6 +1037,7 @@ class MCPClientBase(ABC):
             with self.__lock:
                 self.tools = []  # Ensure tools are cleared on failure
                 self.error = f"Failed to initialize. {error_text[:200]}{'...' if len(error_text) > 200 else ''}"  # store error from tools fetch
+            _bump_tools_version()
         return self
 
     def has_tool(self, tool_name: str) -> bool:
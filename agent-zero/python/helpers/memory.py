@@ -2,6 +2,8 @@ from datetime import datetime
 from typing import Any, List, Sequence
 from langchain.storage import InMemoryByteStore, LocalFileStore
 from langchain.embeddings import CacheBackedEmbeddings
+from python.helpers import embedding_cache
+from python.helpers.embedding_cache import CachedQueryEmbeddings
 from python.helpers import guids
 
 # from langchain_chroma import Chroma
@@ -23,6 +25,7 @@ import os, json
 import numpy as np
 
 from python.helpers.print_style import PrintStyle
+from python.helpers.memory_wal import MemoryWal
 from . import files
 from langchain_core.documents import Document
 from python.helpers import knowledge_import
@@ -50,6 +53,23 @@ class MyFaiss(FAISS):
     def get_all_docs(self):
         return self.docstore._dict  # type: ignore
 
+    def upsert_embeddings(self, docs: list[Document], vectors: Sequence[Sequence[float]]):
+        ids = [doc.metadata["id"] for doc in docs]
+        self.delete_existing(ids)
+        return self.add_embeddings(
+            zip([doc.page_content for doc in docs], vectors),
+            metadatas=[doc.metadata for doc in docs],
+            ids=ids,
+        )
+
+    def delete_existing(self, ids: Sequence[str]):
+        # plain delete raises when any of the ids is missing, WAL replay needs to be idempotent
+        docs = self.get_all_docs()
+        existing = [id for id in ids if id in docs]
+        if existing:
+            self.delete(ids=existing)
+        return existing
+
 
 class Memory:
 
@@ -138,14 +158,33 @@ class Memory:
         if log_item:
             log_item.stream(progress="\nInitializing VectorDB")
 
-        em_dir = files.get_abs_path(
-            "memory/embeddings"
-        )  # just caching, no need to parameterize
         db_dir = abs_db_dir(memory_subdir)
 
         # make sure embeddings and database directories exist
         os.makedirs(db_dir, exist_ok=True)
 
+        # hold the WAL lock so that a pending checkpoint cannot rewrite the files while loading
+        wal = MemoryWal.get(db_dir)
+        with wal.lock:
+            db, created = Memory._initialize_db(
+                log_item, model_config, memory_subdir, in_memory, wal
+            )
+            wal.attach(db, lambda db: Memory._save_db_file(db, memory_subdir))
+        return db, created
+
+    @staticmethod
+    def _initialize_db(
+        log_item: LogItem | None,
+        model_config: models.ModelConfig,
+        memory_subdir: str,
+        in_memory: bool,
+        wal: MemoryWal,
+    ) -> tuple[MyFaiss, bool]:
+        em_dir = files.get_abs_path(
+            "memory/embeddings"
+        )  # just caching, no need to parameterize
+        db_dir = abs_db_dir(memory_subdir)
+
         if in_memory:
             store = InMemoryByteStore()
         else:
@@ -161,9 +200,13 @@ class Memory:
             model_config.provider + "_" + model_config.name
         )
 
-        # here we setup the embeddings model with the chosen cache storage
-        embedder = CacheBackedEmbeddings.from_bytes_store(
-            embeddings_model, store, namespace=embeddings_model_id
+        # here we setup the embeddings model with the chosen cache storage,
+        # queries are cached in memory, shared with other databases using the model
+        embedder = CachedQueryEmbeddings(
+            CacheBackedEmbeddings.from_bytes_store(
+                embeddings_model, store, namespace=embeddings_model_id
+            ),
+            embedding_cache.get_model_id(model_config),
         )
 
         # initial DB and docs variables
@@ -183,6 +226,14 @@ class Memory:
                 relevance_score_fn=Memory._cosine_normalizer,
             )  # type: ignore
 
+            # replay writes made since the last checkpoint
+            records = wal.read()
+            for record in records:
+                Memory._apply_wal_record(db, record)
+            if records:
+                PrintStyle.standard(f"Replayed {len(records)} memory WAL records")
+                wal.request_checkpoint()
+
             # if there is a mismatch in embeddings used, re-index the whole DB
             emb_ok = False
             emb_set_file = files.get_abs_path(db_dir, "embedding.json")
@@ -221,8 +272,9 @@ class Memory:
                     log_item.stream(progress="\nIndexing memories")
                 db.add_documents(documents=list(docs.values()), ids=list(docs.keys()))
 
-            # save DB
+            # save DB, it contains everything the WAL had
             Memory._save_db_file(db, memory_subdir)
+            wal.reset()
             # save meta file
             meta_file_path = files.get_abs_path(db_dir, "embedding.json")
             files.write_file(
@@ -374,15 +426,13 @@ class Memory:
                 # fnd = self.db.get(where={"id": {"$in": document_ids}})
                 # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
                 # tot += len(fnd["ids"])
-                await self.db.adelete(ids=document_ids)
+                self._write(("delete", document_ids))
                 tot += len(document_ids)
 
             # If fewer than K document IDs, break the loop
             if len(document_ids) < k:
                 break
 
-        if tot:
-            self._save_db()  # persist
         return removed
 
     async def delete_documents_by_ids(self, ids: list[str]):
@@ -392,10 +442,8 @@ class Memory:
         )  # existing docs to remove (prevents error)
         if rem_docs:
             rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
-            await self.db.adelete(ids=rem_ids)
+            self._write(("delete", rem_ids))  # persist and remove
 
-        if rem_docs:
-            self._save_db()  # persist
         return rem_docs
 
     async def insert_text(self, text, metadata: dict = {}):
@@ -414,19 +462,35 @@ class Memory:
                 if not doc.metadata.get("area", ""):
                     doc.metadata["area"] = Memory.Area.MAIN.value
 
-            await self.db.aadd_documents(documents=docs, ids=ids)
-            self._save_db()  # persist
+            vectors = await self._embed_documents(docs)
+            self._write(("add", docs, vectors))  # persist and add
         return ids
 
     async def update_documents(self, docs: list[Document]):
         ids = [doc.metadata["id"] for doc in docs]
-        await self.db.adelete(ids=ids)  # delete originals
-        ins = await self.db.aadd_documents(documents=docs, ids=ids)  # add updated
-        self._save_db()  # persist
-        return ins
+        vectors = await self._embed_documents(docs)
+        self._write(("add", docs, vectors))  # add replaces the originals
+        return ids
+
+    async def _embed_documents(self, docs: list[Document]):
+        vectors = await self.db.embeddings.aembed_documents(  # type: ignore
+            [doc.page_content for doc in docs]
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _write(self, record: tuple):
+        # write-ahead: the record is durable before the in-memory index changes
+        wal = MemoryWal.get(abs_db_dir(self.memory_subdir))
+        with wal.lock:
+            wal.append(record)
+            Memory._apply_wal_record(self.db, record)
 
-    def _save_db(self):
-        Memory._save_db_file(self.db, self.memory_subdir)
+    @staticmethod
+    def _apply_wal_record(db: MyFaiss, record: tuple):
+        if record[0] == "add":
+            db.upsert_embeddings(record[1], record[2])
+        elif record[0] == "delete":
+            db.delete_existing(record[1])
 
     def _generate_doc_id(self):
         while True:
@@ -0,0 +1,150 @@
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Callable
+
+from python.helpers.print_style import PrintStyle
+
+WAL_FILE_NAME = "index.wal"
+CHECKPOINT_SIZE = 32 * 1024 * 1024  # fold the WAL into the index once it grows past this
+CHECKPOINT_INTERVAL = 60  # or once its oldest record is this many seconds old
+
+_HEADER = struct.Struct("<II")  # payload length, crc32
+
+
+class MemoryWal:
+    """Write-ahead log of inserts and deletes for one FAISS memory folder.
+
+    Every write is appended and fsynced before it is applied to the in-memory index,
+    the full index is only rewritten by a background checkpoint.
+    """
+
+    _instances: dict[str, "MemoryWal"] = {}
+    _instances_lock = threading.Lock()
+
+    @staticmethod
+    def get(db_dir: str) -> "MemoryWal":
+        # one instance per folder, reloaded databases keep using the same log and lock
+        with MemoryWal._instances_lock:
+            wal = MemoryWal._instances.get(db_dir)
+            if not wal:
+                wal = MemoryWal._instances[db_dir] = MemoryWal(db_dir)
+            return wal
+
+    def __init__(self, db_dir: str):
+        self.db_dir = db_dir
+        self.path = os.path.join(db_dir, WAL_FILE_NAME)
+        self.lock = threading.RLock()
+        self.db: Any = None
+        self.save: Callable[[Any], None] | None = None
+        self.first_record: float = 0
+        self.checkpoints = 0
+        self._timer: threading.Timer | None = None
+        self._due: float = 0
+
+    def attach(self, db: Any, save: Callable[[Any], None]):
+        """Set the database that checkpoints persist, together with the function that saves it."""
+        with self.lock:
+            self.db = db
+            self.save = save
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, *records: tuple):
+        """Durably append records. Call with the lock held and apply them to the index right after."""
+        data = b"".join(_frame(record) for record in records)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.request_checkpoint()
+        if self.size() > CHECKPOINT_SIZE:
+            self._schedule(0)
+
+    def request_checkpoint(self):
+        """Make sure a checkpoint will fold pending records in, at the latest after CHECKPOINT_INTERVAL."""
+        with self.lock:
+            if not self.first_record:
+                self.first_record = time.time()
+                self._schedule(CHECKPOINT_INTERVAL)
+
+    def read(self) -> list[tuple]:
+        """Read all complete records. A torn or corrupted tail is cut off the file,
+        records appended later would otherwise be hidden behind it on the next replay."""
+        with self.lock:
+            if not os.path.exists(self.path):
+                return []
+            with open(self.path, "rb") as f:
+                data = f.read()
+            records = []
+            pos = 0
+            while pos + _HEADER.size <= len(data):
+                length, crc = _HEADER.unpack_from(data, pos)
+                payload = data[pos + _HEADER.size : pos + _HEADER.size + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                records.append(pickle.loads(payload))
+                pos += _HEADER.size + length
+            if pos < len(data):
+                PrintStyle.error(
+                    f"Memory WAL {self.path} is damaged after {len(records)} records, dropping the rest"
+                )
+                with open(self.path, "r+b") as f:
+                    f.truncate(pos)
+                    f.flush()
+                    os.fsync(f.fileno())
+            return records
+
+    def reset(self):
+        """Drop all records, the index on disk already contains them."""
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.first_record = 0
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def checkpoint(self):
+        """Save the attached database and truncate the log."""
+        with self.lock:
+            if not self.first_record or not self.db or not self.save:
+                return
+            self.save(self.db)
+            self.checkpoints += 1
+            self.reset()
+
+    def _schedule(self, delay: float):
+        # keep a single pending checkpoint, the earliest one wins
+        due = time.time() + delay
+        if self._timer and self._due <= due:
+            return
+        if self._timer:
+            self._timer.cancel()
+        self._due = due
+        self._timer = threading.Timer(delay, self._run_checkpoint)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run_checkpoint(self):
+        with self.lock:
+            if self._timer is threading.current_thread():
+                self._timer = None
+            try:
+                self.checkpoint()
+            except Exception as e:
+                PrintStyle.error(f"Memory checkpoint of {self.db_dir} failed: {e}")
+                self._schedule(CHECKPOINT_INTERVAL)
+
+
+def _frame(record: tuple) -> bytes:
+    payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 import uuid
 from datetime import datetime, timezone, timedelta
 from enum import Enum
+from python.helpers import state_monitor
 
 
 class NotificationType(Enum):
@@ -110,6 +111,7 @@ class NotificationManager:
 
         # Enforce limit
         self._enforce_limit()
+        state_monitor.notify_change()
 
         return item
 
@@ -150,15 +152,18 @@ class NotificationManager:
                 if hasattr(item, key):
                     setattr(item, key, value)
             self.updates.append(no)
+            state_monitor.notify_change()
 
     def mark_all_read(self):
         for notification in self.notifications:
             notification.read = True
+        state_monitor.notify_change()
 
     def clear_all(self):
         self.notifications = []
         self.updates = []
         self.guid = str(uuid.uuid4())
+        state_monitor.notify_change()
 
     def get_notifications_by_type(self, type: NotificationType) -> list[NotificationItem]:
         return [n for n in self.notifications if n.type == type]
\ No newline at end of file
@@ -12,6 +12,9 @@ from python.helpers.log import Log, LogItem
 CHATS_FOLDER = "tmp/chats"
 LOG_SIZE = 1000
 CHAT_FILE_NAME = "chat.json"
+JOURNAL_FILE_NAME = "journal.jsonl"
+JOURNAL_MIN_COMPACT_SIZE = 1024 * 1024
+DATA_NAME_JOURNAL = "_chat_journal"
 
 
 def get_chat_folder_path(ctxid: str):
@@ -35,11 +38,32 @@ def save_tmp_chat(context: AgentContext):
     if context.type == AgentContextType.BACKGROUND:
         return
 
-    path = _get_chat_file_path(context.id)
-    files.make_dirs(path)
-    data = _serialize_context(context)
-    js = _safe_json_serialize(data, ensure_ascii=False)
-    files.write_file(path, js)
+    _write_snapshot(context)
+
+
+def append_tmp_chat(context: AgentContext):
+    """Append changes since the last save to the context journal.
+    Falls back to a full snapshot when there is no journal yet or the journal has outgrown it."""
+    if context.type == AgentContextType.BACKGROUND:
+        return
+
+    journal: _ChatJournal | None = context.get_data(DATA_NAME_JOURNAL)
+    if not journal or not files.exists(journal.path):
+        _write_snapshot(context)
+        return
+
+    records = journal.collect(context)
+    if not records:
+        return
+    lines = "".join(
+        _safe_json_serialize(r, ensure_ascii=False) + "\n" for r in records
+    )
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(lines)
+    journal.size += len(lines.encode("utf-8"))
+
+    if journal.size > max(JOURNAL_MIN_COMPACT_SIZE, journal.snapshot_size):
+        _write_snapshot(context)
 
 
 def save_tmp_chats():
@@ -64,6 +88,7 @@ def load_tmp_chats():
         try:
             js = files.read_file(file)
             data = json.loads(js)
+            _replay_journal(data, files.get_abs_path(files.dirname(file), JOURNAL_FILE_NAME))
             ctx = _deserialize_context(data)
             ctxids.append(ctx.id)
         except Exception as e:
@@ -75,6 +100,170 @@ def _get_chat_file_path(ctxid: str):
     return files.get_abs_path(CHATS_FOLDER, ctxid, CHAT_FILE_NAME)
 
 
+def _get_journal_file_path(ctxid: str):
+    return files.get_abs_path(CHATS_FOLDER, ctxid, JOURNAL_FILE_NAME)
+
+
+def _write_snapshot(context: AgentContext):
+    # the new journal generation is written into the snapshot first, a stale journal
+    # left behind by an interrupted compaction will not match it and is ignored on load
+    journal = _ChatJournal(_get_journal_file_path(context.id))
+    path = _get_chat_file_path(context.id)
+    files.make_dirs(path)
+    data = _serialize_context(context)
+    data["journal"] = journal.generation
+    js = _safe_json_serialize(data, ensure_ascii=False)
+    files.write_file(path, js)
+
+    header = _safe_json_serialize({"journal": journal.generation}) + "\n"
+    files.write_file(journal.path, header)
+    journal.size = len(header)
+    journal.snapshot_size = len(js.encode("utf-8"))
+    journal.collect(context, baseline=True)
+    context.set_data(DATA_NAME_JOURNAL, journal)
+
+
+class _ChatJournal:
+    """Tracks what of a context has already been persisted, so that only the difference is journaled."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.generation = str(uuid.uuid4())
+        self.size = 0
+        self.snapshot_size = 0
+        self.meta = ""
+        self.agents: dict[int, tuple] = {}
+        self.log_guid = ""
+        self.log_pos = 0
+
+    def collect(self, context: AgentContext, baseline: bool = False) -> list[dict[str, Any]]:
+        records: list[dict[str, Any]] = []
+
+        agent = context.agent0
+        agents: list[Agent] = []
+        while agent:
+            agents.append(agent)
+            agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+
+        meta = _serialize_meta(context, agents)
+        meta_js = _safe_json_serialize(meta, ensure_ascii=False)
+        if meta_js != self.meta:
+            records.append({"op": "meta", **meta})
+            self.meta = meta_js
+
+        for agent in agents:
+            records += self._collect_history(agent, baseline)
+        numbers = {agent.number for agent in agents}
+        self.agents = {n: v for n, v in self.agents.items() if n in numbers}
+
+        log = context.log
+        version = log.get_version()
+        if baseline:
+            self.log_guid = log.guid
+        elif log.guid != self.log_guid:
+            records.append({"op": "log_reset", "log": _serialize_log(log)})
+            self.log_guid = log.guid
+        elif version > self.log_pos:
+            records.append(
+                {
+                    "op": "log",
+                    "logs": log.output(start=self.log_pos, end=version),
+                    "progress": log.progress,
+                    "progress_no": log.progress_no,
+                }
+            )
+        self.log_pos = version
+
+        return [] if baseline else records
+
+    def _collect_history(self, agent: Agent, baseline: bool) -> list[dict[str, Any]]:
+        hist = agent.history
+        shape = (id(agent), id(hist), hist.revision, id(hist.current), len(hist.topics), len(hist.bulks))
+        known = self.agents.get(agent.number)
+        count = len(hist.current.messages)
+        self.agents[agent.number] = (shape, count)
+        if baseline:
+            return []
+
+        # only new messages in the current topic, anything else is rewritten as a whole
+        if known and known[0] == shape and known[1] <= count:
+            if known[1] == count:
+                return []
+            return [
+                {
+                    "op": "messages",
+                    "agent": agent.number,
+                    "counter": hist.counter,
+                    "messages": [m.to_dict() for m in hist.current.messages[known[1]:]],
+                }
+            ]
+        return [{"op": "history", "agent": agent.number, "history": hist.to_dict()}]
+
+
+def _replay_journal(data: dict[str, Any], path: str):
+    if not files.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return
+    try:
+        header = json.loads(lines[0])
+    except json.JSONDecodeError:
+        return
+    if not data.get("journal") or header.get("journal") != data["journal"]:
+        return  # journal of another snapshot generation
+
+    agents: dict[int, dict[str, Any]] = {ag["number"]: ag for ag in data.get("agents", [])}
+    log = data.setdefault("log", {})
+
+    for line in lines[1:]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            break  # torn write at the end of the journal
+        op = record.pop("op", None)
+
+        if op == "meta":
+            agents = {
+                ag["number"]: {**agents.get(ag["number"], {"history": ""}), **ag}
+                for ag in record.pop("agents", [])
+            }
+            data.update(record)
+
+        elif op == "history":
+            agents.setdefault(record["agent"], {"number": record["agent"], "data": {}})
+            agents[record["agent"]]["history"] = record["history"]
+
+        elif op == "messages":
+            ag = agents.setdefault(record["agent"], {"number": record["agent"], "data": {}})
+            hist = ag.get("history") or history.History(agent=None).to_dict()
+            if isinstance(hist, str):
+                hist = json.loads(hist)
+            hist["counter"] = record["counter"]
+            hist["current"]["messages"] += record["messages"]
+            ag["history"] = hist
+
+        elif op == "log_reset":
+            log = record["log"]
+            data["log"] = log
+
+        elif op == "log":
+            logs = log.setdefault("logs", [])
+            index = {item.get("no"): i for i, item in enumerate(logs)}
+            for item in record["logs"]:
+                if item["no"] in index:
+                    logs[index[item["no"]]] = item
+                else:
+                    index[item["no"]] = len(logs)
+                    logs.append(item)
+            log["logs"] = logs[-LOG_SIZE:]
+            log["progress"] = record["progress"]
+            log["progress_no"] = record["progress_no"]
+
+    data["agents"] = list(agents.values())
+
+
 def _convert_v080_chats():
     json_files = files.list_files(CHATS_FOLDER, "*.json")
     for file in json_files:
@@ -123,12 +312,19 @@ def _serialize_context(context: AgentContext):
         agents.append(_serialize_agent(agent))
         agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
 
+    return {
+        "id": context.id,
+        **_serialize_context_fields(context),
+        "agents": agents,
+        "log": _serialize_log(context.log),
+    }
+
 
+def _serialize_context_fields(context: AgentContext):
     data = {k: v for k, v in context.data.items() if not k.startswith("_")}
     output_data = {k: v for k, v in context.output_data.items() if not k.startswith("_")}
 
     return {
-        "id": context.id,
         "name": context.name,
         "created_at": (
             context.created_at.isoformat()
@@ -141,16 +337,26 @@ def _serialize_context(context: AgentContext):
             if context.last_message
             else datetime.fromtimestamp(0).isoformat()
         ),
-        "agents": agents,
         "streaming_agent": (
             context.streaming_agent.number if context.streaming_agent else 0
         ),
-        "log": _serialize_log(context.log),
         "data": data,
         "output_data": output_data,
     }
 
 
+def _serialize_meta(context: AgentContext, agents: list[Agent]):
+    data = _serialize_context_fields(context)
+    data["agents"] = [
+        {
+            "number": agent.number,
+            "data": {k: v for k, v in agent.data.items() if not k.startswith("_")},
+        }
+        for agent in agents
+    ]
+    return data
+
+
 def _serialize_agent(agent: Agent):
     data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
 
@@ -227,9 +433,13 @@ def _deserialize_agents(
             context=context,
         )
         current.data = ag.get("data", {})
-        current.history = history.deserialize_history(
-            ag.get("history", ""), agent=current
-        )
+        hist = ag.get("history", "")
+        if isinstance(hist, dict):  # replayed from the journal
+            current.history = history.History.from_dict(
+                hist, history=history.History(agent=current)
+            )
+        else:
+            current.history = history.deserialize_history(hist, agent=current)
         if not zero:
             zero = current
 
@@ -273,7 +483,7 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
                 temp=item_data.get("temp", False),
             )
         )
-        log.updates.append(i)
+        log.mark_updated(i)
         i += 1
 
     return log
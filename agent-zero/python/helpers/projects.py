@@ -1,3 +1,4 @@
+import glob
 import os
 from typing import Literal, TypedDict, TYPE_CHECKING
 
@@ -290,6 +291,15 @@ def build_system_prompt_vars(name: str):
     }
 
 
+def get_system_prompt_dependencies(name: str) -> list[str]:
+    """Glob patterns of the files build_system_prompt_vars reads."""
+    meta_folder = glob.escape(get_project_meta_folder(name))
+    return [
+        os.path.join(meta_folder, PROJECT_HEADER_FILE),
+        os.path.join(meta_folder, PROJECT_INSTRUCTIONS_DIR, "*"),
+    ]
+
+
 def get_additional_instructions_files(name: str):
     instructions_folder = files.get_abs_path(
         get_project_folder(name), PROJECT_META_DIR, PROJECT_INSTRUCTIONS_DIR
@@ -0,0 +1,50 @@
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+from python.helpers import files
+
+if TYPE_CHECKING:
+    from agent import Agent
+
+DATA_NAME_SEGMENTS = "_prompt_segments"
+FILES_CHECK_INTERVAL = 1.0  # seconds between checks of the files a segment was built from
+
+
+def get_segment(
+    agent: "Agent",
+    name: str,
+    keys: tuple[Any, ...],
+    build: Callable[[], str],
+    dependencies: Iterable[str] = (),
+) -> str:
+    """Text of a system prompt segment, built again only when needed.
+
+    The segment is rebuilt when one of its keys changes, or when a prompt file read by build
+    or a file matching the dependency glob patterns is added, removed or changed.
+    Keys are compared on every call, files at most every FILES_CHECK_INTERVAL.
+    A reused segment is the same string as before, which keeps the prompt prefix byte-stable.
+    """
+    segments: dict[str, dict] = agent.get_data(DATA_NAME_SEGMENTS)
+    if segments is None:
+        segments = {}
+        agent.set_data(DATA_NAME_SEGMENTS, segments)
+
+    now = time.monotonic()
+    cached = segments.get(name)
+    if cached and cached["keys"] == keys:
+        if now - cached["checked"] < FILES_CHECK_INTERVAL:
+            return cached["text"]
+        if cached["signature"] == files.get_files_signature(cached["patterns"]):
+            cached["checked"] = now
+            return cached["text"]
+
+    with files.collect_dependencies() as used:
+        text = build()
+    patterns = tuple(sorted(used)) + tuple(dependencies)
+    segments[name] = {
+        "keys": keys,
+        "patterns": patterns,
+        "signature": files.get_files_signature(patterns),
+        "checked": now,
+        "text": text,
+    }
+    return text
@@ -1,57 +1,153 @@
 import asyncio
+import threading
 import time
+from collections import deque
 from typing import Callable, Awaitable
 
 
+class _Waiter:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def wake(self):
+        # waiters can be on other event loop threads
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # loop closed
+
+
 class RateLimiter:
+    """Sliding window limits per key, e.g. requests, input and output tokens per minute.
+
+    Each key keeps a deque of [first, last, value] entries and a running total, adds within
+    RESOLUTION seconds of an entry's first add are merged into it and the entry expires with
+    its last add. Waiters are admitted in FIFO order, the first one sleeps exactly until
+    enough of the window has expired for it.
+    """
+
+    RESOLUTION = 0.1  # seconds, adds this close are merged into one entry
+
     def __init__(self, seconds: int = 60, **limits: int):
         self.timeframe = seconds
         self.limits = {key: value if isinstance(value, (int, float)) else 0 for key, value in (limits or {}).items()}
-        self.values = {key: [] for key in self.limits.keys()}
-        self._lock = asyncio.Lock()
+        self.values: dict[str, deque[list[float]]] = {key: deque() for key in self.limits.keys()}
+        self.totals: dict[str, float] = {key: 0 for key in self.limits.keys()}
+        # limiters are shared by contexts running on different event loop threads
+        self._lock = threading.Lock()
+        self._waiters: deque[_Waiter] = deque()
 
     def add(self, **kwargs: int):
-        now = time.time()
-        for key, value in kwargs.items():
-            if not key in self.values:
-                self.values[key] = []
-            self.values[key].append((now, value))
+        with self._lock:
+            self._add(time.monotonic(), kwargs)
+
+    def set_limits(self, **limits: int):
+        with self._lock:
+            for key, value in limits.items():
+                self.limits[key] = value if isinstance(value, (int, float)) else 0
+            if self._waiters:
+                self._waiters[0].wake()  # the first waiter may fit now
 
     async def cleanup(self):
-        async with self._lock:
-            now = time.time()
-            cutoff = now - self.timeframe
-            for key in self.values:
-                self.values[key] = [(t, v) for t, v in self.values[key] if t > cutoff]
+        with self._lock:
+            self._expire(time.monotonic())
 
     async def get_total(self, key: str) -> int:
-        async with self._lock:
-            if not key in self.values:
-                return 0
-            return sum(value for _, value in self.values[key])
+        with self._lock:
+            self._expire(time.monotonic())
+            return self.totals.get(key, 0)  # type: ignore
 
     async def wait(
         self,
         callback: Callable[[str, str, int, int], Awaitable[bool]] | None = None,
+        **usage: int,
     ):
-        while True:
-            await self.cleanup()
-            should_wait = False
-
-            for key, limit in self.limits.items():
-                if limit <= 0:  # Skip if no limit set
-                    continue
+        """Wait until the usage fits into all limits, then add it.
+        Without usage, wait until no limit is exceeded.
+        A usage larger than a limit on its own is admitted once the window is empty.
+        The callback is told about each wait, returning True proceeds without waiting."""
+        waiter = _Waiter()
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            while True:
+                with self._lock:
+                    first = self._waiters[0] is waiter
+                    if first:
+                        now = time.monotonic()
+                        self._expire(now)
+                        delay, key = self._get_delay(now, usage)
+                        if delay <= 0:
+                            self._add(now, usage)
+                            return
+                        total, limit = self.totals.get(key, 0), self.limits[key]
+                    waiter.event.clear()
 
-                total = await self.get_total(key)
-                if total > limit:
+                if first:
                     if callback:
                         msg = f"Rate limit exceeded for {key} ({total}/{limit}), waiting..."
-                        should_wait = not await callback(msg, key, total, limit)
-                    else:
-                        should_wait = True
-                    break
+                        if await callback(msg, key, total, limit):  # type: ignore
+                            self.add(**usage)
+                            return
+                    await self._sleep(waiter, delay)
+                else:
+                    await waiter.event.wait()
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
+                if self._waiters:
+                    self._waiters[0].wake()
 
-            if not should_wait:
-                break
+    async def _sleep(self, waiter: _Waiter, delay: float):
+        try:
+            await asyncio.wait_for(waiter.event.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
 
-            await asyncio.sleep(1)
+    def _add(self, now: float, values: dict[str, int]):
+        for key, value in values.items():
+            if not value:
+                continue
+            entries = self.values.get(key)
+            if entries is None:
+                entries = self.values[key] = deque()
+                self.totals[key] = 0
+            if entries and now - entries[-1][0] < self.RESOLUTION:
+                entries[-1][1] = now
+                entries[-1][2] += value
+            else:
+                entries.append([now, now, value])
+            self.totals[key] += value
+
+    def _expire(self, now: float):
+        cutoff = now - self.timeframe
+        for key, entries in self.values.items():
+            while entries and entries[0][1] <= cutoff:
+                self.totals[key] -= entries.popleft()[2]
+            if not entries:
+                self.totals[key] = 0  # no float drift on an empty window
+
+    def _get_delay(self, now: float, usage: dict[str, int]) -> tuple[float, str]:
+        # seconds until the oldest entries holding the excess have left the window
+        delay, delay_key = 0.0, ""
+        for key, limit in self.limits.items():
+            if limit <= 0:  # Skip if no limit set
+                continue
+            excess = self.totals.get(key, 0) + usage.get(key, 0) - limit
+            if excess <= 0:
+                continue
+            entries = self.values.get(key)
+            if not entries:
+                continue  # the usage alone is over the limit, admitted into an empty window
+            until = entries[-1][1]  # or once the window is empty
+            freed = 0
+            for _, last, value in entries:
+                freed += value
+                if freed >= excess:
+                    until = last
+                    break
+            key_delay = until + self.timeframe - now
+            if key_delay > delay:
+                delay, delay_key = key_delay, key
+        return delay, delay_key
@@ -1,7 +1,9 @@
+import glob
 import re
 import threading
 import time
 import os
+from collections import deque
 from io import StringIO
 from dataclasses import dataclass
 from typing import Dict, Optional, List, Literal, Set, Callable, Tuple, TYPE_CHECKING
@@ -35,74 +37,166 @@ class EnvLine:
     )
 
 
+class SecretMasker:
+    """Masks all secret values of one secrets snapshot, compiled once per snapshot.
+
+    - Full texts are masked with a precomputed longest-first replacement list
+      (str.replace runs in C and beats a single regex alternation in CPython).
+    - An Aho-Corasick automaton over the same values lets streaming filters track
+      partial matches across chunk boundaries while only reading each new chunk.
+    """
+
+    def __init__(self, value_to_key: Dict[str, str], placeholder: str = "§§secret({key})"):
+        # Sort by length (longest first) to avoid partial replacements
+        self.replacements: List[Tuple[str, str]] = [
+            (v, alias_for_key(value_to_key[v], placeholder))
+            for v in sorted((v for v in value_to_key if v), key=len, reverse=True)
+        ]
+        self.max_len: int = max((len(v) for v, _ in self.replacements), default=0)
+        self._build_automaton()
+
+    def mask(self, text: str) -> str:
+        """Replace all full secret values with placeholders in the given text."""
+        if not text:
+            return text
+        for value, alias in self.replacements:
+            text = text.replace(value, alias)
+        return text
+
+    def advance(self, state: int, text: str) -> Tuple[int, bool]:
+        """Feed text to the automaton from state. Returns the new state and whether a full value ended in text.
+        depth(state) is the length of the longest suffix of everything fed that is a secret prefix."""
+        goto, fail, out_len = self._goto, self._fail, self._out_len
+        matched = False
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out_len[state]:
+                matched = True
+        return state, matched
+
+    def depth(self, state: int) -> int:
+        return self._depth[state]
+
+    def occurrences(self, text: str) -> List[Tuple[int, int]]:
+        """Return (start, end) of the longest full value ending at each position of text."""
+        goto, fail, out_len = self._goto, self._fail, self._out_len
+        found: List[Tuple[int, int]] = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out_len[state]:
+                found.append((end - out_len[state], end))
+        return found
+
+    def _build_automaton(self):
+        # trie of all values
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        self._out_len: List[int] = [0]  # longest value ending at this node
+        for value, _ in self.replacements:
+            node = 0
+            for ch in value:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._depth.append(self._depth[node] + 1)
+                    self._out_len.append(0)
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out_len[node] = len(value)
+
+        # failure links, breadth first
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                if not self._out_len[nxt]:
+                    self._out_len[nxt] = self._out_len[self._fail[nxt]]
+
+
 class StreamingSecretsFilter:
     """Stateful streaming filter that masks secrets on the fly.
 
     - Replaces full secret values with placeholders §§secret(KEY) when detected.
     - Holds the longest suffix of the current buffer that matches any secret prefix
-      (with minimum trigger length of 3) to avoid leaking partial secrets across chunks.
-    - On finalize(), any unresolved partial is masked with '***'.
+      to avoid leaking partial secrets across chunks. A shorter secret inside that
+      suffix waits until it is clear whether a longer one completes.
+    - Only the new chunk is scanned, the automaton state carries partial matches over.
+    - On finalize(), any unresolved partial (minimum length min_trigger) is masked with '***'.
     """
 
-    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3):
+    def __init__(
+        self,
+        key_to_value: Dict[str, str],
+        min_trigger: int = 3,
+        masker: Optional[SecretMasker] = None,
+    ):
         self.min_trigger = max(1, int(min_trigger))
-        # Map value -> key for placeholder construction
-        self.value_to_key: Dict[str, str] = {
-            v: k for k, v in key_to_value.items() if isinstance(v, str) and v
-        }
-        # Only keep non-empty values
-        self.secret_values: List[str] = [v for v in self.value_to_key.keys() if v]
-        # Precompute all prefixes for quick suffix matching
-        self.prefixes: Set[str] = set()
-        for v in self.secret_values:
-            for i in range(self.min_trigger, len(v) + 1):
-                self.prefixes.add(v[:i])
-        self.max_len: int = max((len(v) for v in self.secret_values), default=0)
+        if masker is None:
+            masker = SecretMasker(
+                {v: k for k, v in key_to_value.items() if isinstance(v, str) and v}
+            )
+        self.masker = masker
+        self.max_len: int = masker.max_len
 
         # Internal buffer of pending text that is not safe to flush yet
         self.pending: str = ""
-
-    def _replace_full_values(self, text: str) -> str:
-        """Replace all full secret values with placeholders in the given text."""
-        # Sort by length desc to avoid partial overlaps
-        for val in sorted(self.secret_values, key=len, reverse=True):
-            if not val:
-                continue
-            key = self.value_to_key.get(val, "")
-            if key:
-                text = text.replace(val, alias_for_key(key))
-        return text
-
-    def _longest_suffix_prefix(self, text: str) -> int:
-        """Return length of longest suffix of text that is a known secret prefix.
-        Returns 0 if none found (or only shorter than min_trigger)."""
-        max_check = min(len(text), self.max_len)
-        for length in range(max_check, self.min_trigger - 1, -1):
-            suffix = text[-length:]
-            if suffix in self.prefixes:
-                return length
-        return 0
+        # Automaton state after the pending buffer, and whether it holds a full value
+        self.state: int = 0
+        self.matched: bool = False
+        # Masked text emitted so far
+        self.emitted: str = ""
+
+    def _safe_cut(self, cut: int) -> int:
+        """Move cut before any full value that would be split by it."""
+        occurrences = self.masker.occurrences(self.pending)
+        moved = True
+        while moved:
+            moved = False
+            for start, end in occurrences:
+                if start < cut < end:
+                    cut = start
+                    moved = True
+        return cut
 
     def process_chunk(self, chunk: str) -> str:
         if not chunk:
             return ""
 
         self.pending += chunk
+        self.state, matched = self.masker.advance(self.state, chunk)
+        self.matched = self.matched or matched
 
-        # Replace any full secret occurrences first
-        self.pending = self._replace_full_values(self.pending)
+        # Everything before the longest possible secret prefix can go out
+        hold_start = len(self.pending) - self.masker.depth(self.state)
+        cut = hold_start
+        if self.matched and cut < len(self.pending):
+            cut = self._safe_cut(cut)
 
-        # Determine the longest suffix that could still form a secret
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            # Flush everything except the hold suffix
-            emit = self.pending[:-hold_len]
-            self.pending = self.pending[-hold_len:]
-        else:
-            # Safe to flush everything
-            emit = self.pending
-            self.pending = ""
+        emit = self.pending[:cut]
+        if self.matched:
+            emit = self.masker.mask(emit)
+        self.pending = self.pending[cut:]
 
+        if not self.pending:
+            self.state, self.matched = 0, False
+        elif self.matched or cut != hold_start:
+            # resync with the (short) held text
+            self.state, self.matched = self.masker.advance(0, self.pending)
+
+        self.emitted += emit
         return emit
 
     def finalize(self) -> str:
@@ -111,14 +205,15 @@ class StreamingSecretsFilter:
         if not self.pending:
             return ""
 
-        hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            safe = self.pending[:-hold_len]
+        result = self.masker.mask(self.pending)
+        state, _ = self.masker.advance(0, result)
+        hold_len = self.masker.depth(state)
+        if hold_len >= self.min_trigger:
             # Mask unresolved partial
-            result = safe + "***"
-        else:
-            result = self.pending
+            result = result[:-hold_len] + "***"
         self.pending = ""
+        self.state, self.matched = 0, False
+        self.emitted += result
         return result
 
 
@@ -146,6 +241,7 @@ class SecretsManager:
         self._raw_snapshots: Dict[str, str] = {}
         self._secrets_cache = None
         self._last_raw_text = None
+        self._maskers: Dict[Tuple[int, str], SecretMasker] = {}
 
     def read_secrets_raw(self) -> str:
         """Read raw secrets file content from local filesystem (same system)."""
@@ -189,6 +285,7 @@ class SecretsManager:
                 self._last_raw_text = None
 
             self._secrets_cache = merged_secrets
+            self._maskers = {}
             return merged_secrets
 
     def save_secrets(self, secrets_content: str):
@@ -238,6 +335,12 @@ class SecretsManager:
         secrets = self.load_secrets()
         return list(secrets.keys())
 
+    def get_version(self) -> tuple:
+        """Changes whenever one of the secrets files changes, for caching values derived from them."""
+        return files.get_files_signature(
+            glob.escape(files.get_abs_path(path)) for path in self._files
+        )
+
     def get_secrets_for_prompt(self) -> str:
         """Get formatted string of secret keys for system prompt"""
         content = self.read_secrets_raw()
@@ -256,7 +359,27 @@ class SecretsManager:
 
     def create_streaming_filter(self) -> "StreamingSecretsFilter":
         """Create a streaming-aware secrets filter snapshotting current secret values."""
-        return StreamingSecretsFilter(self.load_secrets())
+        return StreamingSecretsFilter(self.load_secrets(), masker=self.get_masker())
+
+    def get_masker(
+        self, min_length: int = 0, placeholder: str = "§§secret({key})"
+    ) -> SecretMasker:
+        """Get the compiled masker for the current secrets snapshot, built once until secrets change."""
+        secrets = self.load_secrets()
+        with self._lock:
+            key = (min_length, placeholder)
+            masker = self._maskers.get(key)
+            if masker is None:
+                # Sort by length (longest first), the first key wins for duplicate values
+                value_to_key: Dict[str, str] = {}
+                for secret_key, value in sorted(
+                    secrets.items(), key=lambda x: len(x[1]), reverse=True
+                ):
+                    if value and len(value.strip()) >= min_length:
+                        value_to_key.setdefault(value, secret_key)
+                masker = SecretMasker(value_to_key, placeholder)
+                self._maskers[key] = masker
+            return masker
 
     def replace_placeholders(self, text: str) -> str:
         """Replace secret placeholders with actual values"""
@@ -302,17 +425,7 @@ class SecretsManager:
         if not text:
             return text
 
-        secrets = self.load_secrets()
-        result = text
-
-        # Sort by length (longest first) to avoid partial replacements
-        for key, value in sorted(
-            secrets.items(), key=lambda x: len(x[1]), reverse=True
-        ):
-            if value and len(value.strip()) >= min_length:
-                result = result.replace(value, alias_for_key(key, placeholder))
-
-        return result
+        return self.get_masker(min_length, placeholder).mask(text)
 
     def get_masked_secrets(self) -> str:
         """Get content with values masked for frontend display (preserves comments and unrecognized lines)"""
@@ -351,6 +464,7 @@ class SecretsManager:
             self._secrets_cache = None
             self._raw_snapshots = {}
             self._last_raw_text = None
+            self._maskers = {}
 
     @classmethod
     def _invalidate_all_caches(cls):
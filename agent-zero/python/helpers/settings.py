@@ -4,6 +4,8 @@ import json
 import os
 import re
 import subprocess
+import threading
+import time
 from typing import Any, Literal, TypedDict, cast
 
 import models
@@ -162,7 +164,51 @@ PASSWORD_PLACEHOLDER = "****PSWD****"
 API_KEY_PLACEHOLDER = "************"
 
 SETTINGS_FILE = files.get_abs_path("tmp/settings.json")
+SETTINGS_CHECK_INTERVAL = 1.0  # seconds between checks of the file for external changes
 _settings: Settings | None = None
+_settings_version = 0
+_settings_stamp: tuple | None = None
+_settings_checked = 0.0
+_settings_lock = threading.RLock()
+_version: str | None = None
+
+
+class _FrozenDict(dict):
+    """Read-only dict used for the shared settings snapshot. copy() returns a mutable deep copy."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Settings snapshot is read-only, use get_settings().copy() to modify")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly  # type: ignore
+    update = pop = popitem = clear = setdefault = _readonly  # type: ignore
+
+    def copy(self):  # type: ignore
+        return _thaw(self)
+
+    def __copy__(self):
+        return _thaw(self)
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+    def __reduce__(self):
+        return (dict, (_thaw(self),))
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return _FrozenDict({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
 
 
 def convert_out(settings: Settings) -> SettingsOutput:
@@ -1313,7 +1359,7 @@ def _get_api_key_field(settings: Settings, provider: str, title: str) -> Setting
 
 
 def convert_in(settings: dict) -> Settings:
-    current = get_settings()
+    current = get_settings().copy()
     for section in settings["sections"]:
         if "fields" in section:
             for field in section["fields"]:
@@ -1334,24 +1380,62 @@ def convert_in(settings: dict) -> Settings:
     return current
 
 def get_settings() -> Settings:
-    global _settings
-    if not _settings:
-        _settings = _read_settings_file()
-    if not _settings:
-        _settings = get_default_settings()
-    norm = normalize_settings(_settings)
-    return norm
+    """Return the current normalized settings as a shared read-only snapshot.
+    Use get_settings().copy() for a mutable copy."""
+    global _settings_checked
+    now = time.monotonic()
+    if _settings is not None and now - _settings_checked < SETTINGS_CHECK_INTERVAL:
+        return _settings
+    _settings_checked = now
+
+    stamp = _get_settings_stamp()
+    if _settings is None or stamp != _settings_stamp:
+        with _settings_lock:
+            if _settings is None or stamp != _settings_stamp:
+                reload = _settings is None or stamp[0] != _settings_stamp[0]  # type: ignore
+                base = (_read_settings_file() if reload else None) or _settings
+                _set_snapshot(base or get_default_settings())
+    return _settings  # type: ignore
+
+
+def get_settings_version() -> int:
+    """Monotonic counter incremented whenever the settings snapshot is rebuilt, usable as a cache key."""
+    get_settings()
+    return _settings_version
 
 
 def set_settings(settings: Settings, apply: bool = True):
-    global _settings
-    previous = _settings
-    _settings = normalize_settings(settings)
-    _write_settings_file(_settings)
+    with _settings_lock:
+        previous = _settings
+        normalized = normalize_settings(settings)
+        _write_settings_file(normalized)
+        # rebuild after writing, the auth token depends on the saved dotenv values
+        _set_snapshot(normalized)
     if apply:
         _apply_settings(previous)
 
 
+def _set_snapshot(settings: Settings):
+    global _settings, _settings_version, _settings_stamp
+    _settings = _freeze(normalize_settings(settings))
+    _settings_stamp = _get_settings_stamp()
+    _settings_version += 1
+
+
+def _get_settings_stamp() -> tuple:
+    # settings file changes and the dotenv values mcp_server_token is derived from
+    try:
+        stat = os.stat(SETTINGS_FILE)
+        file_stamp = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        file_stamp = None
+    return (
+        file_stamp,
+        dotenv.get_dotenv_value(dotenv.KEY_AUTH_LOGIN),
+        dotenv.get_dotenv_value(dotenv.KEY_AUTH_PASSWORD),
+    )
+
+
 def set_settings_delta(delta: dict, apply: bool = True):
     current = get_settings()
     new = {**current, **delta}
@@ -1737,4 +1821,8 @@ def create_auth_token() -> str:
 
 
 def _get_version():
-    return git.get_version()
+    # git describe runs a subprocess, the checkout does not change while running
+    global _version
+    if _version is None:
+        _version = git.get_version()
+    return _version
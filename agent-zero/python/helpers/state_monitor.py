@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from typing import Iterable
+
+GLOBAL_SCOPE = ""  # changes every client is interested in (chat list, notifications, scheduler)
+
+_version = 0
+_scope_versions: dict[str, int] = {}
+_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event, frozenset[str]]] = set()
+_lock = threading.Lock()
+
+
+def notify_change(scope: str = GLOBAL_SCOPE):
+    """Record a change of state shown in the web UI and wake the clients waiting for it.
+    Scope is a context id for changes of one chat, or GLOBAL_SCOPE."""
+    global _version
+    with _lock:
+        _version += 1
+        _scope_versions[scope] = _version
+        if not _waiters:
+            return
+        waiters = [w for w in _waiters if scope in w[2]]
+    for loop, event, _ in waiters:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # the waiting loop is closed already
+
+
+def remove_scope(scope: str):
+    with _lock:
+        _scope_versions.pop(scope, None)
+
+
+def get_version() -> int:
+    return _version
+
+
+def get_scopes(context_id: str = "") -> frozenset[str]:
+    return frozenset((GLOBAL_SCOPE, context_id)) if context_id else frozenset((GLOBAL_SCOPE,))
+
+
+def _changed(version: int, scopes: Iterable[str]) -> bool:
+    return any(_scope_versions.get(scope, 0) > version for scope in scopes)
+
+
+async def wait_for_change(version: int, timeout: float, scopes: frozenset[str] = get_scopes()) -> bool:
+    """Wait until one of the scopes changes after version, at most timeout seconds.
+    Returns whether there was a change."""
+    event = asyncio.Event()
+    waiter = (asyncio.get_running_loop(), event, scopes)
+    with _lock:
+        if _changed(version, scopes):
+            return True
+        _waiters.add(waiter)
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+        return True
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        with _lock:
+            _waiters.discard(waiter)
@@ -0,0 +1,114 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from python.helpers import dotenv
+
+STREAM_WINDOW_MS = 40  # default latency target, A0_STREAM_WINDOW_MS overrides it, 0 disables coalescing
+STREAM_MAX_CHARS = 2048  # a batch this large is delivered without waiting for the window
+
+StreamCallback = Callable[[str, str], Awaitable[None]]
+
+
+def get_stream_window() -> float:
+    try:
+        return max(0.0, float(dotenv.get_dotenv_value("A0_STREAM_WINDOW_MS", STREAM_WINDOW_MS))) / 1000
+    except ValueError:
+        return STREAM_WINDOW_MS / 1000
+
+
+class StreamCoalescer:
+    """Batches stream deltas before they reach a (chunk, full) callback.
+
+    Deltas are joined in order and delivered once the window has passed since the last
+    delivery, once the batch reaches max_chars, or on flush/close. The first delta is
+    delivered right away, so chunk == full still marks the start of a stream.
+    A timer delivers a waiting batch when the provider pauses; an error raised by the
+    callback from the timer is raised again by the next push or close.
+    """
+
+    def __init__(
+        self,
+        callback: StreamCallback,
+        window: float | None = None,
+        max_chars: int = STREAM_MAX_CHARS,
+        before: Callable[[], Awaitable[None]] | None = None,
+    ):
+        self.callback = callback
+        self.window = get_stream_window() if window is None else window
+        self.max_chars = max_chars
+        self.before = before  # awaited before each delivery, keeps another stream ahead of this one
+        self.batches = 0
+        self.chunks = 0
+        self._buffer: list[str] = []
+        self._size = 0
+        self._full = ""
+        self._last = 0.0
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task | None = None
+        self._error: Exception | None = None
+
+    async def push(self, chunk: str, full: str):
+        self._raise_error()
+        self.chunks += 1
+        self._buffer.append(chunk)
+        self._size += len(chunk)
+        self._full = full
+        wait = self.window - (time.monotonic() - self._last)
+        if wait <= 0 or self._size >= self.max_chars:
+            await self.flush()
+        elif not self._timer:
+            self._timer = asyncio.get_running_loop().call_later(wait, self._on_timer)
+
+    async def flush(self):
+        self._cancel_timer()
+        async with self._lock:
+            if not self._buffer:
+                return
+            if self.before:
+                await self.before()
+            chunk = "".join(self._buffer)
+            full = self._full
+            self._buffer.clear()
+            self._size = 0
+            self._last = time.monotonic()
+            self.batches += 1
+            await self.callback(chunk, full)
+
+    async def close(self):
+        # deliver what is left, the stream has ended
+        if self._task:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._raise_error()
+        await self.flush()
+
+    def cancel(self):
+        # drop what is left, the stream has failed
+        self._cancel_timer()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._buffer.clear()
+        self._size = 0
+
+    def _on_timer(self):
+        self._timer = None
+        self._task = asyncio.ensure_future(self._flush_from_timer())
+
+    async def _flush_from_timer(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            self._error = e
+
+    def _cancel_timer(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+    def _raise_error(self):
+        if self._error:
+            error, self._error = self._error, None
+            raise error
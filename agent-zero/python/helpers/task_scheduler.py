@@ -21,6 +21,7 @@ from python.helpers.persist_chat import save_tmp_chat
 from python.helpers.print_style import PrintStyle
 from python.helpers.defer import DeferredTask
 from python.helpers.files import get_abs_path, make_dirs, read_file, write_file
+from python.helpers import state_monitor
 from python.helpers.localization import Localization
 from python.helpers import projects
 import pytz
@@ -536,6 +537,7 @@ class SchedulerTaskList(BaseModel):
                         "ERROR: Null token persisted in JSON file for an adhoc task"
                     )
 
+        state_monitor.notify_change()
         return self
 
     async def update_task_by_uuid(
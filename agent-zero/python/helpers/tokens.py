@@ -1,30 +1,127 @@
-from typing import Literal
+import string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Literal, Sequence
 import tiktoken
 
 APPROX_BUFFER = 1.1
 TRIM_BUFFER = 0.8
+TOKEN_CACHE_SIZE = 4096  # token counts kept, keyed by encoding and content hash
+
+# "exact" encodes with tiktoken, "estimate" only counts byte classes and is meant for
+# accounting and display, where a few percent off does not matter
+TokenMode = Literal["exact", "estimate"]
+
+# tokens per byte class, fitted against tiktoken on the prompts and knowledge files
+# (tests/bench_tokens.py), the non-ASCII weight comes from CJK and Cyrillic samples
+ESTIMATE_WEIGHTS: dict[str, tuple[float, float, float, float, float]] = {
+    # letters and digits, whitespace, punctuation, pairs of spaces, non-ASCII bytes
+    "cl100k_base": (0.064, 0.735, 0.71, -1.351, 0.3),
+}
+
+_ALL_BYTES = bytes(range(256))
+_NOT_PUNCTUATION = bytes(b for b in _ALL_BYTES if chr(b) not in string.punctuation)
+_NOT_WHITESPACE = bytes(b for b in _ALL_BYTES if chr(b) not in string.whitespace)
+_ASCII = bytes(range(128))
+
+_cache: OrderedDict[tuple[str, int, int], int] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoding(encoding_name: str) -> tiktoken.Encoding:
+    return tiktoken.get_encoding(encoding_name)
 
 
 def count_tokens(text: str, encoding_name="cl100k_base") -> int:
     if not text:
         return 0
 
-    # Get the encoding
-    encoding = tiktoken.get_encoding(encoding_name)
+    # prompts repeat the same system segments and history messages on every call,
+    # the key holds a hash of the text, not the text itself
+    key = (encoding_name, len(text), hash(text))
+    with _cache_lock:
+        token_count = _cache.get(key)
+        if token_count is not None:
+            _cache.move_to_end(key)
+            return token_count
 
     # Encode the text and count the tokens
-    tokens = encoding.encode(text, disallowed_special=())
+    tokens = get_encoding(encoding_name).encode(text, disallowed_special=())
     token_count = len(tokens)
 
+    with _cache_lock:
+        _cache[key] = token_count
+        while len(_cache) > TOKEN_CACHE_SIZE:
+            _cache.popitem(last=False)
+
     return token_count
 
 
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def estimate_tokens(text: str, encoding_name="cl100k_base") -> int:
+    """Token count estimated from byte classes, without encoding the text."""
+    if not text:
+        return 0
+    alnum, space, punctuation, double_space, non_ascii = ESTIMATE_WEIGHTS.get(
+        encoding_name, ESTIMATE_WEIGHTS["cl100k_base"]
+    )
+    data = text.encode("utf-8", errors="replace")
+    spaces = len(data.translate(None, _NOT_WHITESPACE))
+    punctuations = len(data.translate(None, _NOT_PUNCTUATION))
+    high = len(data.translate(None, _ASCII))
+    estimate = (
+        alnum * (len(data) - spaces - punctuations - high)
+        + space * spaces
+        + punctuation * punctuations
+        + double_space * data.count(b"  ")
+        + non_ascii * high
+    )
+    return max(1, round(estimate))
+
+
 def approximate_tokens(
     text: str,
+    mode: TokenMode = "exact",
 ) -> int:
+    if mode == "estimate":
+        return int(estimate_tokens(text) * APPROX_BUFFER)
     return int(count_tokens(text) * APPROX_BUFFER)
 
 
+def approximate_content_tokens(content: Any, mode: TokenMode = "exact") -> int:
+    """Tokens of a message content, either text or a list of multimodal parts."""
+    if not content:
+        return 0
+    if isinstance(content, str):
+        return approximate_tokens(content, mode)
+    if isinstance(content, list):
+        return sum(
+            approximate_content_tokens(
+                part["text"] if isinstance(part, dict) and part.get("type") == "text" else part,
+                mode,
+            )
+            for part in content
+        )
+    return approximate_tokens(str(content), mode)
+
+
+def approximate_messages_tokens(messages: Sequence[Any], mode: TokenMode = "exact") -> int:
+    """Sum of the per message counts, for langchain messages or role/content dicts."""
+    return sum(
+        approximate_content_tokens(
+            message.get("content") if isinstance(message, dict) else message.content,
+            mode,
+        )
+        for message in messages
+    )
+
+
 def trim_to_tokens(
     text: str,
     max_tokens: int,
@@ -0,0 +1,77 @@
+import os
+import threading
+from python.helpers import extract_tools, files
+from python.helpers.print_style import PrintStyle
+from python.helpers.tool import Tool
+
+DEFAULT_TOOLS_FOLDER = "python/tools"
+
+# tool file path -> (mtime, size) of the loaded version and its tool class, None when it has none
+_classes: dict[str, tuple[tuple[int, int], type[Tool] | None]] = {}
+_lock = threading.RLock()
+
+
+def get_tool_folders(profile: str = "") -> list[str]:
+    """Folders searched for tools, agent profile tools first."""
+    folders = [DEFAULT_TOOLS_FOLDER]
+    if profile:
+        folders.insert(0, "agents/" + profile + "/tools")
+    return folders
+
+
+def get_tool_class(profile: str, name: str) -> type[Tool] | None:
+    """Tool class for a tool name of an agent profile, loaded once and reloaded only when its file changes."""
+    for folder in get_tool_folders(profile):
+        cls = _get_class(files.get_abs_path(folder, name + ".py"))
+        if cls:
+            return cls
+    return None
+
+
+def preload(profile: str = ""):
+    """Load all tools available to an agent profile, files that did not change are skipped."""
+    for folder in get_tool_folders(profile):
+        abs_folder = files.get_abs_path(folder)
+        if not os.path.isdir(abs_folder):
+            continue
+        for file_name in sorted(os.listdir(abs_folder)):
+            if file_name.endswith(".py"):
+                _get_class(os.path.join(abs_folder, file_name))
+
+
+def reload(profile: str | None = None):
+    """Forget loaded tools so they are imported again on next use, all of them or those of one profile."""
+    with _lock:
+        if profile is None:
+            _classes.clear()
+            return
+        for folder in get_tool_folders(profile):
+            prefix = os.path.join(files.get_abs_path(folder), "")
+            for path in [path for path in _classes if path.startswith(prefix)]:
+                del _classes[path]
+
+
+def _get_class(path: str) -> type[Tool] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _classes.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with _lock:
+        cached = _classes.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        try:
+            classes = extract_tools.load_classes_from_file(path, Tool)  # type: ignore[arg-type]
+        except Exception as e:
+            # remembered as well, a broken file is not executed again until it changes
+            PrintStyle.error(f"Failed to load tool {files.deabsolute_path(path)}: {e}")
+            classes = []
+        cls = classes[0] if classes else None
+        _classes[path] = (stamp, cls)
+        return cls
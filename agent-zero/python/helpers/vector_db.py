@@ -15,6 +15,8 @@ from langchain_community.vectorstores.utils import (
 )
 from langchain.embeddings import CacheBackedEmbeddings
 from simpleeval import simple_eval
+from python.helpers import embedding_cache
+from python.helpers.embedding_cache import CachedQueryEmbeddings
 
 from agent import Agent
 
@@ -34,13 +36,15 @@ class MyFaiss(FAISS):
 
 class VectorDB:
 
-    _cached_embeddings: dict[str, CacheBackedEmbeddings] = {}
+    _cached_embeddings: dict[str, CachedQueryEmbeddings] = {}
 
     @staticmethod
     def _get_embeddings(agent: Agent, cache: bool = True):
         model = agent.get_embedding_model()
+        model_id = embedding_cache.get_model_id(agent.config.embeddings_model)
         if not cache:
-            return model  # return raw embeddings if cache is False
+            # documents are not cached, queries still use the shared query cache
+            return CachedQueryEmbeddings(model, model_id)
         namespace = getattr(
             model,
             "model_name",
@@ -48,12 +52,13 @@ class VectorDB:
         )
         if namespace not in VectorDB._cached_embeddings:
             store = InMemoryByteStore()
-            VectorDB._cached_embeddings[namespace] = (
+            VectorDB._cached_embeddings[namespace] = CachedQueryEmbeddings(
                 CacheBackedEmbeddings.from_bytes_store(
                     model,
                     store,
                     namespace=namespace,
-                )
+                ),
+                model_id,
             )
         return VectorDB._cached_embeddings[namespace]
 
@@ -0,0 +1,66 @@
+"""
+Benchmark: per-chunk cost of parsing a streamed tool call response.
+
+Compares re-parsing the full accumulated text on every chunk (DirtyJson.parse_string)
+with the incremental DirtyJsonStream used by Agent.handle_response_stream.
+
+    python tests/bench_dirty_json_stream.py
+"""
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+from python.helpers.dirty_json import DirtyJson, DirtyJsonStream
+
+CHUNK_SIZE = 4  # roughly one token per streamed chunk
+FULL_PARSE_SAMPLES = 40  # full re-parse is quadratic, sample evenly spaced chunks only
+
+
+def build_response(size: int) -> str:
+    line = "The quick brown fox jumps over the lazy dog. \"Quoted\" text, tabs\tand unicode é.\n"
+    text = (line * (size // len(line) + 1))[:size]
+    return json.dumps(
+        {
+            "thoughts": ["Compose the final answer", "Use the response tool"],
+            "headline": "Responding to user",
+            "tool_name": "response",
+            "tool_args": {"text": text},
+        },
+        ensure_ascii=False,
+        indent=4,
+    )
+
+
+def bench(size: int):
+    response = build_response(size)
+    prefixes = [response[:end] for end in range(CHUNK_SIZE, len(response) + CHUNK_SIZE, CHUNK_SIZE)]
+
+    # full re-parse of every prefix, measured on a sample
+    step = max(1, len(prefixes) // FULL_PARSE_SAMPLES)
+    sample = prefixes[::step]
+    start = time.perf_counter()
+    for prefix in sample:
+        DirtyJson.parse_string(prefix)
+    full_per_chunk = (time.perf_counter() - start) / len(sample)
+
+    # incremental parse of every prefix
+    stream = DirtyJsonStream()
+    start = time.perf_counter()
+    for prefix in prefixes:
+        stream.update(prefix)
+        stream.snapshot()
+    incremental_per_chunk = (time.perf_counter() - start) / len(prefixes)
+
+    assert stream.snapshot() == DirtyJson.parse_string(response)
+    return len(response), len(prefixes), full_per_chunk, incremental_per_chunk
+
+
+if __name__ == "__main__":
+    print(f"{'chars':>8} {'chunks':>8} {'full/chunk':>12} {'stream/chunk':>13} {'speedup':>9}")
+    for size in (1_000, 10_000, 100_000):
+        chars, chunks, full, incremental = bench(size)
+        print(
+            f"{chars:>8} {chunks:>8} {full * 1e6:>10.1f}us {incremental * 1e6:>11.1f}us {full / incremental:>8.0f}x"
+        )
@@ -0,0 +1,72 @@
+"""
+Benchmark: startup cost of loading stored chats (persist_chat.load_tmp_chats).
+
+Writes CHATS chats of MESSAGES messages each to a temporary folder, loads them the way
+the UI does on startup and counts how many messages get tokenized while loading.
+Token counts stored in chat.json are trusted, so nothing should be tokenized; the eager
+time shows what tokenizing every message on load would cost.
+
+    python tests/bench_history_load.py
+"""
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import tempfile
+import time
+from agent import AgentContext
+from python.helpers import files, history, persist_chat
+
+CHATS = 200
+MESSAGES = 300
+
+
+def build_chat(no: int) -> dict:
+    hist = history.History(agent=None)
+    for i in range(MESSAGES):
+        text = f"Message {i} of chat {no}. " + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+        content = {"tool_name": "response", "tool_args": {"text": text}} if i % 2 else text
+        hist.add_message(ai=bool(i % 2), content=content)
+    return {
+        "id": f"bench{no:04d}",
+        "name": f"Chat {no}",
+        "agents": [{"number": 0, "data": {}, "history": hist.serialize()}],
+        "log": {"guid": f"log{no}", "logs": [], "progress": "", "progress_no": 0},
+    }
+
+
+def main():
+    folder = tempfile.mkdtemp(prefix="a0_bench_chats_")
+    for no in range(CHATS):
+        data = build_chat(no)
+        files.write_file(os.path.join(folder, data["id"], persist_chat.CHAT_FILE_NAME), json.dumps(data))
+
+    calls = 0
+    calculate_tokens = history.Message.calculate_tokens
+
+    def counting_calculate_tokens(self):
+        nonlocal calls
+        calls += 1
+        return calculate_tokens(self)
+
+    history.Message.calculate_tokens = counting_calculate_tokens  # type: ignore
+    persist_chat.CHATS_FOLDER = folder
+    start = time.perf_counter()
+    ctxids = persist_chat.load_tmp_chats()
+    load_time = time.perf_counter() - start
+
+    messages = [m for ctxid in ctxids for m in AgentContext.get(ctxid).agent0.history.current.messages]  # type: ignore
+    start = time.perf_counter()
+    for msg in messages:
+        calculate_tokens(msg)
+    eager_time = time.perf_counter() - start
+
+    print(f"loaded {len(ctxids)} chats, {len(messages)} messages")
+    print(f"load_tmp_chats:          {load_time:8.2f} s, {calls} messages tokenized")
+    print(f"eager tokenization adds: {eager_time:8.2f} s")
+    files.delete_dir(folder)
+
+
+if __name__ == "__main__":
+    main()
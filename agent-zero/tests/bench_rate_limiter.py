@@ -0,0 +1,123 @@
+"""
+Benchmark: 50 concurrent contexts calling one rate limited model.
+
+Each context runs on one of the context event loop shards, waits for the limiter like
+models.apply_rate_limiter does and then streams its output, adding tokens per delta.
+Compares the sliding window limiter with the previous one, which counted every request
+before waiting, rescanned its lists on each check and slept in steps of one second.
+
+    python tests/bench_rate_limiter.py
+"""
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+from python.helpers.defer import EventLoopShards
+from python.helpers.rate_limiter import RateLimiter
+
+CONTEXTS = 50
+SHARDS = 4
+WINDOW = 1.0  # seconds
+LIMIT_REQUESTS = 10
+INPUT_TOKENS = 2000
+OUTPUT_DELTAS = 200  # streamed deltas per response, one add each
+
+
+class PreviousRateLimiter:
+    # previous implementation, kept here for comparison
+    def __init__(self, seconds: float = 60, **limits: int):
+        self.timeframe = seconds
+        self.limits = limits
+        self.values: dict[str, list] = {key: [] for key in limits}
+        self._lock = threading.Lock()
+
+    def add(self, **kwargs: int):
+        now = time.time()
+        with self._lock:
+            for key, value in kwargs.items():
+                self.values.setdefault(key, []).append((now, value))
+
+    async def wait(self, callback=None):
+        while True:
+            with self._lock:
+                cutoff = time.time() - self.timeframe
+                for key in self.values:
+                    self.values[key] = [(t, v) for t, v in self.values[key] if t > cutoff]
+                exceeded = any(
+                    limit > 0 and sum(v for _, v in self.values[key]) > limit
+                    for key, limit in self.limits.items()
+                )
+            if not exceeded:
+                return
+            await asyncio.sleep(1)
+
+
+async def context_call(limiter, previous: bool, arrivals: list, admissions: list, n: int):
+    arrivals.append(n)
+    start = time.monotonic()
+    if previous:
+        limiter.add(input=INPUT_TOKENS)
+        limiter.add(requests=1)
+        await limiter.wait()
+    else:
+        await limiter.wait(input=INPUT_TOKENS, requests=1)
+    waited = time.monotonic() - start
+    admissions.append((n, time.monotonic()))
+
+    busy = 0.0
+    for _ in range(OUTPUT_DELTAS):
+        t = time.perf_counter()
+        limiter.add(output=3)
+        busy += time.perf_counter() - t
+        if _ % 20 == 0:
+            await asyncio.sleep(0)
+    return waited, busy
+
+
+def run(limiter, previous: bool):
+    shards = EventLoopShards(f"bench-limiter-{previous}", SHARDS)
+    arrivals: list[int] = []
+    admissions: list[tuple[int, float]] = []
+    start = time.monotonic()
+    futures = []
+    for n in range(CONTEXTS):
+        thread = shards.place()
+        futures.append(thread.run_coroutine(context_call(limiter, previous, arrivals, admissions, n)))
+        time.sleep(0.002)
+    results = [future.result() for future in futures]
+    elapsed = time.monotonic() - start
+    for thread in shards.get_threads():
+        thread.terminate()
+
+    waits = sorted(waited for waited, _ in results)
+    add_us = sum(busy for _, busy in results) / (CONTEXTS * OUTPUT_DELTAS) * 1e6
+    in_order = sum(1 for a, (b, _) in zip(arrivals, admissions) if a == b)
+    # most requests started within any one window, the limit allows LIMIT_REQUESTS
+    times = sorted(t for _, t in admissions)
+    peak = max(sum(1 for u in times[i:] if u - t < WINDOW) for i, t in enumerate(times))
+    ideal = (CONTEXTS / LIMIT_REQUESTS - 1) * WINDOW
+    return elapsed, ideal, waits[len(waits) // 2], waits[-1], add_us, in_order, peak
+
+
+def main():
+    print(f"{CONTEXTS} contexts, {LIMIT_REQUESTS} requests per {WINDOW:g} s window, {SHARDS} loop shards")
+    print(
+        f"{'limiter':<16} {'total s':>8} {'ideal s':>8} {'p50 wait':>9} {'max wait':>9}"
+        f" {'add us':>7} {'FIFO':>6} {'peak/window':>12}"
+    )
+    for name, previous, limiter in (
+        ("previous", True, PreviousRateLimiter(seconds=WINDOW, requests=LIMIT_REQUESTS)),  # type: ignore
+        ("sliding window", False, RateLimiter(seconds=WINDOW, requests=LIMIT_REQUESTS)),  # type: ignore
+    ):
+        elapsed, ideal, p50, worst, add_us, in_order, peak = run(limiter, previous)
+        print(
+            f"{name:<16} {elapsed:>8.2f} {ideal:>8.2f} {p50:>9.2f} {worst:>9.2f}"
+            f" {add_us:>7.2f} {in_order:>3}/{CONTEXTS} {peak:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
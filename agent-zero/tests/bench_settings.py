@@ -0,0 +1,51 @@
+"""
+Benchmark: settings.get_settings() calls per second.
+
+Compares the cached snapshot with normalizing on every call (the previous behaviour,
+which also resolved the git version and hashed the auth token each time).
+
+    python tests/bench_settings.py
+"""
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from python.helpers import settings, git
+
+DURATION = 1.0
+
+
+def uncached_get_settings():
+    # previous implementation: normalize on every call, version from git every time
+    return settings.normalize_settings(settings._settings)  # type: ignore
+
+
+def rate(func) -> float:
+    calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < DURATION:
+        func()
+        calls += 1
+    return calls / elapsed
+
+
+def main():
+    settings.get_settings()
+    cached = rate(settings.get_settings)
+
+    _version = settings._get_version
+    settings._get_version = git.get_version  # type: ignore
+    try:
+        uncached = rate(uncached_get_settings)
+    finally:
+        settings._get_version = _version  # type: ignore
+
+    print(f"{'get_settings()':<20} {'calls/s':>14}")
+    print(f"{'normalize per call':<20} {uncached:>14,.0f}")
+    print(f"{'snapshot':<20} {cached:>14,.0f}")
+    print(f"speedup: {cached / uncached:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
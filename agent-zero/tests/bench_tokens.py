@@ -0,0 +1,73 @@
+"""
+Benchmark: accuracy and speed of the token estimator against tiktoken.
+
+Counts the repo's prompts and knowledge files, whole and split into message sized chunks,
+with tokens.count_tokens (cache cleared, so every text is encoded) and tokens.estimate_tokens.
+Errors are relative to the exact count, per text and over the whole corpus.
+
+    python tests/bench_tokens.py
+"""
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import time
+import litellm  # points tiktoken at the encodings bundled with litellm, as models.py does
+from python.helpers import tokens
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATTERNS = ("prompts/**/*.md", "knowledge/**/*.md")
+CHUNKS = (200, 2000, None)  # characters per text, None for whole files
+ROUNDS = 5
+
+
+def load_texts() -> list[str]:
+    texts = []
+    for pattern in PATTERNS:
+        for path in sorted(glob.glob(os.path.join(ROOT, pattern), recursive=True)):
+            with open(path, encoding="utf-8") as file:
+                text = file.read()
+            if text.strip():
+                texts.append(text)
+    return texts
+
+
+def split(texts: list[str], size: int | None) -> list[str]:
+    if size is None:
+        return texts
+    return [text[i : i + size] for text in texts for i in range(0, len(text), size)]
+
+
+def timed(count, texts: list[str]) -> tuple[float, list[int]]:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        tokens.clear_cache()
+        start = time.perf_counter()
+        counts = [count(text) for text in texts]
+        best = min(best, time.perf_counter() - start)
+    return best, counts
+
+
+def main():
+    texts = load_texts()
+    print(f"{len(texts)} files, {sum(len(t) for t in texts)} characters")
+    print(
+        f"{'chunk':>6} {'texts':>6} {'exact ms':>9} {'est. ms':>8} {'speedup':>8}"
+        f" {'mean err':>9} {'p95 err':>8} {'total err':>10}"
+    )
+    for size in CHUNKS:
+        chunks = split(texts, size)
+        exact_s, exact = timed(tokens.count_tokens, chunks)
+        estimate_s, estimate = timed(tokens.estimate_tokens, chunks)
+        errors = sorted(abs(e - x) / max(x, 1) for e, x in zip(estimate, exact))
+        total = sum(estimate) / sum(exact) - 1
+        print(
+            f"{size or 'file':>6} {len(chunks):>6} {exact_s * 1000:>9.2f} {estimate_s * 1000:>8.2f}"
+            f" {exact_s / estimate_s:>7.1f}x {sum(errors) / len(errors):>8.1%}"
+            f" {errors[int(len(errors) * 0.95)]:>8.1%} {total:>+10.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from python.helpers import persist_chat
+
+
+def message(text: str, ai: bool = False):
+    return {"_cls": "Message", "ai": ai, "content": text, "summary": "", "tokens": 0}
+
+
+def history_dict(*messages):
+    return {
+        "_cls": "History",
+        "counter": len(messages),
+        "bulks": [],
+        "topics": [],
+        "current": {"_cls": "Topic", "summary": "", "messages": list(messages)},
+    }
+
+
+def snapshot():
+    return {
+        "id": "chat",
+        "name": "before",
+        "journal": "gen-1",
+        "agents": [{"number": 0, "data": {}, "history": json.dumps(history_dict(message("hi")))}],
+        "log": {
+            "guid": "log",
+            "logs": [{"no": 0, "type": "user", "content": "hi"}],
+            "progress": "",
+            "progress_no": 0,
+        },
+    }
+
+
+def write_journal(path, *records):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+
+
+def test_replay(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_journal(
+        path,
+        {"journal": "gen-1"},
+        {"op": "messages", "agent": 0, "counter": 2, "messages": [message("hello", True)]},
+        {"op": "meta", "name": "after", "agents": [{"number": 0, "data": {}}, {"number": 1, "data": {}}]},
+        {"op": "history", "agent": 1, "history": history_dict(message("task"))},
+        {"op": "log", "logs": [{"no": 0, "type": "user", "content": "hi!"}, {"no": 1, "type": "agent"}],
+         "progress": "done", "progress_no": 1},
+    )
+    data = snapshot()
+    persist_chat._replay_journal(data, path)
+
+    assert data["name"] == "after"
+    assert [m["content"] for m in data["agents"][0]["history"]["current"]["messages"]] == ["hi", "hello"]
+    assert data["agents"][1]["history"]["current"]["messages"][0]["content"] == "task"
+    assert [item["no"] for item in data["log"]["logs"]] == [0, 1]
+    assert data["log"]["logs"][0]["content"] == "hi!"
+    assert data["log"]["progress"] == "done"
+
+
+def test_replay_skips_stale_and_torn(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    write_journal(path, {"journal": "gen-0"}, {"op": "meta", "name": "stale", "agents": []})
+    data = snapshot()
+    persist_chat._replay_journal(data, path)
+    assert data["name"] == "before" and len(data["agents"]) == 1
+
+    write_journal(path, {"journal": "gen-1"}, {"op": "meta", "name": "after", "agents": [{"number": 0, "data": {}}]})
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "meta", "name": "to')
+    data = snapshot()
+    persist_chat._replay_journal(data, path)
+    assert data["name"] == "after"
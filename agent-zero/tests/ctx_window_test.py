@@ -0,0 +1,45 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from agent import ContextWindow
+from python.api.ctx_window_get import GetCtxWindow
+
+
+class FakeAgent:
+    DATA_NAME_CTX_WINDOW = "_ctx_window"
+
+    def __init__(self, data):
+        self.data = data
+
+    def get_data(self, name):
+        return self.data.get(name)
+
+
+class FakeContext:
+    def __init__(self, agent):
+        self.streaming_agent = None
+        self.agent0 = agent
+
+
+def get_window(data) -> dict:
+    handler = GetCtxWindow.__new__(GetCtxWindow)
+    handler.use_context = lambda ctxid: FakeContext(FakeAgent(data))  # type: ignore
+    return asyncio.run(handler.process({"context": "x"}, None))  # type: ignore
+
+
+def test_rendered_on_request():
+    messages = [
+        SystemMessage(content="You are {agent}."),
+        HumanMessage(content="hi"),
+        AIMessage(content='{"tool_name": "response"}'),
+    ]
+    window = ContextWindow(messages=tuple(messages), tokens=12, system_tokens=5)
+    assert get_window({"_ctx_window": window}) == {
+        "content": 'System: You are {agent}.\nHuman: hi\nAI: {"tool_name": "response"}',
+        "tokens": 12,
+    }
+    # chats saved before keep the rendered text
+    assert get_window({"ctx_window": {"text": "old", "tokens": 3}}) == {"content": "old", "tokens": 3}
+    assert get_window({}) == {"content": "", "tokens": 0}
@@ -0,0 +1,49 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import pytest
+from python.helpers.dirty_json import DirtyJson, DirtyJsonStream
+
+examples = [
+    '{"thoughts": ["one", "two \\"q\\" \\u00e9"], "headline": "Hi", "tool_name": "response", "tool_args": {"text": "line\\nline2 \\\\ end", "n": -12.5e3, "b": true, "z": null}}',
+    'Sure: {"a": 1, b: \'single\', "c": """multi\nline""", // comment\n "d": [true, false, undefined], "e": {"f": {"g": "h"}}} trailing',
+    '{"tool_name":"x","tool_args":{"k":[{"a":"b"},{"c":"d"}, ],"e":""}}',
+    '[1, 2, "three", {"four": 4}]',
+]
+
+
+@pytest.mark.parametrize("example", examples)
+def test_stream_matches_full_parse(example: str):
+    rnd = random.Random(example)
+    for _ in range(50):
+        stream = DirtyJsonStream()
+        end = 0
+        while end < len(example):
+            end += rnd.randint(1, 8)
+            try:
+                stream.update(example[:end])
+            except ValueError:
+                continue  # incomplete number, same as parse_string
+            expected = DirtyJson.parse_string(example[:end])
+            if isinstance(expected, dict):
+                assert stream.snapshot() == expected
+        assert stream.snapshot() == DirtyJson.parse_string(example)
+
+
+def test_stream_restarts_on_rewritten_text():
+    stream = DirtyJsonStream()
+    stream.update('{"text": "my key is sk-12')
+    result = stream.update('{"text": "my key is ***", "done": true}')
+    assert result == {"text": "my key is ***", "done": True}
+
+
+@pytest.mark.parametrize("example", examples)
+def test_feed(example: str):
+    parser = DirtyJson()
+    for char in example:
+        try:
+            parser.feed(char)
+        except ValueError:
+            pass
+    assert parser.result == DirtyJson.parse_string(example)
@@ -0,0 +1,62 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from python.helpers import embedding_cache
+from python.helpers.embedding_cache import CachedQueryEmbeddings, QueryEmbeddingCache
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries: list[str] = []
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self._vector(text)
+
+    def _vector(self, text):
+        return [float(len(text)), 1.0, float(text.count("a"))]
+
+
+def test_lru_and_metrics():
+    cache = QueryEmbeddingCache(size=2)
+    cache.put("m", "one", [1.0])
+    cache.put("m", "two", [2.0])
+    assert cache.get("m", "  one ") == [1.0]  # normalized text, now most recent
+    cache.put("m", "three", [3.0])
+    assert cache.get("m", "two") is None
+    assert cache.get("other", "one") is None
+    assert cache.get_metrics() == {
+        "size": 2, "max_size": 2, "hits": 1, "misses": 2, "evictions": 1, "hit_rate": 1 / 3
+    }
+
+
+def test_searches_embed_query_once(monkeypatch):
+    monkeypatch.setattr(embedding_cache, "_cache", QueryEmbeddingCache())
+    model = CountingEmbeddings()
+    embedder = CachedQueryEmbeddings(model, "test-model")
+    db = FAISS(
+        embedding_function=embedder,
+        index=faiss.IndexFlatIP(3),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+    db.add_documents([Document("banana"), Document("apple pie")], ids=["a", "b"])
+
+    async def run():
+        first = await db.asimilarity_search("what about  bananas", k=1)
+        second = await db.asimilarity_search("what about bananas", k=1)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first[0].page_content == second[0].page_content
+    assert model.queries == ["what about bananas"]
+    assert embedding_cache.get_metrics()["hits"] == 1
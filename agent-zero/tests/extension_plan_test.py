@@ -0,0 +1,47 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from python.helpers import extension
+
+EXTENSION = """
+from python.helpers.extension import Extension
+
+class {name}(Extension):
+    async def execute(self, calls=None, **kwargs):
+        calls.append("{label}")
+"""
+
+
+class FakeAgent:
+    def __init__(self, profile):
+        self.config = type("Config", (), {"profile": profile})()
+
+
+def test_plan_and_timings(tmp_path, monkeypatch):
+    base = tmp_path
+    point = "test_point"
+    for folder, file, label in [
+        ("python/extensions", "_10_a.py", "default a"),
+        ("python/extensions", "_20_b.py", "default b"),
+        ("agents/custom/extensions", "_20_b.py", "custom b"),
+    ]:
+        os.makedirs(base / folder / point, exist_ok=True)
+        (base / folder / point / file).write_text(EXTENSION.format(name="Ext" + file[4], label=label))
+    monkeypatch.setattr(extension.files, "get_abs_path", lambda *p: os.path.join(str(base), *p))
+    extension.clear_cache()
+
+    exists = []
+    monkeypatch.setattr(extension.files, "exists", lambda *p: exists.append(p) or os.path.exists(*p))
+
+    calls = []
+    for profile in ["", "custom", "missing", "missing"]:
+        asyncio.run(extension.call_extensions(point, agent=FakeAgent(profile), calls=calls))  # type: ignore
+    assert calls == ["default a", "default b", "default a", "custom b"] + ["default a", "default b"] * 2
+    assert len(exists) == 3  # the missing profile folder is looked up once
+
+    timings = {t["extension"]: t for t in extension.get_timings() if t["extension_point"] == point}
+    assert timings["_10_a"]["calls"] == 4 and timings["_20_b"]["calls"] == 4
+    extension.reset_timings()
+    assert all(t["calls"] == 0 for t in extension.get_timings())
+    extension.clear_cache()
@@ -0,0 +1,164 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from types import SimpleNamespace
+from python.helpers import history
+
+
+class FakeAgent:
+    def __init__(self, limit_requests: int = 0):
+        self.config = SimpleNamespace(utility_model=SimpleNamespace(limit_requests=limit_requests))
+        self.hist: history.History | None = None
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+
+    def read_prompt(self, file, **kwargs):
+        return f"{file} {kwargs}"
+
+    def parse_prompt(self, file, **kwargs):
+        return f"summary: {kwargs['summary']}"
+
+    async def call_utility_model(self, system, message, **kwargs):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.calls += 1
+        assert self.hist
+        summaries = [t.summary for t in self.hist.topics]
+        await asyncio.sleep(0.05)
+        assert [t.summary for t in self.hist.topics] == summaries  # applied together
+        self.running -= 1
+        return f"short summary {self.calls}"
+
+
+def make_history(agent: FakeAgent, monkeypatch) -> history.History:
+    monkeypatch.setattr(history, "_get_ctx_size_for_history", lambda: 1000)
+    hist = agent.hist = history.History(agent=agent)
+    for _ in range(4):
+        hist.add_message(ai=False, content="question", tokens=400)
+        hist.add_message(ai=True, content="answer", tokens=400)
+        hist.new_topic()
+    hist.add_message(ai=False, content="current", tokens=10)
+    return hist
+
+
+def test_topics_summarized_concurrently(monkeypatch):
+    agent = FakeAgent()
+    hist = make_history(agent, monkeypatch)
+    assert asyncio.run(hist.compress())
+
+    assert agent.calls == 4 and agent.max_running == 4  # one round
+    assert len(hist.topics) == 1 and hist.topics[0].summary
+    assert len(hist.bulks) == 3 and all(b.summary for b in hist.bulks)
+    assert hist.get_tokens() < 1000
+    assert not asyncio.run(hist.compress())
+
+
+def test_concurrency_follows_rate_limit(monkeypatch):
+    agent = FakeAgent(limit_requests=2)
+    hist = make_history(agent, monkeypatch)
+    asyncio.run(hist.compress())
+    assert agent.calls == 4 and agent.max_running == 2
+
+
+def test_failed_summary_applies_nothing(monkeypatch):
+    agent = FakeAgent()
+    hist = make_history(agent, monkeypatch)
+
+    async def failing(system, message, **kwargs):
+        if "question" in message:
+            raise RuntimeError("utility model down")
+        return "summary"
+
+    agent.call_utility_model = failing  # type: ignore
+    try:
+        asyncio.run(hist.compress())
+        assert False
+    except RuntimeError:
+        pass
+    assert not any(t.summary for t in hist.topics) and not hist.bulks
+
+
+def test_proactive_compression_avoids_wait(monkeypatch):
+    import agent  # loads before the extensions, which import it
+    from python.extensions.message_loop_end._10_organize_history import start_compression
+    from python.extensions.message_loop_prompts_before._90_organize_history_wait import (
+        OrganizeHistoryWait,
+    )
+
+    fake = FakeAgent()
+    fake.data = {}  # type: ignore
+    fake.get_data = fake.data.get  # type: ignore
+    fake.set_data = fake.data.__setitem__  # type: ignore
+    monkeypatch.setattr(history, "_compress_counters", dict.fromkeys(history._compress_counters, 0))
+    monkeypatch.setattr(history, "_get_ctx_size_for_history", lambda: 4000)
+    hist = fake.history = fake.hist = history.History(agent=fake)  # type: ignore
+    for _ in range(3):
+        hist.add_message(ai=False, content="question", tokens=600)
+        hist.add_message(ai=True, content="answer", tokens=600)
+        hist.new_topic()
+    assert not hist.is_over_limit() and hist.is_over_low_watermark()
+
+    async def compress_then_prompt(added_tokens: int):
+        start_compression(fake, proactive=True)  # type: ignore
+        await fake.data["_organize_history_task"]
+        assert hist.get_tokens() <= history.get_low_watermark()
+        if added_tokens:
+            hist.add_message(ai=False, content="tool result", tokens=added_tokens)
+        await OrganizeHistoryWait(agent=fake).execute()  # type: ignore
+
+    # would not have reached the limit without the compression either
+    asyncio.run(compress_then_prompt(0))
+    assert history.get_compress_metrics() == {"proactive": 1, "waits": 0, "waits_avoided": 0}
+
+    # grew past the limit meanwhile, the prompt would have waited without the compression
+    for _ in range(3):
+        hist.add_message(ai=False, content="question", tokens=600)
+        hist.add_message(ai=True, content="answer", tokens=600)
+        hist.new_topic()
+    assert not hist.is_over_limit()
+    asyncio.run(compress_then_prompt(1500))
+    assert history.get_compress_metrics() == {"proactive": 2, "waits": 0, "waits_avoided": 1}
+
+
+def test_wait_for_compression_from_another_loop(monkeypatch):
+    import agent  # loads before the extensions, which import it
+    from python.extensions.message_loop_end._10_organize_history import start_compression
+    from python.extensions.message_loop_prompts_before._90_organize_history_wait import (
+        OrganizeHistoryWait,
+    )
+    from python.helpers.defer import DeferredTask, EventLoopShards
+
+    fake = FakeAgent()
+    fake.data = {}  # type: ignore
+    fake.get_data = fake.data.get  # type: ignore
+    fake.set_data = fake.data.__setitem__  # type: ignore
+    progress = []
+    fake.context = SimpleNamespace(log=SimpleNamespace(set_progress=progress.append))  # type: ignore
+    monkeypatch.setattr(history, "_compress_counters", dict.fromkeys(history._compress_counters, 0))
+    monkeypatch.setattr(history, "_get_ctx_size_for_history", lambda: 4000)
+    hist = fake.history = fake.hist = history.History(agent=fake)  # type: ignore
+    for _ in range(3):
+        hist.add_message(ai=False, content="question", tokens=600)
+        hist.add_message(ai=True, content="answer", tokens=600)
+        hist.new_topic()
+
+    # the monologue ends on one loop, the context then runs its next one on another loop
+    shards = EventLoopShards("CompressTest", 2)
+    first, second = shards.get_threads()
+
+    async def end_monologue():
+        start_compression(fake, proactive=True)  # type: ignore
+        hist.add_message(ai=False, content="tool result", tokens=1500)
+
+    DeferredTask(thread_name=first.thread_name).start_task(end_monologue).result_sync()
+    task = fake.data["_organize_history_task"]
+    assert not task.done() and hist.is_over_limit()
+
+    wait = OrganizeHistoryWait(agent=fake)  # type: ignore
+    DeferredTask(thread_name=second.thread_name).start_task(wait.execute).result_sync(timeout=5)
+    assert task.done() and not task.cancelled() and not task.exception()
+    assert progress == ["Compressing history..."]
+    assert not hist.is_over_limit()
+    assert history.get_compress_metrics()["waits"] == 1
@@ -0,0 +1,79 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+from types import SimpleNamespace
+from python.helpers import history
+
+
+class FakeAgent:
+    config = SimpleNamespace(utility_model=SimpleNamespace(limit_requests=0))
+
+    def read_prompt(self, file, **kwargs):
+        return file
+
+    def parse_prompt(self, file, **kwargs):
+        return f"summary: {kwargs.get('summary')}"
+
+    async def call_utility_model(self, system, message):
+        return "summarized"
+
+
+def uncached(hist: history.History):
+    output = [m for b in hist.bulks for m in b.output()]
+    output += [m for t in hist.topics for m in t.output()]
+    output += hist.current.output()
+    tokens = sum(r.get_tokens() for r in [*hist.bulks, *hist.topics, hist.current])
+    return output, tokens
+
+
+def assert_cache_valid(hist: history.History):
+    output, tokens = uncached(hist)
+    assert hist.output() == output
+    assert hist.get_tokens() == tokens
+    assert [(type(m), m.content) for m in hist.output_langchain()] == [
+        (type(m), m.content) for m in history.output_langchain(output)
+    ]
+
+
+def test_output_follows_changes(monkeypatch):
+    hist = history.History(agent=FakeAgent())
+    for i in range(5):
+        hist.add_message(ai=bool(i % 3), content=f"message {i}")
+        assert_cache_valid(hist)
+
+    # callers may edit the returned list
+    hist.output().append({"ai": False, "content": "extra"})
+    assert_cache_valid(hist)
+
+    hist.new_topic()
+    hist.add_message(ai=False, content={"tool_name": "x", "tool_args": {"a": 1}})
+    assert_cache_valid(hist)
+
+    monkeypatch.setattr(history, "_get_ctx_size_for_history", lambda: 10)
+    assert asyncio.run(hist.compress())
+    assert_cache_valid(hist)
+
+    hist.add_message(ai=True, content="after compression")
+    assert_cache_valid(hist)
+
+    hist.current.messages[0].set_summary("changed outside of History")
+    hist.invalidate()
+    assert_cache_valid(hist)
+
+    loaded = history.deserialize_history(hist.serialize(), agent=FakeAgent())
+    assert loaded.output() == hist.output()
+
+
+def test_output_incremental(monkeypatch):
+    hist = history.History(agent=None)
+    for i in range(10):
+        hist.add_message(ai=bool(i % 2), content=f"message {i}")
+    hist.output_langchain()
+
+    converted = []
+    convert = history.output_langchain
+    monkeypatch.setattr(history, "output_langchain", lambda msgs: converted.append(len(msgs)) or convert(msgs))
+    hist.add_message(ai=False, content="new")
+    assert len(hist.output_langchain()) == 11
+    assert converted == [1]
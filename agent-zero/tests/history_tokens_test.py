@@ -0,0 +1,34 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python.helpers import history
+
+
+def test_tokens_trusted_from_disk(monkeypatch):
+    hist = history.History(agent=None)
+    hist.add_message(ai=False, content="hello there")
+    hist.add_message(ai=True, content={"tool_name": "response", "tool_args": {"text": "hi"}})
+    hist.new_topic()
+    hist.topics[0].summary = "greetings exchanged"
+    data = hist.serialize()
+
+    calls = []
+    monkeypatch.setattr(history.tokens, "approximate_tokens", lambda text: calls.append(text) or 7)
+    loaded = history.deserialize_history(data, agent=None)
+    assert loaded.get_tokens() == hist.get_tokens()
+    assert calls == []
+
+
+def test_tokens_recalculated_on_change():
+    msg = history.Message(ai=False, content="short")
+    before = msg.get_tokens()
+    msg.content = "a much longer content " * 20
+    assert msg.get_tokens() > before
+    msg.set_summary("tiny")
+    assert msg.get_tokens() < before * 5
+
+    topic = history.Topic(history=None)  # type: ignore
+    topic.summary = "one"
+    one = topic.get_tokens()
+    topic.summary = "one two three four five six seven eight"
+    assert topic.get_tokens() > one
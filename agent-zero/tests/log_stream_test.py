@@ -0,0 +1,115 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import random
+import pytest
+from python.helpers import files  # loads before strings, which imports it
+from python.helpers import log as log_module
+from python.helpers.secrets import SecretMasker
+
+secrets = {"sk-live-4f9a8b7c6d5e": "API_KEY", "hunter2hunter2": "PASSWORD"}
+text = "use sk-live-4f9a8b7c6d5e with hunter2hunter2, then again sk-live-4f9a8b7c6d5e. " * 20
+
+
+@pytest.fixture
+def log(monkeypatch):
+    masker = SecretMasker(secrets)
+    monkeypatch.setattr(log_module.Log, "_get_masker", lambda self: masker)
+    return log_module.Log()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_append_masks_incrementally(log, seed):
+    rnd = random.Random(seed)
+    masker = log._get_masker()
+    item = log.log(type="agent", heading="streaming")
+    pos = 0
+    while pos < len(text):
+        size = rnd.randint(1, 12)
+        item.append(content=text[pos : pos + size], reasoning=text[pos : pos + size])
+        pos += size
+        assert item.content == masker.mask(text[:pos])
+    assert item.kvps and item.kvps["reasoning"] == item.content
+    assert "hunter2" not in item.content
+
+
+def test_update_stream(log):
+    item = log.log(type="response")
+    item.update_stream(content="hello hunter2")
+    item.update_stream(content="hello hunter2hunter2 world")
+    assert item.content == "hello §§secret(PASSWORD) world"
+    item.update_stream(content="replaced")
+    assert item.content == "replaced"
+
+    # a field set as a whole is continued from its new value
+    item.update(content="new ")
+    item.append(content="text")
+    assert item.content == "new text"
+
+
+def test_versions(log):
+    first = log.log(type="agent")
+    for i in range(100):
+        first.append(content=str(i))
+    assert log.get_version() == 101
+    assert len(log._versions) == 1  # one entry per item, not per update
+
+    version = log.get_version()
+    assert log.output(start=version) == []
+    second = log.log(type="agent", content="x")
+    first.append(content="!")
+    assert [item["no"] for item in log.output(start=version)] == [0, 1]
+    assert log.output(start=version)[0]["content"].endswith("99!")
+    assert [item["no"] for item in log.output(start=version, end=version + 1)] == [1]
+
+    log.reset()
+    assert log.get_version() == 0 and log.output() == []
+
+
+def test_kvps_are_copied(log):
+    kvps = {"args": {"items": [1, 2]}, "name": "tool"}
+    item = log.log(type="tool", kvps=kvps)
+    assert item.kvps == kvps
+    item.kvps["args"]["items"].append(3)
+    assert kvps["args"]["items"] == [1, 2]
+
+
+def test_log_from_stream_extension(log):
+    import agent  # loads before the extensions, which import it
+    from python.extensions.response_stream._10_log_from_stream import LogFromStream
+    from python.helpers.dirty_json import DirtyJsonStream
+
+    class FakeAgent:
+        agent_name = "A0"
+        context = type("FakeContext", (), {"log": log})
+
+    loop_data = agent.LoopData()
+    item = log.log(type="agent")
+    loop_data.params_temporary["log_item_generating"] = item
+    item.update_stream(reasoning="checking hunter2hunter2")
+    reasoning = item.kvps["reasoning"]  # type: ignore
+
+    response = (
+        '{"thoughts": ["the key is sk-live-4f9a8b7c6d5e", "answer now"], "headline": "Answering",'
+        ' "tool_name": "response", "tool_args": {"text": "' + "done with hunter2hunter2. " * 40 + '"}}'
+    )
+    parser = DirtyJsonStream()
+    extension = LogFromStream(agent=FakeAgent())  # type: ignore
+    streams = log._streams[item.no]
+    for pos in range(25, len(response), 3):  # the agent skips shorter streams
+        parser.update(response[: pos + 3])
+        parsed = parser.snapshot() or {}
+        asyncio.run(extension.execute(loop_data=loop_data, text=response[: pos + 3], parsed=parsed))
+        # reasoning keeps its stream state, parsed text is continued where it grew
+        assert streams[("kvps", "reasoning")].raw == "checking hunter2hunter2"
+
+    kvps = item.kvps or {}
+    assert list(kvps) == ["reasoning", "thoughts", "headline", "tool_name", "tool_args"]
+    assert list(kvps["tool_args"]) == ["text"]
+    assert all(key[1] in kvps for key in streams if isinstance(key, tuple))
+    assert kvps["reasoning"] is reasoning
+    assert kvps["thoughts"] == ["the key is §§secret(API_KEY)", "answer now"]
+    assert kvps["tool_args"]["text"] == "done with §§secret(PASSWORD). " * 40
+    assert item.content == log._get_masker().mask(response)
+    assert item.heading.endswith("A0: Answering")
@@ -0,0 +1,91 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from python.helpers import defer
+from python.helpers.defer import DeferredTask, EventLoopShards
+
+
+def wait_for(condition, timeout=3.0):
+    start = time.time()
+    while not condition():
+        assert time.time() - start < timeout
+        time.sleep(0.01)
+
+
+def test_busy_shard_does_not_stall_others(monkeypatch):
+    monkeypatch.setattr(defer, "LAG_PROBE_INTERVAL", 0.05)
+    shards = EventLoopShards("ShardTest", 2)
+    ticks = []
+
+    async def block():
+        time.sleep(0.5)  # CPU bound step holding its loop
+
+    async def tick():
+        for _ in range(5):
+            ticks.append(time.time())
+            await asyncio.sleep(0.02)
+
+    busy = DeferredTask(thread_name=shards.place().thread_name).start_task(block)
+    assert busy.event_loop_thread.active == 1
+    other = DeferredTask(thread_name=shards.place().thread_name).start_task(tick)
+    assert other.event_loop_thread is not busy.event_loop_thread
+
+    other.result_sync(timeout=0.4)  # finishes while the busy loop is still blocked
+    assert len(ticks) == 5
+    busy.result_sync()
+    wait_for(lambda: busy.event_loop_thread.max_lag > 0.3)
+    assert {m["name"] for m in shards.get_metrics()} == {"ShardTest-0", "ShardTest-1"}
+
+
+def test_kill_and_restart_on_shard():
+    shards = EventLoopShards("KillTest", 2)
+    started = []
+
+    async def forever():
+        started.append(1)
+        await asyncio.sleep(60)
+
+    task = DeferredTask(thread_name=shards.place().thread_name).start_task(forever)
+    wait_for(lambda: started)
+    assert task.is_running()
+    task.kill()
+    wait_for(lambda: not task.is_running())
+    wait_for(lambda: task.event_loop_thread.active == 0)
+
+    task.start_task(forever)
+    wait_for(lambda: len(started) == 2)
+    task.kill()
+
+
+def test_context_with_pending_tasks_stays_on_its_loop(monkeypatch):
+    from types import SimpleNamespace
+    from agent import AgentContext
+
+    shards = EventLoopShards("MoveTest", 2)
+    monkeypatch.setattr(AgentContext, "get_loop_shards", classmethod(lambda cls: shards))
+    agent0 = SimpleNamespace(data={})
+    context = AgentContext(config=None, agent0=agent0)  # type: ignore
+    release = asyncio.Event()
+
+    async def leave_task():
+        # like a compression started at the end of a monologue that outlives it
+        agent0.data["_task"] = asyncio.create_task(release.wait())
+
+    try:
+        context.run_task(leave_task).result_sync()
+        first = context.task.event_loop_thread  # type: ignore
+        # keep the first loop busy, so an idle context would move to the other one
+        busy = DeferredTask(thread_name=first.thread_name).start_task(asyncio.sleep, 0.5)
+
+        context.run_task(asyncio.sleep, 0).result_sync()
+        assert context.task.event_loop_thread is first  # type: ignore
+
+        first.loop.call_soon_threadsafe(release.set)
+        wait_for(lambda: agent0.data["_task"].done())
+        context.run_task(asyncio.sleep, 0).result_sync()
+        assert context.task.event_loop_thread is not first  # type: ignore
+        busy.result_sync()
+    finally:
+        AgentContext.remove(context.id)
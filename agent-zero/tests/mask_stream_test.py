@@ -0,0 +1,54 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import agent  # loads before the extensions, which import it
+from python.extensions.reasoning_stream_chunk import _10_mask_stream as reasoning_mask
+from python.extensions.response_stream_chunk import _10_mask_stream as response_mask
+from python.helpers.secrets import StreamingSecretsFilter, alias_for_key
+
+SECRETS = {"API_KEY": "sk-live-4f9a8b7c6d5e"}
+
+
+class FakeSecretsManager:
+    def create_streaming_filter(self):
+        return StreamingSecretsFilter(SECRETS)
+
+
+class FakeAgent:
+    context = None
+
+    def __init__(self):
+        self.data = {}
+
+    def get_data(self, key):
+        return self.data.get(key)
+
+    def set_data(self, key, value):
+        self.data[key] = value
+
+
+def stream(extension, agent, chunks: list[str]) -> dict:
+    full = ""
+    stream_data = {}
+    for chunk in chunks:
+        full += chunk
+        stream_data = {"chunk": chunk, "full": full}
+        asyncio.run(extension(agent=agent).execute(stream_data=stream_data))
+    return stream_data
+
+
+def test_interrupted_stream_does_not_leak_into_next(monkeypatch):
+    for module, extension in (
+        (response_mask, response_mask.MaskResponseStreamChunk),
+        (reasoning_mask, reasoning_mask.MaskReasoningStreamChunk),
+    ):
+        monkeypatch.setattr(module, "get_secrets_manager", lambda context: FakeSecretsManager())
+        agent = FakeAgent()
+
+        # interrupted, the stream end extension never finalizes this filter
+        first = stream(extension, agent, ["key is sk-live-4f9a", "8b7c6d5e and more"])
+        assert "sk-live" not in first["full"] and alias_for_key("API_KEY") in first["full"]
+
+        second = stream(extension, agent, ['{"tool_name": ', '"response"}'])
+        assert second["full"] == '{"tool_name": "response"}'
@@ -0,0 +1,200 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import anyio
+import pytest
+from python.helpers import mcp_handler
+
+
+class FakeSession:
+    sessions: list["FakeSession"] = []
+
+    def __init__(self, read, write, read_timeout_seconds=None):
+        self.initialized = 0
+        self.pings = 0
+        self.ping_fails = False
+        self.closed = False
+        self.running = 0
+        self.max_running = 0
+        FakeSession.sessions.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.closed = True
+
+    async def initialize(self):
+        self.initialized += 1
+
+    async def send_ping(self):
+        self.pings += 1
+        if self.ping_fails:
+            raise anyio.BrokenResourceError()
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[])
+
+
+class FakeClient(mcp_handler.MCPClientBase):
+    def __init__(self, server):
+        super().__init__(server)
+        self.connects = 0
+        self.fail = 0  # number of connection attempts to refuse
+
+    async def _create_stdio_transport(self, current_exit_stack):
+        self.connects += 1
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionRefusedError("refused")
+        return None, None
+
+
+@pytest.fixture(autouse=True)
+def fake_sessions(monkeypatch):
+    monkeypatch.setattr(mcp_handler, "ClientSession", FakeSession)
+    FakeSession.sessions = []
+
+
+def make_client() -> FakeClient:
+    return FakeClient(SimpleNamespace(name="fake"))
+
+
+def run(client: FakeClient, op):
+    return asyncio.run(client._execute_with_session(op))
+
+
+async def use(session):
+    return session
+
+
+def wait_closed(session: FakeSession):
+    deadline = time.monotonic() + 2
+    while not session.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return session.closed
+
+
+def test_session_reused():
+    client = make_client()
+    first = run(client, use)
+    assert run(client, use) is first
+    assert client.connects == 1 and first.initialized == 1 and first.pings == 0
+    client.close()
+    assert wait_closed(first)
+
+
+def test_reconnect_backoff():
+    client = make_client()
+    client.fail = 8
+    delays = []
+    for _ in range(8):
+        with pytest.raises(ConnectionRefusedError):
+            run(client, use)
+        delays.append(round(client._session_retry_at - time.monotonic()))
+        # no new connection attempt until the delay is over
+        with pytest.raises(ConnectionError, match="Reconnecting"):
+            run(client, use)
+        assert client.connects == len(delays)
+        client._session_retry_at = 0
+    assert delays == [1, 2, 4, 8, 16, 32, 60, 60]
+
+    session = run(client, use)
+    assert client.connects == 9 and client._session_failures == 0
+    client.close()
+    assert wait_closed(session)
+
+
+def test_idle_session_pinged():
+    client = make_client()
+    first = run(client, use)
+    client._session_used -= mcp_handler.SESSION_HEALTH_CHECK_IDLE - 1
+    assert run(client, use) is first and first.pings == 0
+
+    client._session_used -= mcp_handler.SESSION_HEALTH_CHECK_IDLE + 1
+    assert run(client, use) is first and first.pings == 1
+
+    # a dead session is replaced instead of failing the operation
+    first.ping_fails = True
+    client._session_used -= mcp_handler.SESSION_HEALTH_CHECK_IDLE + 1
+    second = run(client, use)
+    assert second is not first and client.connects == 2
+    assert wait_closed(first)
+    client.close()
+    assert wait_closed(second)
+
+
+def test_closed_stream_retried_once():
+    client = make_client()
+
+    async def closed_first(session):
+        if session is FakeSession.sessions[0]:
+            raise anyio.ClosedResourceError()
+        return session
+
+    second = run(client, closed_first)
+    assert second is FakeSession.sessions[1] and client.connects == 2
+    assert wait_closed(FakeSession.sessions[0])
+
+    async def always_closed(session):
+        raise anyio.ClosedResourceError()
+
+    with pytest.raises(anyio.ClosedResourceError):
+        run(client, always_closed)
+    assert client.connects == 3  # one retry only
+    run(client, use)
+    client.close()
+    assert wait_closed(FakeSession.sessions[-1])
+
+
+def test_in_flight_limit():
+    client = make_client()
+
+    async def slow(session):
+        session.running += 1
+        session.max_running = max(session.max_running, session.running)
+        await asyncio.sleep(0.05)
+        session.running -= 1
+        return session
+
+    async def many():
+        return await asyncio.gather(
+            *(client._execute_with_session(slow) for _ in range(10))
+        )
+
+    results = asyncio.run(many())
+    session = results[0]
+    assert all(r is session for r in results) and client.connects == 1
+    assert session.max_running == mcp_handler.SESSION_MAX_IN_FLIGHT
+    client.close()
+    assert wait_closed(session)
+
+
+def test_close_then_reconnect():
+    client = make_client()
+    first = run(client, use)
+    client.close()
+    assert wait_closed(first)
+    second = run(client, use)
+    assert second is not first and client.connects == 2
+    client.close()
+    assert wait_closed(second)
+
+
+def test_config_update_closes_old_sessions(monkeypatch):
+    monkeypatch.setattr(mcp_handler, "MCPClientLocal", FakeClient)
+    config = '{"mcpServers": {"fake": {"command": "fake"}}}'
+    try:
+        mcp_handler.MCPConfig.update(config)
+        first = FakeSession.sessions[-1]
+        mcp_handler.MCPConfig.update(config)
+        assert wait_closed(first)
+        second = FakeSession.sessions[-1]
+        assert second is not first and not second.closed
+    finally:
+        mcp_handler.MCPConfig.update("")
+    assert wait_closed(FakeSession.sessions[-1])
@@ -0,0 +1,72 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from python.helpers import memory_wal
+from python.helpers.memory_wal import MemoryWal
+
+
+def test_append_read(tmp_path):
+    wal = MemoryWal(str(tmp_path))
+    with wal.lock:
+        wal.append(("add", ["doc"], [[0.5, 1.0]]))
+        wal.append(("delete", ["a", "b"]), ("delete", ["c"]))
+    assert wal.read() == [("add", ["doc"], [[0.5, 1.0]]), ("delete", ["a", "b"]), ("delete", ["c"])]
+
+    # a write torn by a crash is dropped, everything before it survives
+    with open(wal.path, "ab") as f:
+        f.write(memory_wal._frame(("delete", ["d"]))[:-3])
+    assert len(wal.read()) == 3
+    wal.reset()
+
+
+def test_checkpoint(tmp_path, monkeypatch):
+    saved = []
+    wal = MemoryWal(str(tmp_path))
+    wal.attach({"docs": 1}, saved.append)
+
+    wal.checkpoint()  # nothing pending
+    assert saved == []
+
+    monkeypatch.setattr(memory_wal, "CHECKPOINT_SIZE", 10)
+    with wal.lock:
+        wal.append(("delete", ["a" * 20]))
+    for _ in range(100):
+        if saved:
+            break
+        time.sleep(0.01)
+
+    assert saved == [{"docs": 1}]
+    assert wal.read() == [] and not os.path.exists(wal.path)
+    assert wal.checkpoints == 1
+
+
+def test_torn_tail_does_not_hide_later_records(tmp_path):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_core.documents import Document
+    from python.helpers.memory import Memory, MyFaiss
+
+    def doc(id: str):
+        return Document(id, metadata={"id": id})
+
+    wal = MemoryWal(str(tmp_path))
+    with wal.lock:
+        wal.append(("add", [doc("a")], [[1.0, 0.0]]))
+    with open(wal.path, "ab") as f:
+        f.write(memory_wal._frame(("add", [doc("torn")], [[0.0, 1.0]]))[:-3])
+
+    # replay after the crash, then keep writing and crash again before any checkpoint
+    assert len(wal.read()) == 1
+    with wal.lock:
+        wal.append(("add", [doc("b")], [[0.0, 1.0]]), ("delete", ["a"]))
+
+    db = MyFaiss(
+        embedding_function=None,  # type: ignore
+        index=faiss.IndexFlatIP(2),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+    for record in MemoryWal(str(tmp_path)).read():
+        Memory._apply_wal_record(db, record)
+    assert list(db.get_all_docs()) == ["b"]
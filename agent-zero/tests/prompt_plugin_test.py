@@ -0,0 +1,67 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python.helpers import files
+
+PLUGIN = """
+import os
+from python.helpers.files import VariablesPlugin
+from python.helpers import files
+
+LOG = {log!r}
+open(LOG, "a").write("exec\\n")
+
+class Parts(VariablesPlugin):
+    def get_dependencies(self, file, backup_dirs=None):
+        return {dependencies!r}
+
+    def get_variables(self, file, backup_dirs=None):
+        open(LOG, "a").write("get\\n")
+        folder = backup_dirs[0]
+        names = sorted(n for n in os.listdir(folder) if n.startswith("part."))
+        return {{"parts": ",".join(files.read_prompt_file(os.path.join(folder, n)) for n in names)}}
+"""
+
+
+def setup(tmp_path, dependencies):
+    log = tmp_path / "log.txt"
+    (tmp_path / "parts.md").write_text("parts: {{parts}}")
+    (tmp_path / "parts.py").write_text(PLUGIN.format(log=str(log), dependencies=dependencies))
+    (tmp_path / "part.a.md").write_text("a")
+    return log
+
+
+def read(tmp_path):
+    return files.read_prompt_file("parts.md", [str(tmp_path)])
+
+
+def calls(log):
+    lines = log.read_text().split()
+    return lines.count("exec"), lines.count("get")
+
+
+def test_plugin_loaded_once(tmp_path):
+    log = setup(tmp_path, None)
+    assert read(tmp_path) == "parts: a"
+    assert read(tmp_path) == "parts: a"
+    assert calls(log) == (1, 2)  # not cacheable, but the module is not executed again
+
+
+def test_variables_memoized(tmp_path):
+    log = setup(tmp_path, [str(tmp_path / "part.*.md")])
+    assert read(tmp_path) == "parts: a"
+    assert read(tmp_path) == "parts: a"
+    assert calls(log) == (1, 1)
+
+    # new file matching the declared pattern
+    (tmp_path / "part.b.md").write_text("b")
+    assert read(tmp_path) == "parts: a,b"
+
+    # prompt files read by the plugin are tracked without being declared
+    setup(tmp_path, [])
+    (tmp_path / "part.b.md").unlink()
+    assert read(tmp_path) == "parts: a"  # plugin changed
+    (tmp_path / "part.a.md").write_text("changed")
+    assert read(tmp_path) == "parts: changed"
+    assert read(tmp_path) == "parts: changed"
+    assert calls(log) == (2, 4)
@@ -0,0 +1,43 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python.helpers import files, prompt_segments
+from python.helpers.prompt_segments import get_segment
+
+
+class FakeAgent:
+    def __init__(self):
+        self.data = {}
+
+    def get_data(self, key):
+        return self.data.get(key)
+
+    def set_data(self, key, value):
+        self.data[key] = value
+
+
+def test_segment_cache(tmp_path, monkeypatch):
+    agent = FakeAgent()
+    (tmp_path / "main.md").write_text("main {{x}}")
+    builds = []
+
+    def build():
+        builds.append(1)
+        return files.read_prompt_file("main.md", [str(tmp_path)], x=len(builds))
+
+    first = get_segment(agent, "main", ("a",), build)
+    assert first == "main 1"
+    assert get_segment(agent, "main", ("a",), build) is first
+    assert get_segment(agent, "main", ("b",), build) == "main 2"
+
+    # files are checked after the interval
+    (tmp_path / "main.md").write_text("changed {{x}}")
+    assert get_segment(agent, "main", ("b",), build) == "main 2"
+    monkeypatch.setattr(prompt_segments, "FILES_CHECK_INTERVAL", 0)
+    assert get_segment(agent, "main", ("b",), build) == "changed 3"
+
+    # declared dependencies
+    get_segment(agent, "extra", (), build, [str(tmp_path / "*.txt")])
+    (tmp_path / "new.txt").write_text("new")
+    assert get_segment(agent, "extra", (), build) == "changed 5"
+    assert len(builds) == 5
@@ -0,0 +1,46 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python.helpers import files
+
+
+def write(path, content):
+    path.write_text(content, encoding="utf-8")
+
+
+def test_render_and_includes(tmp_path):
+    custom, default = tmp_path / "custom", tmp_path / "default"
+    custom.mkdir(), default.mkdir()
+    dirs = [str(custom), str(default)]
+
+    write(default / "main.md", "Hi {{name}}, {{ include 'part.md' }} {{ include \"missing.md\" }} {{unknown}}")
+    write(default / "part.md", "part for {{name}}")
+    assert files.read_prompt_file("main.md", dirs, name="A0") == (
+        "Hi A0, part for A0 {{ include \"missing.md\" }} {{unknown}}"
+    )
+
+    # profile folders override included files
+    write(custom / "part.md", "custom part")
+    assert files.read_prompt_file("main.md", dirs, name="A0") == (
+        "Hi A0, custom part {{ include \"missing.md\" }} {{unknown}}"
+    )
+
+    # a value with placeholders is rendered the same way as before compiling
+    assert files.read_prompt_file("main.md", dirs, name="{{other}}", other="B") == (
+        "Hi B, custom part {{ include \"missing.md\" }} {{unknown}}"
+    )
+
+    write(default / "main.md", "Changed {{name}}")
+    assert files.read_prompt_file("main.md", dirs, name="A0") == "Changed A0"
+
+
+def test_parse_file(tmp_path):
+    dirs = [str(tmp_path)]
+    write(tmp_path / "obj.md", '```json\n{"name": {{name}}, "items": {{items}}}\n```')
+    assert files.parse_file("obj.md", dirs, name="A0", items=[1, "{{x}}"]) == {
+        "name": "A0",
+        "items": [1, "{{x}}"],
+    }
+
+    write(tmp_path / "text.md", "```\nfenced {{name}}\n```")
+    assert files.parse_file("text.md", dirs, name="A0") == "fenced A0\n"
@@ -0,0 +1,65 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+from python.helpers.rate_limiter import RateLimiter
+
+
+def test_wakes_when_window_has_room():
+    async def run():
+        limiter = RateLimiter(seconds=0.3, requests=2)  # type: ignore
+        start = time.monotonic()
+        await limiter.wait(requests=1)
+        await limiter.wait(requests=1)
+        assert time.monotonic() - start < 0.05
+
+        messages = []
+
+        async def callback(msg, key, total, limit):
+            messages.append((key, total, limit))
+            return False
+
+        await limiter.wait(callback, requests=1)
+        elapsed = time.monotonic() - start
+        assert 0.28 < elapsed < 0.5
+        assert messages == [("requests", 2, 2)]
+
+    asyncio.run(run())
+
+
+def test_fifo_across_threads():
+    limiter = RateLimiter(seconds=0.2, requests=1)  # type: ignore
+    order = []
+
+    def worker(n: int, delay: float):
+        async def run():
+            await asyncio.sleep(delay)
+            await limiter.wait(requests=1)
+            order.append(n)
+
+        asyncio.run(run())
+
+    threads = [threading.Thread(target=worker, args=(n, n * 0.02)) for n in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert order == [0, 1, 2, 3, 4]
+
+
+def test_accounting():
+    async def run():
+        limiter = RateLimiter(seconds=60, input=100, output=50)  # type: ignore
+        for _ in range(1000):
+            limiter.add(output=1)
+        assert await limiter.get_total("output") == 1000
+        assert len(limiter.values["output"]) < 10  # adds close in time share entries
+
+        # a usage over the limit on its own still gets into an empty window
+        limiter = RateLimiter(seconds=60, input=100)  # type: ignore
+        await asyncio.wait_for(limiter.wait(input=500), 1)
+        assert await limiter.get_total("input") == 500
+
+    asyncio.run(run())
@@ -0,0 +1,40 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import pytest
+from python.helpers.secrets import SecretMasker, StreamingSecretsFilter, alias_for_key
+
+secrets = {
+    "API_KEY": "sk-live-4f9a8b7c6d5e",
+    "PASSWORD": "hunter2hunter2",
+    "SHORT": "sk-live",
+}
+text = "use sk-live-4f9a8b7c6d5e with hunter2hunter2, not sk-live or sk-li or hunter"
+
+
+def test_masker_matches_sequential_replace():
+    masker = SecretMasker({v: k for k, v in secrets.items()})
+    expected = text
+    for key, value in sorted(secrets.items(), key=lambda x: len(x[1]), reverse=True):
+        expected = expected.replace(value, alias_for_key(key))
+    assert masker.mask(text) == expected
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_streaming_filter_never_leaks(seed: int):
+    rnd = random.Random(seed)
+    filter = StreamingSecretsFilter(secrets)
+    out = ""
+    pos = 0
+    while pos < len(text):
+        size = rnd.randint(1, 6)
+        out += filter.process_chunk(text[pos : pos + size])
+        pos += size
+    out += filter.finalize()
+
+    assert out == filter.emitted
+    for value in secrets.values():
+        assert value not in out
+    assert alias_for_key("API_KEY") in out
+    assert alias_for_key("PASSWORD") in out
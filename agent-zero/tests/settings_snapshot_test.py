@@ -0,0 +1,41 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import pytest
+from python.helpers import settings
+
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    monkeypatch.setattr(settings, "SETTINGS_FILE", str(path))
+    monkeypatch.setattr(settings, "SETTINGS_CHECK_INTERVAL", 0)
+    monkeypatch.setattr(settings, "_settings", None)
+    return path
+
+
+def test_snapshot_is_shared_and_read_only(settings_file):
+    current = settings.get_settings()
+    version = settings.get_settings_version()
+    assert settings.get_settings() is current
+    assert settings.get_settings_version() == version
+
+    with pytest.raises(TypeError):
+        current["agent_profile"] = "other"  # type: ignore
+    with pytest.raises(TypeError):
+        current["chat_model_kwargs"]["temperature"] = "1"
+
+    copy = current.copy()
+    copy["chat_model_kwargs"]["temperature"] = "1"
+    assert current["chat_model_kwargs"]["temperature"] == "0"
+    assert json.loads(json.dumps(current)) == settings.normalize_settings(copy) | {
+        "chat_model_kwargs": {"temperature": "0"}
+    }
+
+
+def test_snapshot_reloads_changed_file(settings_file):
+    version = settings.get_settings_version()
+    settings_file.write_text(json.dumps({"agent_profile": "researcher"}))
+    assert settings.get_settings()["agent_profile"] == "researcher"
+    assert settings.get_settings_version() == version + 1
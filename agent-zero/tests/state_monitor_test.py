@@ -0,0 +1,84 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+from python.helpers import state_monitor
+
+
+def test_wait_for_change():
+    async def run():
+        scopes = state_monitor.get_scopes("chat-a")
+        version = state_monitor.get_version()
+
+        # other chats do not wake the waiter
+        state_monitor.notify_change("chat-b")
+        assert not await state_monitor.wait_for_change(version, 0.05, scopes)
+
+        # a change from another thread does
+        timer = threading.Timer(0.05, state_monitor.notify_change, args=("chat-a",))
+        timer.start()
+        start = time.monotonic()
+        assert await state_monitor.wait_for_change(version, 5, scopes)
+        assert time.monotonic() - start < 1
+
+        # changes made before waiting answer at once, global ones wake every chat
+        version = state_monitor.get_version()
+        state_monitor.notify_change()
+        assert await state_monitor.wait_for_change(version, 5, scopes)
+        assert await state_monitor.wait_for_change(version, 5)
+        assert not state_monitor._waiters
+
+    asyncio.run(run())
+
+
+def test_log_notifies_its_context():
+    from python.helpers import files  # loads before strings, which imports it
+    from python.helpers.log import Log
+
+    class Context:
+        id = "chat-log"
+
+    log = Log()
+    log.context = Context()  # type: ignore
+    version = state_monitor.get_version()
+    log.log(type="info", content="hello")
+    assert state_monitor._scope_versions["chat-log"] > version
+
+
+def test_waits_limited_per_client(monkeypatch):
+    from types import SimpleNamespace
+    import agent  # loads before the api handlers, which import it
+    from python.api import poll, poll_wait
+
+    async def fake_poll(self, input, request):
+        return {"contexts": [], "tasks": []}
+
+    monkeypatch.setattr(poll.Poll, "process", fake_poll)
+    handler = poll_wait.PollWait(None, threading.Lock())  # type: ignore
+    client = SimpleNamespace(remote_addr="10.0.0.1")
+    other = SimpleNamespace(remote_addr="10.0.0.2")
+
+    async def run():
+        input = {"changes_version": state_monitor.get_version(), "context": "chat-wait"}
+        waits = [
+            asyncio.create_task(handler.process(input, client))  # type: ignore
+            for _ in range(poll_wait.MAX_WAITS_PER_CLIENT)
+        ]
+        await asyncio.sleep(0.05)
+        assert not any(w.done() for w in waits)
+
+        # one more wait of the same client would hold another thread, it answers at once
+        start = time.monotonic()
+        output = await handler.process({**input, "timeout": 5}, client)  # type: ignore
+        assert output["wait_refused"] and time.monotonic() - start < 1
+        output = await handler.process({**input, "timeout": 0.01}, other)  # type: ignore
+        assert "wait_refused" not in output
+
+        state_monitor.notify_change("chat-wait")
+        for output in await asyncio.gather(*waits):
+            assert "wait_refused" not in output
+        assert not poll_wait._waits
+
+    asyncio.run(run())
@@ -0,0 +1,94 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import pytest
+from python.helpers.stream_coalescer import StreamCoalescer
+
+
+class Recorder:
+    def __init__(self, name="", log=None):
+        self.name = name
+        self.calls = []
+        self.log = log if log is not None else []
+
+    async def __call__(self, chunk, full):
+        self.calls.append((chunk, full))
+        self.log.append(self.name)
+
+
+async def feed(stream, deltas):
+    full = ""
+    for delta in deltas:
+        full += delta
+        await stream.push(delta, full)
+    return full
+
+
+def test_batches_keep_every_byte():
+    async def run():
+        rec = Recorder()
+        stream = StreamCoalescer(rec, window=60)
+        deltas = [f"t{i} " for i in range(200)]
+        full = await feed(stream, deltas)
+        await stream.close()
+        return rec, full
+
+    rec, full = asyncio.run(run())
+    assert rec.calls[0] == ("t0 ", "t0 ")  # start of stream delivered at once
+    assert len(rec.calls) == 2
+    assert "".join(chunk for chunk, _ in rec.calls) == full
+    assert rec.calls[-1][1] == full
+
+
+def test_size_limit_and_disabled():
+    async def run():
+        sized = Recorder()
+        stream = StreamCoalescer(sized, window=60, max_chars=10)
+        await feed(stream, ["abcd"] * 10)
+        await stream.close()
+
+        direct = Recorder()
+        stream = StreamCoalescer(direct, window=0)
+        await feed(stream, ["abcd"] * 10)
+        await stream.close()
+        return sized, direct
+
+    sized, direct = asyncio.run(run())
+    assert [len(chunk) for chunk, _ in sized.calls] == [4, 12, 12, 12]
+    assert len(direct.calls) == 10
+
+
+def test_timer_and_order():
+    async def run():
+        log = []
+        reasoning = Recorder("reasoning", log)
+        response = Recorder("response", log)
+        reasoning_stream = StreamCoalescer(reasoning, window=0.02)
+        response_stream = StreamCoalescer(response, window=0.02, before=reasoning_stream.flush)
+        await feed(reasoning_stream, ["a", "b"])
+        await asyncio.sleep(0.05)  # provider pause, the timer delivers "b"
+        assert reasoning.calls == [("a", "a"), ("b", "ab")]
+        await reasoning_stream.push("c", "abc")
+        await response_stream.push("x", "x")
+        await reasoning_stream.close()
+        await response_stream.close()
+        return log
+
+    assert asyncio.run(run()) == ["reasoning", "reasoning", "reasoning", "response"]
+
+
+def test_timer_error_raised_on_push():
+    async def run():
+        async def fail(chunk, full):
+            if full != "a":
+                raise ValueError("intervention")
+
+        stream = StreamCoalescer(fail, window=0.01)
+        await feed(stream, ["a", "b"])
+        await asyncio.sleep(0.03)
+        with pytest.raises(ValueError):
+            await stream.push("c", "abc")
+        stream.cancel()
+
+    asyncio.run(run())
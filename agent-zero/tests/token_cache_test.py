@@ -0,0 +1,61 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from python.helpers import tokens
+
+
+class WordEncoding:
+    # stands in for tiktoken, whose encoding files may not be downloadable here
+    def __init__(self):
+        self.encoded: list[str] = []
+
+    def encode(self, text, **kwargs):
+        self.encoded.append(text)
+        return text.split()
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    encoding = WordEncoding()
+    monkeypatch.setattr(tokens, "get_encoding", lambda name: encoding)
+    tokens.clear_cache()
+    yield encoding
+    tokens.clear_cache()
+
+
+def test_counts_are_cached_and_bounded(encoding, monkeypatch):
+    monkeypatch.setattr(tokens, "TOKEN_CACHE_SIZE", 2)
+    assert tokens.count_tokens("hello world") == 2
+    assert tokens.count_tokens("hello " + "world") == 2  # equal content, other object
+    tokens.count_tokens("second")
+    tokens.count_tokens("third")  # evicts "hello world"
+    tokens.count_tokens("hello world")
+    assert encoding.encoded == ["hello world", "second", "third", "hello world"]
+    assert tokens.count_tokens("", "other") == 0
+
+
+def test_message_totals(encoding):
+    text = "The quick brown fox jumps over the lazy dog. " * 20
+    messages = [
+        HumanMessage(content=text),
+        AIMessage(content=[{"type": "text", "text": text}, {"type": "text", "text": "done"}]),
+    ]
+    expected = 2 * tokens.approximate_tokens(text) + tokens.approximate_tokens("done")
+    assert tokens.approximate_messages_tokens(messages) == expected
+    assert encoding.encoded == [text, "done"]  # the repeated text was counted once
+
+    as_dicts = [{"role": "user", "content": text}, {"role": "assistant", "content": None}]
+    assert tokens.approximate_messages_tokens(as_dicts) == tokens.approximate_tokens(text)
+
+
+def test_estimate_does_not_encode(encoding):
+    text = "Use the code_execution_tool to run `ls -la` in the terminal.\n" * 10
+    estimate = tokens.estimate_tokens(text)
+    assert 120 <= estimate <= 200  # tiktoken counts 160
+    assert tokens.estimate_tokens("这是中文") > 0 and tokens.estimate_tokens("") == 0
+    assert tokens.approximate_messages_tokens([{"content": text}], "estimate") == int(
+        estimate * tokens.APPROX_BUFFER
+    )
+    assert encoding.encoded == []
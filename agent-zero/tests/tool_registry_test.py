@@ -0,0 +1,40 @@
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent  # loads before the tool base class, which imports it
+from python.helpers import tool_registry
+
+TOOL = """
+from python.helpers.tool import Tool, Response
+
+class {name}(Tool):
+    async def execute(self, **kwargs):
+        return Response(message="{name}", break_loop=False)
+"""
+
+
+def write_tool(folder, file, name):
+    (folder / file).write_text(TOOL.format(name=name))
+
+
+def test_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(tool_registry, "DEFAULT_TOOLS_FOLDER", str(tmp_path))
+    tool_registry.reload()
+
+    write_tool(tmp_path, "greet.py", "Greet")
+    cls = tool_registry.get_tool_class("", "greet")
+    assert cls and cls.__name__ == "Greet"
+    assert tool_registry.get_tool_class("", "greet") is cls  # module not executed again
+    assert tool_registry.get_tool_class("", "missing") is None
+
+    write_tool(tmp_path, "greet.py", "GreetChanged")
+    changed = tool_registry.get_tool_class("", "greet")
+    assert changed and changed.__name__ == "GreetChanged"
+
+    tool_registry.reload()
+    assert tool_registry.get_tool_class("", "greet") is not changed
+
+    (tmp_path / "broken.py").write_text("raise ValueError('broken')")
+    tool_registry.preload()
+    assert tool_registry.get_tool_class("", "broken") is None
+    tool_registry.reload()
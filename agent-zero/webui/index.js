@@ -253,20 +253,64 @@ function setConnectionStatus(connected) {
 let lastLogVersion = 0;
 let lastLogGuid = "";
 let lastSpokenNo = 0;
+let changesVersion = null; // server state version of the last /poll_wait answer
+let listsHash = "";
+let changesWait = null; // aborts the pending /poll_wait request
+let waitSupported = true;
+let waitRefused = false; // the server has too many waits of this client, poll on an interval
+
+// long-poll /poll_wait, falls back to /poll when the server does not have it
+async function requestPoll(data, wait) {
+  if (!wait || !waitSupported) return await sendJsonData("/poll", data);
+  changesWait = new AbortController();
+  try {
+    const response = await api.fetchApi("/poll_wait", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      credentials: "same-origin",
+      body: JSON.stringify({
+        ...data,
+        changes_version: changesVersion,
+        lists_hash: listsHash,
+      }),
+      signal: changesWait.signal,
+    });
+    if (response.status === 404) {
+      waitSupported = false;
+      return await sendJsonData("/poll", data);
+    }
+    if (!response.ok) throw new Error(await response.text());
+    const json = await response.json();
+    changesVersion = json.changes_version;
+    listsHash = json.lists_hash;
+    waitRefused = !!json.wait_refused;
+    return json;
+  } finally {
+    changesWait = null;
+  }
+}
+
+function abortChangesWait() {
+  changesVersion = null; // the next request answers at once
+  if (changesWait) changesWait.abort();
+}
 
-export async function poll() {
+export async function poll(wait = false) {
   let updated = false;
   try {
     // Get timezone from navigator
     const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
 
     const log_from = lastLogVersion;
-    const response = await sendJsonData("/poll", {
-      log_from: log_from,
-      notifications_from: notificationStore.lastNotificationVersion || 0,
-      context: context || null,
-      timezone: timezone,
-    });
+    const response = await requestPoll(
+      {
+        log_from: log_from,
+        notifications_from: notificationStore.lastNotificationVersion || 0,
+        context: context || null,
+        timezone: timezone,
+      },
+      wait
+    );
 
     // Check if the response is valid
     if (!response) {
@@ -328,13 +372,15 @@ export async function poll() {
     // Update status icon state
     setConnectionStatus(true);
 
-    // Update chats list using store
-    let contexts = response.contexts || [];
-    chatsStore.applyContexts(contexts);
+    // Update chats and tasks lists using stores, unless they did not change
+    let contexts = chatsStore.contexts;
+    if (!response.lists_unchanged) {
+      contexts = response.contexts || [];
+      chatsStore.applyContexts(contexts);
 
-    // Update tasks list using store
-    let tasks = response.tasks || [];
-    tasksStore.applyTasks(tasks);
+      let tasks = response.tasks || [];
+      tasksStore.applyTasks(tasks);
+    }
 
     // Make sure the active context is properly selected in both lists
     if (context) {
@@ -381,6 +427,7 @@ export async function poll() {
     lastLogVersion = response.log_version;
     lastLogGuid = response.log_guid;
   } catch (error) {
+    if (error.name === "AbortError") return updated; // context switched while waiting
     console.error("Error:", error);
     setConnectionStatus(false);
   }
@@ -478,6 +525,7 @@ export const setContext = function (id) {
   lastLogGuid = "";
   lastLogVersion = 0;
   lastSpokenNo = 0;
+  abortChangesWait();
 
   // Stop speech when switching chats
   speechStore.stopAudio();
@@ -582,6 +630,16 @@ async function startPolling() {
   async function _doPoll() {
     let nextInterval = longInterval;
 
+    // wait for changes on the server, poll on an interval if it cannot
+    if (waitSupported) {
+      await poll(true);
+      setTimeout(
+        _doPoll.bind(this),
+        getConnectionStatus() && !waitRefused ? 0 : longInterval
+      );
+      return;
+    }
+
     try {
       const result = await poll();
       if (result) shortIntervalCount = shortIntervalPeriod; // Reset the counter when the result is true